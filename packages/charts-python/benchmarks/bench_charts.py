@@ -0,0 +1,84 @@
+# /**
+# * Copyright (c) 2024 Visa, Inc.
+# *
+# * This source code is licensed under the MIT license
+# * https://github.com/visa/visa-chart-components/blob/master/LICENSE
+# *
+# **/
+import pyvisacharts as vcc
+from .common import (
+    CHARTS, chart_columns, chart_data, make_chart, make_frame, reset_caches,
+    use_recording_comm, validate_data,
+)
+
+# asv benchmarks of data conversion and syncing for every chart class, see
+# README.md in this directory.
+
+ROWS = [1000, 100000, 1000000, 10000000]
+WIDTHS = ['narrow', 'wide']
+TRANSPORTS = ['records', 'columnar']
+
+
+class ChartData(object):
+    params = [CHARTS, ROWS, WIDTHS, TRANSPORTS]
+    param_names = ['chart', 'rows', 'width', 'transport']
+    # each sample converts the data once, the conversion cache is cleared in between
+    number = 1
+    repeat = (1, 5, 30.0)
+    timeout = 600
+
+    def setup(self, chart, rows, width, transport):
+        if width == 'wide' and rows > 100000:
+            raise NotImplementedError('wide frames stop at 100k rows')
+        if transport == 'records' and rows > 1000000:
+            raise NotImplementedError('records stop at 1M rows')
+        use_recording_comm()
+        self.chart = make_chart(chart, transport)
+        frame = make_frame(chart_columns(chart), rows, wide=width == 'wide')
+        self.value = chart_data(self.chart, frame)
+        self.trait = self.chart._data_traits[0]
+        setattr(self.chart, self.trait, self.value)
+
+    def teardown(self, chart, rows, width, transport):
+        self.chart.close()
+        vcc.conversion_cache.clear()
+
+    def time_validate_data(self, chart, rows, width, transport):
+        reset_caches(self.chart)
+        validate_data(self.chart, self.value)
+
+    def peakmem_validate_data(self, chart, rows, width, transport):
+        reset_caches(self.chart)
+        validate_data(self.chart, self.value)
+
+    def time_reassign_unchanged(self, chart, rows, width, transport):
+        # recognised by its fingerprint, nothing is converted or sent
+        setattr(self.chart, self.trait, self.value)
+
+    def track_message_bytes(self, chart, rows, width, transport):
+        self.chart.comm.reset()
+        self.chart.send_state(self.trait)
+        return self.chart.comm.bytes
+
+    track_message_bytes.unit = 'bytes'
+
+    def time_get_state(self, chart, rows, width, transport):
+        self.chart.get_state()
+
+
+class SharedData(object):
+    """Many charts drawn from the same frame, the case the conversion cache is for."""
+
+    params = [[10, 50], [100000]]
+    param_names = ['charts', 'rows']
+    number = 1
+    repeat = (1, 5, 30.0)
+
+    def setup(self, charts, rows):
+        use_recording_comm()
+        self.frame = make_frame(chart_columns('BarChart'), rows)
+        vcc.conversion_cache.clear()
+
+    def time_create_charts(self, charts, rows):
+        for _ in range(charts):
+            vcc.BarChart(data=self.frame).close()
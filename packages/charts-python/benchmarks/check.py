@@ -0,0 +1,165 @@
+# /**
+# * Copyright (c) 2024 Visa, Inc.
+# *
+# * This source code is licensed under the MIT license
+# * https://github.com/visa/visa-chart-components/blob/master/LICENSE
+# *
+# **/
+"""Checks data conversion and syncing against the stored baselines.
+
+    python -m benchmarks.check            # exits with 1 on a regression
+    python -m benchmarks.check --update   # stores the current results as baselines
+
+Message bytes and memory do not depend on the machine, they are checked with a
+small tolerance. Times are divided by the time of a fixed calibration workload
+run alongside, which makes them roughly comparable across machines and load,
+`--time-factor 0` skips them.
+"""
+import argparse
+import gc
+import json
+import os
+import sys
+import time
+import tracemalloc
+import numpy as np
+from .common import (
+    CHARTS, chart_columns, chart_data, make_chart, make_frame, reset_caches,
+    use_recording_comm, validate_data,
+)
+
+BASELINES = os.path.join(os.path.dirname(__file__), 'baselines.json')
+ROWS = 10000
+WIDTHS = ['narrow', 'wide']
+TRANSPORTS = ['records', 'columnar']
+
+# allowed growth of each metric over its baseline
+BYTES_TOLERANCE = 1.01
+MEMORY_TOLERANCE = 1.10
+_TIMES = ('validate_data', 'get_state')
+
+
+def _timed(function, repeat):
+    # like timeit: the fastest run, without garbage collection
+    times = []
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for _ in range(repeat):
+            start = time.perf_counter()
+            function()
+            times.append(time.perf_counter() - start)
+    finally:
+        if enabled:
+            gc.enable()
+    return min(times)
+
+
+def calibrate(repeat=7):
+    """Returns the time of a fixed workload similar to data conversion: building
+    rows in Python and sorting arrays in NumPy."""
+    values = np.random.default_rng(0).random(200000)
+
+    def workload():
+        rows = [{'label': i, 'value': value} for i, value in enumerate(values[:50000].tolist())]
+        np.sort(values)
+        return rows
+
+    return _timed(workload, repeat)
+
+
+def measure(chart_name, width, transport, repeat=7):
+    """Returns the metrics of converting and syncing a frame with a chart."""
+    chart = make_chart(chart_name, transport)
+    frame = make_frame(chart_columns(chart_name), ROWS, wide=width == 'wide')
+    value = chart_data(chart, frame)
+    trait = chart._data_traits[0]
+    try:
+        setattr(chart, trait, value)
+        chart.comm.reset()
+        chart.send_state(trait)
+        message_bytes = chart.comm.bytes
+        get_state = _timed(chart.get_state, repeat)
+
+        def validate():
+            reset_caches(chart)
+            validate_data(chart, value)
+
+        validate_time = _timed(validate, repeat)
+        reset_caches(chart)
+        tracemalloc.start()
+        validate_data(chart, value)
+        memory = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    finally:
+        chart.close()
+    return {
+        'validate_data': validate_time,
+        'peak_memory': memory,
+        'message_bytes': message_bytes,
+        'get_state': get_state,
+    }
+
+
+def compare(results, baselines, time_factor):
+    """Returns a message per regression of `results` against `baselines`."""
+    limits = {'message_bytes': BYTES_TOLERANCE, 'peak_memory': MEMORY_TOLERANCE}
+    if time_factor:
+        limits.update(validate_data=time_factor, get_state=time_factor)
+    # times are compared relative to the calibration workload of each run
+    speed = baselines['calibration'] / results['calibration']
+    regressions = []
+    for case, metrics in sorted(results['cases'].items()):
+        baseline = baselines['cases'].get(case)
+        if baseline is None:
+            continue
+        for metric, factor in limits.items():
+            value = metrics[metric]
+            if metric in _TIMES:
+                # times this small are noise, they are not compared
+                if baseline[metric] < 0.01:
+                    continue
+                value *= speed
+            if value > baseline[metric] * factor:
+                regressions.append('{} {}: {:.4g} > {:.4g} (x{:.2f})'.format(
+                    case, metric, value, baseline[metric], value / baseline[metric]))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--update', action='store_true', help='store the results as the new baselines')
+    parser.add_argument('--time-factor', type=float, default=1.5,
+                        help='allowed slowdown, 0 to skip the times (default: 1.5)')
+    parser.add_argument('--charts', nargs='*', default=CHARTS, help='chart classes to run')
+    args = parser.parse_args(argv)
+
+    use_recording_comm()
+    results = {'calibration': calibrate(), 'cases': {}}
+    print('calibration {:.4f}s'.format(results['calibration']))
+    for chart_name in args.charts:
+        for width in WIDTHS:
+            for transport in TRANSPORTS:
+                case = '{}/{}/{}/{}'.format(chart_name, ROWS, width, transport)
+                metrics = results['cases'][case] = measure(chart_name, width, transport)
+                print('{:45} {validate_data:8.4f}s {peak_memory:>11,}B {message_bytes:>11,}B '
+                      '{get_state:8.4f}s'.format(case, **metrics))
+
+    # the calibration is measured again at the end, the least loaded value is used
+    results['calibration'] = min(results['calibration'], calibrate())
+    if args.update:
+        with open(BASELINES, 'w') as f:
+            json.dump(results, f, indent=1, sort_keys=True)
+            f.write('\n')
+        print('Stored {} baselines in {}'.format(len(results['cases']), BASELINES))
+        return 0
+    with open(BASELINES) as f:
+        baselines = json.load(f)
+    regressions = compare(results, baselines, args.time_factor)
+    for regression in regressions:
+        print('REGRESSION', regression)
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,133 @@
+# /**
+# * Copyright (c) 2024 Visa, Inc.
+# *
+# * This source code is licensed under the MIT license
+# * https://github.com/visa/visa-chart-components/blob/master/LICENSE
+# *
+# **/
+import json
+import comm
+from comm.base_comm import BaseComm
+import numpy as np
+import pandas as pd
+from traitlets import Bunch, List
+import pyvisacharts as vcc
+
+# Synthetic data and a headless comm shared by the benchmarks.
+
+CHARTS = [
+    'BarChart', 'ClusteredBarChart', 'StackedBarChart', 'LineChart', 'PieChart', 'ScatterPlot',
+    'HeatMap', 'CirclePacking', 'ParallelPlot', 'DumbbellPlot', 'WorldMap', 'AlluvialDiagram',
+]
+
+# accessors for the charts whose defaults are empty, every chart gets the columns it uses
+ACCESSORS = {
+    'CirclePacking': dict(nodeAccessor='label', parentAccessor='parent', sizeAccessor='value'),
+    'ParallelPlot': dict(ordinalAccessor='label', seriesAccessor='group', valueAccessor='value'),
+    'DumbbellPlot': dict(ordinalAccessor='label', seriesAccessor='group', valueAccessor='value'),
+    'WorldMap': dict(latitudeAccessor='lat', longitudeAccessor='lon', markerAccessor='label',
+                     valueAccessor='value'),
+    'AlluvialDiagram': dict(sourceAccessor='source', targetAccessor='target', valueAccessor='value'),
+}
+
+# number of distinct values of the string columns
+_CARDINALITY = {'label': 1000, 'category': 50, 'group': 20, 'source': 30, 'target': 30, 'parent': 100}
+_DATES = ('date',)
+# wide frames add filler columns of every type
+WIDE_COLUMNS = 40
+
+_frames = {}
+
+
+class RecordingComm(BaseComm):
+    """A comm that only counts the bytes of the messages a widget sends."""
+
+    def __init__(self, **kwargs):
+        self.messages = 0
+        self.bytes = 0
+        super().__init__(**kwargs)
+
+    def publish_msg(self, msg_type, data=None, metadata=None, buffers=None, **keys):
+        self.messages += 1
+        self.bytes += len(json.dumps(data, separators=(',', ':'), default=str))
+        self.bytes += sum(memoryview(buffer).nbytes for buffer in buffers or [])
+
+    def reset(self):
+        self.messages = 0
+        self.bytes = 0
+
+
+def use_recording_comm():
+    """Makes widgets open a RecordingComm, so they work without a kernel."""
+    comm.create_comm = RecordingComm
+
+
+def chart_columns(name):
+    """Returns the columns used by the chart class `name` with its accessors."""
+    cls = getattr(vcc, name)
+    accessors = dict((trait, cls.class_traits()[trait].default()) for trait in cls.class_trait_names()
+                     if trait.endswith('Accessor'))
+    accessors.update(ACCESSORS.get(name, {}))
+    return [column for column in dict.fromkeys(accessors.values()) if column]
+
+
+def make_frame(columns, rows, wide=False, seed=0):
+    """Returns a DataFrame of `rows` rows with the given columns, plus filler columns
+    of mixed types when `wide`. Frames are cached, they are never modified."""
+    key = (tuple(columns), rows, wide, seed)
+    if key not in _frames:
+        rng = np.random.default_rng(seed)
+        data = {name: _column(rng, name, rows) for name in columns}
+        if wide:
+            kinds = ('float', 'int', 'str', 'date')
+            for i in range(WIDE_COLUMNS):
+                data['extra{}_{}'.format(i, kinds[i % 4])] = _filler(rng, kinds[i % 4], rows)
+        _frames[key] = pd.DataFrame(data)
+    return _frames[key]
+
+
+def _column(rng, name, rows):
+    if name in _CARDINALITY:
+        return _strings(rng, name, _CARDINALITY[name], rows)
+    if name in _DATES:
+        return pd.date_range('2020-01-01', periods=rows, freq='min').values
+    return rng.normal(100, 25, rows)
+
+
+def _strings(rng, prefix, cardinality, rows):
+    values = np.array(['{}{}'.format(prefix, i) for i in range(cardinality)], dtype=object)
+    return values[rng.integers(cardinality, size=rows)]
+
+
+def _filler(rng, kind, rows):
+    if kind == 'float':
+        return rng.random(rows)
+    if kind == 'int':
+        return rng.integers(0, 1000, rows)
+    if kind == 'str':
+        return _strings(rng, 'v', 200, rows)
+    return pd.date_range('2020-01-01', periods=rows, freq='s').values
+
+
+def make_chart(name, transport='records'):
+    """Returns an empty chart of the class `name` with the benchmark accessors."""
+    cls = getattr(vcc, name)
+    return cls(transport=transport, **ACCESSORS.get(name, {}))
+
+
+def chart_data(chart, frame):
+    """Returns `frame` in a form the chart's data trait accepts."""
+    trait = chart.traits()[chart._data_traits[0]]
+    return frame.to_dict('records') if isinstance(trait, List) else frame
+
+
+def validate_data(chart, value):
+    """Runs the data validator of `chart` the way traitlets does, returns its result."""
+    name = chart._data_traits[0]
+    return chart._validate_data(Bunch(owner=chart, trait=chart.traits()[name], value=value))
+
+
+def reset_caches(chart):
+    """Forgets converted data, so the next assignment converts it again."""
+    vcc.conversion_cache.clear()
+    chart._data_keys.clear()
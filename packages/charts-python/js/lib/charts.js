@@ -7,7 +7,7 @@
  **/
 
 // var widgets = require('@jupyter-widgets/base');
-import { DOMWidgetModel, DOMWidgetView } from '@jupyter-widgets/base';
+import { DOMWidgetModel, DOMWidgetView, WidgetModel, put_buffers, unpack_models } from '@jupyter-widgets/base';
 var pkg = require('../package.json');
 
 // temporary comment to bump charts with feature commit
@@ -94,11 +94,381 @@ export class ChartModel extends DOMWidgetModel {
       mainTitle: '',
       subTitle: '',
       accessibility: {},
-      config: {}
+      config: {},
+      selection: [],
+      hover_interval: 0.1,
+      // WorldMap only, the kernel re-clusters the markers when they change
+      extent: [],
+      cluster_level: 4,
+      _hover_events: false
     };
   }
+
+  initialize(attributes, options) {
+    super.initialize(attributes, options);
+    this.on('msg:custom', this.handleRowsMessage, this);
+  }
+
+  handleRowsMessage(content, buffers) {
+    applyRowsMessage(this, content, buffers);
+  }
+}
+
+// Model of the DataSource widget in charts.py: rows shared by the charts that
+// reference it as their data. It has no view, the charts subscribe to it.
+export class DataSourceModel extends WidgetModel {
+  defaults() {
+    return {
+      ...super.defaults(),
+      _model_name: 'DataSourceModel',
+      _model_module: pkg.name,
+      _model_module_version: pkg.version,
+      _view_name: null,
+      _view_module: null,
+      _view_module_version: '',
+
+      data: []
+    };
+  }
+
+  initialize(attributes, options) {
+    super.initialize(attributes, options);
+    this.on('msg:custom', this.handleRowsMessage, this);
+  }
+
+  handleRowsMessage(content, buffers) {
+    applyRowsMessage(this, content, buffers);
+  }
+}
+
+const ROW_EVENTS = ['append_rows', 'update_rows', 'trim'];
+
+// Applies the row changes sent by append_rows, update_rows and trim in
+// charts.py to a model's synced data in place, then tells the views to redraw.
+function applyRowsMessage(model, content, buffers) {
+  const start = performance.now();
+  const data = model.get(content.trait);
+  if (!ROW_EVENTS.includes(content.event) || !Array.isArray(data)) {
+    return;
+  }
+  put_buffers(content, content.buffer_paths || [], buffers || []);
+  const rows = content.rows ? deserializeData(content.rows) : [];
+  const timing = { start, decode: performance.now() - start };
+  if (content.event === 'append_rows') {
+    rows.forEach(row => data.push(row));
+  } else if (content.event === 'update_rows') {
+    const pending = new Map();
+    rows.forEach(row => pending.set(rowKey(row, content.keys), row));
+    // recent rows are the likeliest to change, so search from the end
+    for (let i = data.length - 1; i >= 0 && pending.size; i--) {
+      const key = rowKey(data[i], content.keys);
+      if (pending.has(key)) {
+        data[i] = { ...data[i], ...pending.get(key) };
+        pending.delete(key);
+      }
+    }
+    pending.forEach(row => data.push(row));
+  } else if (content.event === 'trim' && content.by) {
+    // keeps the last max_rows rows of each value of the `by` column
+    const counts = new Map();
+    const keep = new Array(data.length);
+    for (let i = data.length - 1; i >= 0; i--) {
+      const key = rowKey(data[i], [content.by]);
+      const count = (counts.get(key) || 0) + 1;
+      counts.set(key, count);
+      keep[i] = count <= content.max_rows;
+    }
+    let kept = 0;
+    for (let i = 0; i < data.length; i++) {
+      if (keep[i]) {
+        data[kept++] = data[i];
+      }
+    }
+    data.length = kept;
+  } else if (content.event === 'trim') {
+    const excess = data.length - content.max_rows;
+    if (excess > 0) {
+      data.splice(0, excess);
+    }
+  }
+  // the rows no longer match the packed payload they were decoded from
+  storedPayloads.delete(data);
+  model.trigger('rows:changed', content.trait, timing);
+  if (content.seq !== undefined && model.comm_live) {
+    // lets the kernel hold back streamed rows while the browser is behind
+    model.send({ event: 'rows_applied', seq: content.seq }, {});
+  }
+}
+
+const DATA_PROPS = ['data', 'linkData', 'nodeData'];
+const ACCESSOR_PROPS = [
+  'ordinalAccessor',
+  'valueAccessor',
+  'groupAccessor',
+  'seriesAccessor',
+  'xAccessor',
+  'yAccessor',
+  'nodeAccessor',
+  'parentAccessor',
+  'sizeAccessor',
+  'joinAccessor',
+  'joinNameAccessor',
+  'markerAccessor',
+  'markerNameAccessor',
+  'latitudeAccessor',
+  'longitudeAccessor',
+  'sourceAccessor',
+  'targetAccessor',
+  'nodeIDAccessor'
+];
+const TITLE_PROPS = ['mainTitle', 'subTitle'];
+// Properties other than the data whose changes make the chart redraw
+const REDRAW_PROPS = [...ACCESSOR_PROPS, ...TITLE_PROPS, 'accessibility', 'config'];
+
+const DATE_REGEX = /^\d{4}[\/\-](0?[1-9]|[12][0-9]|3[01])[\/\-](0?[1-9]|1[012])/;
+
+// Converts date strings to Date objects in place, for data without a schema.
+function convertDates(rows) {
+  rows.forEach(d => {
+    Object.keys(d).forEach(k => {
+      if (DATE_REGEX.test(d[k])) {
+        d[k] = new Date(d[k]);
+      }
+    });
+  });
+  return rows;
+}
+
+function rowKey(row, keys) {
+  return JSON.stringify(keys.map(k => (row[k] instanceof Date ? row[k].getTime() : row[k])));
 }
 
+// TypedArray constructors for the dtypes of binary columns sent by charts.py.
+const TYPED_ARRAYS = {
+  int8: Int8Array,
+  uint8: Uint8Array,
+  int16: Int16Array,
+  uint16: Uint16Array,
+  int32: Int32Array,
+  uint32: Uint32Array,
+  float32: Float32Array,
+  float64: Float64Array,
+  bool: Uint8Array
+};
+
+function toDate(v) {
+  return v === null || v === undefined || (typeof v === 'number' && isNaN(v)) ? null : new Date(v);
+}
+
+function decodeColumn(column, length) {
+  let values = column.values;
+  if (column.buffer) {
+    const TypedArray = TYPED_ARRAYS[column.dtype];
+    const view = column.buffer;
+    // view the buffer in place when it is aligned, copy it otherwise
+    values =
+      view.byteOffset % TypedArray.BYTES_PER_ELEMENT === 0
+        ? new TypedArray(view.buffer, view.byteOffset, length)
+        : new TypedArray(view.buffer.slice(view.byteOffset, view.byteOffset + view.byteLength));
+  }
+  if (column.dtype === 'bool') {
+    return Array.from(values, v => v === 1);
+  }
+  if (column.type === 'date') {
+    return Array.from(values, toDate);
+  }
+  if (column.dictionary) {
+    // codes into the distinct values of a string column
+    return Array.from(values, code => column.dictionary[code]);
+  }
+  if (column.scale !== undefined || column.null !== undefined) {
+    // numbers sent as scaled integers, the lowest value of the dtype is missing
+    const scale = column.scale || 1;
+    return Array.from(values, v => (v === column.null ? NaN : v / scale));
+  }
+  return values;
+}
+
+const textDecoder = new TextDecoder();
+
+// Records are sent as a binary buffer of JSON text (see encode_records in
+// _data.py), state saved by older versions holds the rows themselves.
+function decodeRows(rows) {
+  return ArrayBuffer.isView(rows) ? JSON.parse(textDecoder.decode(rows)) : rows;
+}
+
+// Rebuilds row objects from a payload sent by charts.py (see _data.py). The
+// payload's schema says which columns hold dates, so only those are converted,
+// and dictionary encoded or scaled columns are decoded to their values.
+// Plain arrays, e.g. from widget state saved by older versions, fall back to
+// testing every value for a date string.
+export function deserializeData(value) {
+  if (Array.isArray(value)) {
+    return convertDates(value);
+  }
+  if (value && value.encoding === 'records') {
+    const rows = decodeRows(value.rows);
+    Object.entries(value.dictionaries || {}).forEach(([name, dictionary]) => {
+      rows.forEach(row => {
+        row[name] = dictionary[row[name]];
+      });
+    });
+    Object.keys(value.schema)
+      .filter(name => value.schema[name] === 'date')
+      .forEach(name => {
+        rows.forEach(row => {
+          if (name in row) {
+            row[name] = toDate(row[name]);
+          }
+        });
+      });
+    return rows;
+  }
+  if (!value || value.encoding !== 'columnar') {
+    return value;
+  }
+  const length = value.length;
+  const rows = new Array(length);
+  for (let i = 0; i < length; i++) {
+    rows[i] = {};
+  }
+  value.columns.forEach(column => {
+    const values = decodeColumn(column, length);
+    const name = column.name;
+    for (let i = 0; i < length; i++) {
+      rows[i][name] = values[i];
+    }
+  });
+  return rows;
+}
+
+// When each payload was received and the time spent rebuilding its rows, read
+// once by the view that draws them for its render samples.
+const decodeTimes = new WeakMap();
+
+function timedDeserializeData(value) {
+  const start = performance.now();
+  const rows = deserializeData(value);
+  if (rows && typeof rows === 'object') {
+    decodeTimes.set(rows, { start, decode: performance.now() - start });
+  }
+  return rows;
+}
+
+// Payloads packed by a widget's `state_storage` (see pack_payload in _data.py)
+// are one deflate-compressed buffer, or a link to a file holding it. The rows
+// decoded from one keep it, so the notebook's saved state holds the buffer or
+// link instead of the rows.
+const storedPayloads = new WeakMap();
+
+// Embedded pages only decode packed data once its chart scrolls into view, see
+// embed.js. In a notebook it is decoded when received, like other payloads.
+let lazyData = false;
+
+export function loadDataLazily(lazy = true) {
+  lazyData = lazy;
+}
+
+async function inflate(bytes) {
+  const stream = new Blob([bytes]).stream().pipeThrough(new DecompressionStream('deflate'));
+  return new Response(stream).arrayBuffer();
+}
+
+// The body of a packed payload: the length of a JSON header (uint32), the header
+// and the payload's binary buffers, each at a multiple of 8 bytes after it.
+function unpackBody(buffer) {
+  const headerLength = new DataView(buffer).getUint32(0, true);
+  const header = JSON.parse(textDecoder.decode(new Uint8Array(buffer, 4, headerLength)));
+  const start = Math.ceil((4 + headerLength) / 8) * 8;
+  const buffers = header.offsets.map(([offset, size]) => new DataView(buffer, start + offset, size));
+  put_buffers(header.payload, header.buffer_paths, buffers);
+  return header.payload;
+}
+
+// Packed data not decoded yet, `load` returns a promise of its rows.
+export class StoredData {
+  constructor(payload) {
+    this.payload = payload;
+    this._rows = null;
+  }
+
+  load() {
+    if (!this._rows) {
+      const body = this.payload.body
+        ? Promise.resolve(this.payload.body)
+        : fetch(this.payload.href).then(response => {
+            if (!response.ok) {
+              throw new Error(`Could not load the chart data ${this.payload.href}: ${response.status}`);
+            }
+            return response.arrayBuffer();
+          });
+      this._rows = body.then(inflate).then(buffer => {
+        const start = performance.now();
+        const rows = deserializeData(unpackBody(buffer));
+        decodeTimes.set(rows, { start, decode: performance.now() - start });
+        storedPayloads.set(rows, this.payload);
+        return rows;
+      });
+    }
+    return this._rows;
+  }
+}
+
+function deserializeStoredData(value) {
+  const stored = new StoredData(value);
+  return lazyData ? stored : stored.load();
+}
+
+function deserializeSourceData(value) {
+  return value && value.encoding === 'packed' ? deserializeStoredData(value) : timedDeserializeData(value);
+}
+
+// Chart data is either a payload or a reference to a DataSource model.
+function deserializeChartData(value, manager) {
+  if (typeof value === 'string' && value.startsWith('IPY_MODEL_')) {
+    return unpack_models(value, manager);
+  }
+  return deserializeSourceData(value);
+}
+
+// Saves packed data as it was received, without the buffer when it is in a file.
+function serializeData(value) {
+  if (value instanceof WidgetModel) {
+    return value.toJSON();
+  }
+  const payload = value instanceof StoredData ? value.payload : storedPayloads.get(value);
+  if (payload) {
+    if (!payload.href) {
+      return payload;
+    }
+    const { body, ...link } = payload;
+    return link;
+  }
+  return JSON.parse(JSON.stringify(value));
+}
+
+ChartModel.serializers = {
+  ...DOMWidgetModel.serializers,
+  data: { deserialize: deserializeChartData, serialize: serializeData },
+  linkData: { deserialize: deserializeChartData, serialize: serializeData },
+  nodeData: { deserialize: deserializeChartData, serialize: serializeData }
+};
+
+DataSourceModel.serializers = {
+  ...WidgetModel.serializers,
+  data: { deserialize: deserializeSourceData, serialize: serializeData }
+};
+
+// Render samples are sent to charts.py every RENDER_STATS_INTERVAL ms, or as
+// soon as RENDER_STATS_BATCH of them are waiting.
+const RENDER_STATS_INTERVAL = 2000;
+const RENDER_STATS_BATCH = 50;
+// A redraw the chart has not finished after this long is dropped, e.g. when
+// the new value did not change anything and the chart did not draw at all.
+const RENDER_STATS_TIMEOUT = 30000;
+// Most hover events kept for one message, the oldest are dropped first.
+const HOVER_BATCH = 20;
+
 // Custom View. Renders the widget model.
 export class ChartView extends DOMWidgetView {
   // _chart: HTMLElement,
@@ -106,6 +476,8 @@ export class ChartView extends DOMWidgetView {
   // Defines how the widget gets rendered into the DOM
   render() {
     this._chart = document.createElement(this.model.get('chartType'));
+    this._renderSamples = [];
+    this.beginSample('render', this.dataTiming());
 
     var style = document.createElement('style');
     style.innerHTML = `
@@ -126,9 +498,9 @@ export class ChartView extends DOMWidgetView {
     `;
     document.head.appendChild(style);
 
-    this._chart.data = this.model.get('data');
-    this._chart.linkData = this.model.get('linkData');
-    this._chart.nodeData = this.model.get('nodeData');
+    this._chart.data = this.resolveData('data');
+    this._chart.linkData = this.resolveData('linkData');
+    this._chart.nodeData = this.resolveData('nodeData');
     this._chart.ordinalAccessor = this.model.get('ordinalAccessor');
     this._chart.valueAccessor = this.model.get('valueAccessor');
     this._chart.groupAccessor = this.model.get('groupAccessor');
@@ -150,12 +522,18 @@ export class ChartView extends DOMWidgetView {
     this._chart.mainTitle = this.model.get('mainTitle');
     this._chart.subTitle = this.model.get('subTitle');
     this._chart.accessibility = this.model.get('accessibility');
+    if (this.model.get('selection').length) {
+      this._chart.clickHighlight = this.model.get('selection');
+    }
 
     // since we re-render everytime we can simply add event listeners
     // if we get lifecycle involved we will have to check if they exist already or not
-    this._chart.addEventListener('clickEvent', this.clickHandler);
-    this._chart.addEventListener('hoverEvent', this.hoverHandler);
-    this._chart.addEventListener('mouseOutEvent', this.mouseOutHandler);
+    this._chart.addEventListener('clickEvent', e => this.clickHandler(e));
+    this._chart.addEventListener('hoverEvent', e => this.hoverHandler(e));
+    this._chart.addEventListener('mouseOutEvent', e => this.mouseOutHandler(e));
+    // the first draw ends with initialLoadEndEvent, the later ones with drawEndEvent
+    this._chart.addEventListener('initialLoadEndEvent', () => this.endSample());
+    this._chart.addEventListener('drawEndEvent', () => this.endSample());
 
     Object.keys(this.model.get('config')).forEach(prop => {
       this._chart[prop] = this.model.get('config')[prop];
@@ -169,33 +547,11 @@ export class ChartView extends DOMWidgetView {
     this.accessibility_changed();
     this.config_changed();
 
-    // Observe changes in the value traitlet in Python, and define
-    // a custom callback.
-    this.model.on('change:data', this.data_changed, this);
-    this.model.on('change:linkData', this.data_changed, this);
-    this.model.on('change:nodeData', this.data_changed, this);
-    this.model.on('change:ordinalAccessor', this.accessor_changed, this);
-    this.model.on('change:valueAccessor', this.accessor_changed, this);
-    this.model.on('change:groupAccessor', this.accessor_changed, this);
-    this.model.on('change:seriesAccessor', this.accessor_changed, this);
-    this.model.on('change:xAccessor', this.accessor_changed, this);
-    this.model.on('change:yAccessor', this.accessor_changed, this);
-    this.model.on('change:nodeAccessor', this.accessor_changed, this);
-    this.model.on('change:parentAccessor', this.accessor_changed, this);
-    this.model.on('change:sizeAccessor', this.accessor_changed, this);
-    this.model.on('change:joinAccessor', this.accessor_changed, this);
-    this.model.on('change:joinNameAccessor', this.accessor_changed, this);
-    this.model.on('change:markerAccessor', this.accessor_changed, this);
-    this.model.on('change:markerNameAccessor', this.accessor_changed, this);
-    this.model.on('change:latitudeAccessor', this.accessor_changed, this);
-    this.model.on('change:longitudeAccessor', this.accessor_changed, this);
-    this.model.on('change:sourceAccessor', this.accessor_changed, this);
-    this.model.on('change:targetAccessor', this.accessor_changed, this);
-    this.model.on('change:nodeIDAccessor', this.accessor_changed, this);
-    this.model.on('change:mainTitle', this.title_changed, this);
-    this.model.on('change:subTitle', this.title_changed, this);
-    this.model.on('change:accessibility', this.accessibility_changed, this);
-    this.model.on('change:config', this.config_changed, this);
+    // Observe changes in the value traitlet in Python. Backbone fires a single
+    // change event per message from the kernel, so a batched update from
+    // charts.py is applied in one go and the chart redraws once.
+    this.model.on('change', this.state_changed, this);
+    this.model.on('rows:changed', this.rows_changed, this);
   }
 
   clickHandler(e) {
@@ -219,6 +575,10 @@ export class ChartView extends DOMWidgetView {
         newClicks.push(d);
       }
       targetChart.clickHighlight = newClicks;
+      // the click and the new selection are sent to charts.py
+      this.model.set('selection', newClicks);
+      this.model.save_changes();
+      this.send({ event: 'click', data: d });
     }
   }
 
@@ -229,30 +589,219 @@ export class ChartView extends DOMWidgetView {
     // console.log('checking hover', e, d ,t, targetChart);
     if (d && typeof d == 'object') {
       targetChart.hoverHighlight = d;
+      this.queueHover(d);
     } else {
       targetChart.hoverHighlight = '';
+      this.queueHover(null);
     }
   }
 
   mouseOutHandler(e) {
     let targetChart = e.target;
     targetChart.hoverHighlight = '';
+    this.queueHover(null);
+  }
+
+  // Hover events are sent to charts.py in batches, at most one message every
+  // hover_interval seconds, and only when Python listens to them (on_hover).
+  // Moving over the same row again, or leaving a row for the next one within a
+  // batch, does not add an event.
+  queueHover(datum) {
+    if (!this.model.get('_hover_events')) {
+      return;
+    }
+    const batch = this._hoverBatch || (this._hoverBatch = []);
+    if (batch.length && batch[batch.length - 1] === datum) {
+      return;
+    }
+    if (batch.length && batch[batch.length - 1] === null && datum !== null) {
+      batch.pop();
+    }
+    batch.push(datum);
+    if (batch.length > HOVER_BATCH) {
+      batch.shift();
+    }
+    if (!this._hoverTimer) {
+      const wait = (this._lastHover || 0) + this.model.get('hover_interval') * 1000 - performance.now();
+      this._hoverTimer = setTimeout(() => this.flushHover(), Math.max(wait, 0));
+    }
+  }
+
+  flushHover() {
+    this._hoverTimer = null;
+    this._lastHover = performance.now();
+    const events = this._hoverBatch.splice(0);
+    if (events.length) {
+      this.send({ event: 'hover', events });
+    }
   }
 
   data_changed() {
-    this._chart.data = this.model.get('data');
-    if (this._chart.data) {
-      let regex = /^\d{4}[\/\-](0?[1-9]|[12][0-9]|3[01])[\/\-](0?[1-9]|1[012])/;
-      this._chart.data.forEach(d => {
-        Object.keys(d).forEach(k => {
-          if (regex.test(d[k])) {
-            d[k] = new Date(d[k]);
-          }
-        });
+    // dates were converted when the data was deserialized, see deserializeData
+    this.beginSample('data', this.dataTiming());
+    this.sources_changed();
+    this._chart.data = this.resolveData('data');
+    this._chart.linkData = this.resolveData('linkData');
+    this._chart.nodeData = this.resolveData('nodeData');
+  }
+
+  // Returns the rows of a data property, read from the DataSource it references if any.
+  resolveData(prop) {
+    const value = this.model.get(prop);
+    const owner = value instanceof DataSourceModel ? value : this.model;
+    const rows = owner === value ? value.get('data') : value;
+    if (rows instanceof StoredData) {
+      this.loadWhenVisible(owner, owner === value ? 'data' : prop, rows);
+      return [];
+    }
+    return rows;
+  }
+
+  // Decodes packed data once the chart scrolls into view, setting it on its model
+  // redraws the charts showing it.
+  loadWhenVisible(owner, prop, stored) {
+    this._storedData = this._storedData || new Set();
+    if (this._storedData.has(stored)) {
+      return;
+    }
+    this._storedData.add(stored);
+    const observer = new IntersectionObserver(entries => {
+      if (!entries.some(entry => entry.isIntersecting)) {
+        return;
+      }
+      observer.disconnect();
+      stored.load().then(rows => {
+        if (owner.get(prop) === stored) {
+          owner.set(prop, rows);
+        }
+      });
+    });
+    observer.observe(this.el);
+    this.once('remove', () => observer.disconnect());
+  }
+
+  // Subscribes to the DataSource models referenced by the data properties, so
+  // an update sent once to a source redraws every chart using it.
+  sources_changed() {
+    const sources = DATA_PROPS.map(prop => this.model.get(prop)).filter(value => value instanceof DataSourceModel);
+    const previous = this._sources || [];
+    previous.filter(source => !sources.includes(source)).forEach(source => this.stopListening(source));
+    sources
+      .filter(source => !previous.includes(source))
+      .forEach(source => {
+        this.listenTo(source, 'change:data', this.data_changed);
+        this.listenTo(source, 'rows:changed', (trait, timing) => this.source_rows_changed(source, timing));
       });
+    this._sources = sources;
+  }
+
+  source_rows_changed(source, timing) {
+    DATA_PROPS.filter(prop => this.model.get(prop) === source).forEach(prop => this.rows_changed(prop, timing));
+  }
+
+  state_changed() {
+    const changed = Object.keys(this.model.changedAttributes() || {});
+    if (changed.some(prop => DATA_PROPS.includes(prop))) {
+      this.data_changed();
+    } else if (changed.some(prop => REDRAW_PROPS.includes(prop))) {
+      this.beginSample('update');
+    }
+    // only the properties that changed are reassigned on the chart
+    changed
+      .filter(prop => ACCESSOR_PROPS.includes(prop) || TITLE_PROPS.includes(prop))
+      .forEach(prop => {
+        this._chart[prop] = this.model.get(prop);
+      });
+    if (changed.includes('accessibility')) {
+      this.accessibility_changed();
+    }
+    if (changed.includes('config')) {
+      this.config_changed();
+    }
+    if (changed.includes('selection')) {
+      this._chart.clickHighlight = this.model.get('selection');
     }
-    this._chart.linkData = this.model.get('linkData');
-    // this._chart.nodeData = this.model.get('nodeData');
+  }
+
+  rows_changed(trait, timing) {
+    // the model changed its array in place, hand the chart a copy so it redraws
+    this.beginSample('rows', timing);
+    this._chart[trait] = this.resolveData(trait).slice();
+  }
+
+  // Returns when the data drawn by the chart was received and how long it took
+  // to decode, only the first view drawing a payload reports it.
+  dataTiming() {
+    const timings = DATA_PROPS
+      .map(prop => this.resolveData(prop))
+      .filter(rows => rows && typeof rows === 'object' && decodeTimes.has(rows))
+      .map(rows => {
+        const timing = decodeTimes.get(rows);
+        decodeTimes.delete(rows);
+        return timing;
+      });
+    if (!timings.length) {
+      return null;
+    }
+    return {
+      start: Math.min(...timings.map(timing => timing.start)),
+      decode: timings.reduce((sum, timing) => sum + timing.decode, 0)
+    };
+  }
+
+  // Starts timing a redraw, finished by endSample when the chart has drawn.
+  // Changes made before the chart draws are drawn together, they are timed as
+  // one redraw from the earliest of them.
+  beginSample(kind, timing) {
+    const now = performance.now();
+    let sample = this._pendingSample;
+    if (!sample || now - sample.drawStart > RENDER_STATS_TIMEOUT) {
+      sample = this._pendingSample = { kind, start: now, drawStart: now, decode: 0 };
+    } else if (sample.kind === 'update') {
+      sample.kind = kind;
+    }
+    if (timing) {
+      sample.start = Math.min(sample.start, timing.start);
+      sample.decode += timing.decode;
+    }
+  }
+
+  endSample() {
+    const sample = this._pendingSample;
+    if (!sample) {
+      return;
+    }
+    this._pendingSample = null;
+    const now = performance.now();
+    this._renderSamples.push({
+      kind: sample.kind,
+      rows: DATA_PROPS.reduce((rows, prop) => rows + (this._chart[prop] || []).length, 0),
+      decode: sample.decode,
+      draw: now - sample.drawStart,
+      total: now - sample.start
+    });
+    if (this._renderSamples.length >= RENDER_STATS_BATCH) {
+      this.flushRenderStats();
+    } else if (!this._renderStatsTimer) {
+      this._renderStatsTimer = setTimeout(() => this.flushRenderStats(), RENDER_STATS_INTERVAL);
+    }
+  }
+
+  // Sends the waiting render samples to charts.py, they are dropped when there
+  // is no kernel, e.g. in an exported page.
+  flushRenderStats() {
+    clearTimeout(this._renderStatsTimer);
+    this._renderStatsTimer = null;
+    const samples = this._renderSamples.splice(0);
+    if (samples.length && this.model.comm_live) {
+      this.model.send({ event: 'render_stats', samples });
+    }
+  }
+
+  remove() {
+    clearTimeout(this._hoverTimer);
+    this.flushRenderStats();
+    super.remove();
   }
 
   accessor_changed() {
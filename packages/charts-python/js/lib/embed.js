@@ -12,5 +12,9 @@
 // already be loaded by the notebook otherwise.
 
 // Export widget models and views, and the npm package version number.
-module.exports = require('./charts.js');
+module.exports = { ...require('./charts.js'), ...require('./table.js'), ...require('./facets.js') };
 module.exports['version'] = require('../package.json').version;
+
+// embedded pages can hold many charts, their packed data is only decoded when
+// they scroll into view
+module.exports.loadDataLazily(true);
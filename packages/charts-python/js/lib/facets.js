@@ -0,0 +1,170 @@
+/**
+ * Copyright (c) 2024 Visa, Inc.
+ *
+ * This source code is licensed under the MIT license
+ * https://github.com/visa/visa-chart-components/blob/master/LICENSE
+ *
+ **/
+
+import { DOMWidgetModel, DOMWidgetView, unpack_models } from '@jupyter-widgets/base';
+var pkg = require('../package.json');
+
+// See facets.py for the kernel counterpart to this file.
+//
+// The grid lays out one placeholder per facet and tells the kernel which ones
+// are in view. The kernel creates the charts of those facets, closes the others
+// and sends them in `charts`, which the view renders into the placeholders.
+
+// Changes of the facets in view are sent at most every VISIBLE_DELAY ms, so a
+// fast scroll only creates the charts of the facets it stops on.
+const VISIBLE_DELAY = 150;
+
+export class FacetGridModel extends DOMWidgetModel {
+  defaults() {
+    return {
+      ...super.defaults(),
+      _model_name: 'FacetGridModel',
+      _view_name: 'FacetGridView',
+      _model_module: pkg.name,
+      _view_module: pkg.name,
+      _model_module_version: pkg.version,
+      _view_module_version: pkg.version,
+
+      titles: [],
+      columns: 3,
+      facet_width: 320,
+      facet_height: 240,
+      height: 600,
+      overscan: 1,
+      visible: [],
+      charts: {}
+    };
+  }
+}
+
+FacetGridModel.serializers = {
+  ...DOMWidgetModel.serializers,
+  charts: { deserialize: unpack_models }
+};
+
+export class FacetGridView extends DOMWidgetView {
+  render() {
+    this.el.classList.add('vcc-facet-grid');
+    this._scroller = document.createElement('div');
+    this._scroller.style.overflowY = 'auto';
+    this._grid = document.createElement('div');
+    this._grid.style.display = 'grid';
+    this._scroller.appendChild(this._grid);
+    this.el.appendChild(this._scroller);
+
+    // chart views by facet position
+    this._views = new Map();
+    this._inView = new Set();
+    this._visibleTimer = null;
+
+    this.layout_changed();
+    this.model.on('change:titles change:overscan', this.layout_changed, this);
+    this.model.on('change:columns change:facet_width change:facet_height change:height', this.size_changed, this);
+    this.model.on('change:charts', this.charts_changed, this);
+  }
+
+  // Lays out one cell per facet, showing its title until its chart is rendered.
+  layout_changed() {
+    if (this._observer) {
+      this._observer.disconnect();
+    }
+    this._views.forEach(view => view.remove());
+    this._views.clear();
+    this._inView.clear();
+    this._cells = this.model.get('titles').map((title, position) => {
+      const cell = document.createElement('div');
+      cell.className = 'vcc-facet';
+      cell.dataset.position = String(position);
+      cell.style.overflow = 'hidden';
+      const label = document.createElement('div');
+      label.className = 'vcc-facet-title';
+      label.textContent = title;
+      cell.appendChild(label);
+      return cell;
+    });
+    this._grid.replaceChildren(...this._cells);
+    this.size_changed();
+
+    const margin = this.model.get('overscan') * this.model.get('facet_height');
+    this._observer = new IntersectionObserver(entries => this.intersection_changed(entries), {
+      root: this._scroller,
+      rootMargin: `${margin}px 0px`
+    });
+    this._cells.forEach(cell => this._observer.observe(cell));
+    this.charts_changed();
+  }
+
+  size_changed() {
+    const width = this.model.get('facet_width');
+    const height = this.model.get('facet_height');
+    this._scroller.style.maxHeight = `${this.model.get('height')}px`;
+    this._grid.style.gridTemplateColumns = `repeat(${Math.max(this.model.get('columns'), 1)}, ${width}px)`;
+    this._grid.style.gridAutoRows = `${height}px`;
+  }
+
+  intersection_changed(entries) {
+    entries.forEach(entry => {
+      const position = Number(entry.target.dataset.position);
+      if (entry.isIntersecting) {
+        this._inView.add(position);
+      } else {
+        this._inView.delete(position);
+      }
+    });
+    clearTimeout(this._visibleTimer);
+    this._visibleTimer = setTimeout(() => {
+      const visible = Array.from(this._inView).sort((a, b) => a - b);
+      if (visible.join(',') !== this.model.get('visible').join(',')) {
+        this.model.set('visible', visible);
+        this.model.save_changes();
+      }
+    }, VISIBLE_DELAY);
+  }
+
+  // Renders the charts sent by the kernel and removes the views of the released ones.
+  charts_changed() {
+    const charts = this.model.get('charts') || {};
+    this._views.forEach((view, position) => {
+      if (charts[position] !== view.model) {
+        view.remove();
+        this._views.delete(position);
+        this._cells[position].firstChild.hidden = false;
+      }
+    });
+    Object.keys(charts).forEach(key => {
+      const position = Number(key);
+      const cell = this._cells[position];
+      if (!cell || this._views.has(position)) {
+        return;
+      }
+      // stands for the view until it is created, it may be released before that
+      const placeholder = { model: charts[key], remove() {} };
+      this._views.set(position, placeholder);
+      this.create_child_view(placeholder.model).then(view => {
+        if (this._views.get(position) !== placeholder) {
+          view.remove();
+          return;
+        }
+        this._views.set(position, view);
+        cell.firstChild.hidden = true;
+        cell.appendChild(view.el);
+        view.trigger('displayed');
+      });
+    });
+  }
+
+  remove() {
+    clearTimeout(this._visibleTimer);
+    if (this._observer) {
+      this._observer.disconnect();
+    }
+    this._views.forEach(view => view.remove());
+    this._views.clear();
+    super.remove();
+  }
+}
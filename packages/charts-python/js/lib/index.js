@@ -6,5 +6,7 @@
  *
  **/
 // Export widget models and views, and the npm package version number.
-export { ChartModel, ChartView } from './charts';
+export { ChartModel, ChartView, DataSourceModel } from './charts';
+export { DataTableModel, DataTableView } from './table';
+export { FacetGridModel, FacetGridView } from './facets';
 export { version } from '../package.json';
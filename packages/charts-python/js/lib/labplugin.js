@@ -5,7 +5,16 @@
  * https://github.com/visa/visa-chart-components/blob/master/LICENSE
  *
  **/
-import { ChartModel, ChartView, version } from './index';
+import {
+  ChartModel,
+  ChartView,
+  DataSourceModel,
+  DataTableModel,
+  DataTableView,
+  FacetGridModel,
+  FacetGridView,
+  version
+} from './index';
 import { IJupyterWidgetRegistry } from '@jupyter-widgets/base';
 
 export const chartWidgetPlugin = {
@@ -15,7 +24,15 @@ export const chartWidgetPlugin = {
     widgets.registerWidget({
       name: '@visa/charts-python',
       version: version,
-      exports: { ChartModel, ChartView }
+      exports: {
+        ChartModel,
+        ChartView,
+        DataSourceModel,
+        DataTableModel,
+        DataTableView,
+        FacetGridModel,
+        FacetGridView
+      }
     });
   },
   autoStart: true
@@ -0,0 +1,49 @@
+/**
+ * Copyright (c) 2024 Visa, Inc.
+ *
+ * This source code is licensed under the MIT license
+ * https://github.com/visa/visa-chart-components/blob/master/LICENSE
+ *
+ **/
+// Entry point for the self-contained bundle used by the pages written by
+// pyvisacharts.export.render_html (see export.py).
+//
+// Unlike the unpkg bundle, it includes the widget manager and loads nothing
+// from the network: each page loads this bundle, then one script per widget
+// model calling `register`, then renders its widget-view scripts on load.
+
+import { HTMLManager } from '@jupyter-widgets/html-manager';
+import * as charts from './charts';
+import * as table from './table';
+import * as facets from './facets';
+var pkg = require('../package.json');
+
+const models = {};
+
+// Called by the payload scripts, `id` is the content hash of the model state.
+export function register(id, model) {
+  models[id] = model;
+}
+
+function loader(moduleName, moduleVersion) {
+  if (moduleName === pkg.name) {
+    return Promise.resolve({ ...charts, ...table, ...facets });
+  }
+  return Promise.reject(new Error(`Module ${moduleName}@${moduleVersion} is not bundled`));
+}
+
+async function renderAll() {
+  const manager = new HTMLManager({ loader });
+  await manager.set_state({ version_major: 2, version_minor: 0, state: models });
+  const scripts = document.querySelectorAll('script[type="application/vnd.jupyter.widget-view+json"]');
+  for (const script of Array.from(scripts)) {
+    const spec = JSON.parse(script.innerHTML);
+    const model = await manager.get_model(spec.model_id);
+    const el = document.createElement('div');
+    script.parentNode.insertBefore(el, script);
+    const view = await manager.create_view(model);
+    manager.display_view(view, el);
+  }
+}
+
+window.addEventListener('load', renderAll);
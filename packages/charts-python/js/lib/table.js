@@ -0,0 +1,182 @@
+/**
+ * Copyright (c) 2024 Visa, Inc.
+ *
+ * This source code is licensed under the MIT license
+ * https://github.com/visa/visa-chart-components/blob/master/LICENSE
+ *
+ **/
+
+import { DOMWidgetModel, DOMWidgetView, put_buffers } from '@jupyter-widgets/base';
+import { deserializeData } from './charts';
+var pkg = require('../package.json');
+
+// See table.py for the kernel counterpart to this file.
+//
+// The rows of a DataTable stay in the kernel, which sorts and filters them and
+// sends the page to show in a custom message. The model only keeps that page.
+
+export class DataTableModel extends DOMWidgetModel {
+  defaults() {
+    return {
+      ...super.defaults(),
+      _model_name: 'DataTableModel',
+      _view_name: 'DataTableView',
+      _model_module: pkg.name,
+      _view_module: pkg.name,
+      _model_module_version: pkg.version,
+      _view_module_version: pkg.version,
+
+      columns: [],
+      column_names: {},
+      page_size: 25,
+      page: 0,
+      sort_by: '',
+      ascending: true,
+      filters: {},
+      row_count: 0,
+      total_rows: 0
+    };
+  }
+
+  initialize(attributes, options) {
+    super.initialize(attributes, options);
+    this.pageRows = [];
+    this.pageColumns = [];
+    this.on('msg:custom', this.handlePageMessage, this);
+  }
+
+  // Pages are sent by DataTable.send_page in table.py.
+  handlePageMessage(content, buffers) {
+    if (content.event !== 'page') {
+      return;
+    }
+    put_buffers(content, content.buffer_paths || [], buffers || []);
+    this.pageRows = content.rows ? deserializeData(content.rows) : [];
+    this.pageColumns = content.columns || [];
+    this.trigger('page:changed');
+  }
+
+  // Sets properties that make the kernel send a new page.
+  query(changes) {
+    this.set(changes);
+    this.save_changes();
+  }
+}
+
+export class DataTableView extends DOMWidgetView {
+  render() {
+    this.el.classList.add('vcc-paged-data-table');
+
+    const toolbar = document.createElement('div');
+    toolbar.className = 'vcc-paged-data-table-toolbar';
+    this._filterColumn = document.createElement('select');
+    this._filterColumn.setAttribute('aria-label', 'Filter column');
+    this._filterText = document.createElement('input');
+    this._filterText.type = 'search';
+    this._filterText.placeholder = 'Filter, e.g. text or > 10';
+    this._filterText.setAttribute('aria-label', 'Filter');
+    this._previous = this.button('Previous page', '‹', () => this.turn(-1));
+    this._next = this.button('Next page', '›', () => this.turn(1));
+    this._status = document.createElement('span');
+    this._status.setAttribute('aria-live', 'polite');
+    toolbar.append(this._filterColumn, this._filterText, this._previous, this._status, this._next);
+
+    this._filterColumn.addEventListener('change', () => {
+      this._filterText.value = this.model.get('filters')[this._filterColumn.value] || '';
+    });
+    this._filterText.addEventListener('change', () => {
+      const filters = { ...this.model.get('filters'), [this._filterColumn.value]: this._filterText.value };
+      this.model.query({ filters });
+    });
+
+    this._table = document.createElement('data-table');
+    this._table.uniqueID = 'paged-' + this.cid;
+    this._table.isCompact = true;
+    this._table.tableColumns = this.model.get('columns');
+    this._table.dataKeyNames = this.model.get('column_names');
+    this._table.data = [];
+    // the headers sort the rows, clicking the same header again reverses the order
+    this._table.addEventListener('click', e => {
+      const header = e.target.closest('thead th');
+      if (header) {
+        this.sort(this._table.tableColumns[Array.from(header.parentNode.children).indexOf(header)]);
+      }
+    });
+
+    this.el.append(toolbar, this._table);
+    this.showTable();
+
+    this.model.on('page:changed', this.page_changed, this);
+    this.model.on('change', this.status_changed, this);
+    // the kernel only sends pages when asked, or when the page to show changes
+    this.send({ event: 'get_page' });
+  }
+
+  button(label, text, onClick) {
+    const button = document.createElement('button');
+    button.type = 'button';
+    button.className = 'vcc-btn-icon vcc-btn-icon--light-tiny';
+    button.setAttribute('aria-label', label);
+    button.textContent = text;
+    button.addEventListener('click', onClick);
+    return button;
+  }
+
+  // The data-table component starts collapsed, behind its toggle button.
+  showTable() {
+    const ready = this._table.componentOnReady ? this._table.componentOnReady() : Promise.resolve();
+    ready.then(() => {
+      const toggle = this._table.querySelector('.visa-viz-data-table-button');
+      if (toggle && toggle.getAttribute('aria-expanded') !== 'true') {
+        toggle.click();
+      }
+    });
+  }
+
+  page_changed() {
+    const columns = this.model.pageColumns;
+    if (columns.join('\n') !== Array.from(this._filterColumn.options, option => option.value).join('\n')) {
+      const names = this.model.get('column_names');
+      this._filterColumn.replaceChildren(
+        ...columns.map(name => new Option(names[name] || name, name, false, name === this._filterColumn.value))
+      );
+    }
+    this._table.tableColumns = columns;
+    this._table.dataKeyNames = this.model.get('column_names');
+    // only the page is handed to the component, it redraws the table
+    this._table.data = this.model.pageRows;
+    this.status_changed();
+  }
+
+  status_changed() {
+    const size = Math.max(this.model.get('page_size'), 1);
+    const page = this.model.get('page');
+    const count = this.model.get('row_count');
+    const total = this.model.get('total_rows');
+    const first = count ? page * size + 1 : 0;
+    const last = Math.min((page + 1) * size, count);
+    const sortBy = this.model.get('sort_by');
+    let status = `${first.toLocaleString()}–${last.toLocaleString()} of ${count.toLocaleString()}`;
+    if (count !== total) {
+      status += ` (filtered from ${total.toLocaleString()})`;
+    }
+    if (sortBy) {
+      status += `, by ${sortBy} ${this.model.get('ascending') ? '↑' : '↓'}`;
+    }
+    this._status.textContent = status;
+    this._previous.disabled = page <= 0;
+    this._next.disabled = last >= count;
+  }
+
+  turn(step) {
+    this.model.query({ page: Math.max(this.model.get('page') + step, 0) });
+  }
+
+  sort(column) {
+    if (!column) {
+      return;
+    }
+    const ascending = this.model.get('sort_by') === column ? !this.model.get('ascending') : true;
+    this.model.query({ sort_by: column, ascending });
+  }
+}
@@ -80,6 +80,26 @@ module.exports = (env, argv) => {
                 rules: rules
             },
             externals: ['@jupyter-widgets/base']
+        },
+        {// Self-contained bundle for static export
+        //
+        // Used by the pages written by pyvisacharts.export.render_html. It
+        // bundles the widget manager and all its dependencies, so the pages
+        // work offline and from the file system. It is shipped with the python
+        // package and exposes `vccCharts.register` to the page payloads.
+        //
+            entry: './lib/standalone.js',
+            output: {
+                filename: 'charts-standalone.js',
+                path: path.resolve(__dirname, '..', 'pyvisacharts', 'static'),
+                library: 'vccCharts',
+                libraryTarget: 'var',
+                publicPath: ''
+            },
+            devtool,
+            module: {
+                rules: rules
+            }
         }
     ];
 }
@@ -8,6 +8,11 @@
 from ._version import version_info, __version__
 
 from .charts import *
+from .backends import register_backend
+from .table import DataTable
+from .facets import FacetGrid
+from ._cache import conversion_cache
+from . import metrics
 
 
 def _jupyter_labextension_paths():
@@ -0,0 +1,230 @@
+# /**
+# * Copyright (c) 2024 Visa, Inc.
+# *
+# * This source code is licensed under the MIT license
+# * https://github.com/visa/visa-chart-components/blob/master/LICENSE
+# *
+# **/
+import re
+import numpy as np
+from ._data import ColumnTable
+
+# Vectorized group-by helpers used to pre-aggregate chart data in the kernel.
+
+AGGREGATES = ('sum', 'mean', 'count', 'min', 'max', 'median')
+
+# date frequency aliases (as used by pandas) and the numpy unit they floor to
+_FREQ_UNITS = {
+    'Y': 'Y', 'A': 'Y', 'Q': 'M', 'M': 'M', 'W': 'D', 'D': 'D',
+    'H': 'h', 'h': 'h', 'T': 'm', 'min': 'm', 'S': 's', 's': 's',
+}
+_FREQ_PATTERN = re.compile(r'^(\d*)(Y|A|Q|M|W|D|H|h|T|min|S|s)$')
+
+
+def parse_freq(freq):
+    """Returns the (unit, step, weekly) of a frequency such as 'D', 'W' or '15min'."""
+    match = _FREQ_PATTERN.match(freq)
+    if not match:
+        raise ValueError('Unsupported date frequency {!r}, expecting one of {}'.format(
+            freq, ', '.join(_FREQ_UNITS)))
+    step = int(match.group(1) or 1)
+    alias = match.group(2)
+    if alias == 'Q':
+        step *= 3
+    elif alias == 'W':
+        step *= 7
+    return _FREQ_UNITS[alias], step, alias == 'W'
+
+
+def floor_dates(values, freq):
+    """Floors dates to the start of their `freq` period, weeks start on Monday."""
+    unit, step, weekly = parse_freq(freq)
+    if values.dtype.kind != 'M':
+        values = values.astype('datetime64[ns]')
+    ticks = values.astype('datetime64[{}]'.format(unit)).astype('int64')
+    # day 0 (1970-01-01) was a Thursday, shift so that weeks start on Monday
+    offset = 3 if weekly else 0
+    floored = (ticks + offset) // step * step - offset
+    result = floored.astype('datetime64[{}]'.format(unit)).astype(values.dtype)
+    result[np.isnat(values)] = np.datetime64('NaT')
+    return result
+
+
+def group_codes(values):
+    """Returns an integer code per row for the distinct values of a column."""
+    if values.dtype.kind != 'O':
+        return np.unique(values, return_inverse=True)[1].reshape(-1)
+    # hashing python objects is much faster than sorting them
+    items = values.tolist()
+    try:
+        distinct = list(dict.fromkeys(items))
+    except TypeError:
+        return np.unique(values.astype(str), return_inverse=True)[1].reshape(-1)
+    try:
+        distinct.sort()
+    except TypeError:
+        # mixed types, such as strings and None
+        distinct.sort(key=str)
+    lookup = {value: code for code, value in enumerate(distinct)}
+    return np.fromiter(map(lookup.__getitem__, items), dtype='int64', count=len(items))
+
+
+def combined_codes(columns):
+    """Returns (codes, count): one integer code per row for the distinct combinations
+    of values across `columns`, numbered in sorted order."""
+    codes = np.zeros(len(columns[0]) if columns else 0, dtype='int64')
+    count = 1 if len(codes) else 0
+    for values in columns:
+        column_codes = group_codes(values)
+        codes = codes * (column_codes.max() + 1 if len(column_codes) else 1) + column_codes
+        # renumber after each column so the codes stay small
+        codes, count = _renumber(codes)
+    return codes, count
+
+
+def _renumber(codes):
+    if len(codes) and codes.max() < 4 * len(codes):
+        # counting sort, linear rather than the O(n log n) of np.unique
+        present = np.bincount(codes) > 0
+        return (np.cumsum(present) - 1)[codes], int(present.sum())
+    codes = group_codes(codes)
+    return codes, int(codes.max()) + 1 if len(codes) else 0
+
+
+def reduce_groups(codes, count, values, how):
+    """Aggregates `values` per group code with `how` (one of AGGREGATES), missing
+    values are ignored."""
+    if how == 'count':
+        return np.bincount(codes, minlength=count).astype('float64')
+    values = values.astype('float64')
+    valid = ~np.isnan(values)
+    codes, values = codes[valid], values[valid]
+    if how == 'sum':
+        return np.bincount(codes, weights=values, minlength=count)
+    if how == 'mean':
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.bincount(codes, weights=values, minlength=count) / \
+                np.bincount(codes, minlength=count)
+    result = np.full(count, np.nan)
+    if not len(codes):
+        return result
+    order = np.lexsort((values, codes))
+    codes, values = codes[order], values[order]
+    starts = np.flatnonzero(np.r_[True, codes[1:] != codes[:-1]])
+    ends = np.r_[starts[1:], len(codes)] - 1
+    groups = codes[starts]
+    if how == 'min':
+        result[groups] = values[starts]
+    elif how == 'max':
+        result[groups] = values[ends]
+    elif how == 'median':
+        result[groups] = (values[(starts + ends) // 2] + values[(starts + ends + 1) // 2]) / 2
+    else:
+        raise ValueError('Unsupported aggregate {!r}, expecting one of {}'.format(
+            how, ', '.join(AGGREGATES)))
+    return result
+
+
+def aggregate(table, by, value, how):
+    """Groups `table` on the `by` columns and aggregates the `value` column, returns a
+    ColumnTable with one row per group sorted on `by`."""
+    codes, count = combined_codes([table.column(name) for name in by])
+    # every code in 0..count-1 occurs, so this is the first row of each group
+    first = np.full(count, table.length, dtype='int64')
+    np.minimum.at(first, codes, np.arange(table.length))
+    columns = [(name, table.column(name)[first]) for name in by]
+    columns.append((value, reduce_groups(codes, count, table.column(value), how)))
+    return ColumnTable(columns)
+
+
+def distinct(values):
+    """Returns the distinct values of a column in order of first appearance, without
+    missing values."""
+    if values.dtype.kind == 'O':
+        seen = dict.fromkeys(values.tolist())
+        return [value for value in seen if value is not None and value == value]
+    present = values[~np.isnat(values)] if values.dtype.kind == 'M' else \
+        values[~np.isnan(values)] if values.dtype.kind == 'f' else values
+    unique, first = np.unique(present, return_index=True)
+    return unique[np.argsort(first)].tolist()
+
+
+def fold_small(table, by, value, threshold, source, target, label):
+    """Replaces the `target` of the links whose `value` is below `threshold` by a
+    `label` node, and sums those links per group of the `by` columns. The other
+    links are kept as they are.
+
+    Each stage of the diagram (column of nodes) gets its own `label` node. When the
+    folded links end in more than one stage, the label is followed by the number
+    of the stage, counted from 1. A ValueError is raised when one of these labels
+    is already a node."""
+    values = table.column(value).astype('float64')
+    small = values < threshold
+    if not small.any():
+        return table
+    ends = np.concatenate([table.column(source).astype(object), table.column(target).astype(object)])
+    stages = link_stages(ends[:table.length], ends[table.length:])[small]
+    distinct_stages = np.unique(stages)
+    names = [label]
+    if len(distinct_stages) > 1:
+        names = ['{} {}'.format(label, stage + 1) for stage in distinct_stages]
+    taken = set(distinct(ends)) & set(names)
+    if taken:
+        raise ValueError('The label of the folded links is already a node: {}, '
+                         'change other_label'.format(', '.join(sorted(map(repr, taken)))))
+    folded = ColumnTable((name, table.column(name)[small]) for name in dict.fromkeys(by + [value]))
+    folded.columns[target] = np.array(names, dtype=object)[np.searchsorted(distinct_stages, stages)]
+    result = table.take(~small)
+    result.extend(aggregate(folded, by, value, 'sum'))
+    return result
+
+
+def link_stages(sources, targets):
+    """Returns the stage (column of the diagram) of the target of each link, nodes
+    without incoming links are in stage 0 and a target is one stage after the
+    furthest of its sources."""
+    codes = group_codes(np.concatenate([sources, targets]).astype(object))
+    count = int(codes.max()) + 1 if len(codes) else 0
+    source_codes, target_codes = codes[:len(sources)], codes[len(sources):]
+    stage = np.zeros(count, dtype='int64')
+    # longest paths, at most one pass per node so cycles end
+    for _ in range(count):
+        previous = stage.copy()
+        np.maximum.at(stage, target_codes, stage[source_codes] + 1)
+        if np.array_equal(stage, previous):
+            break
+    return stage[target_codes]
+
+
+def fold_categories(table, column, value, max_categories, label, by=()):
+    """Keeps the `max_categories - 1` values of `column` with the largest total
+    `value` and folds the rows of the others into one `label` category, summed per
+    group of the `by` columns. Tables with at most `max_categories` categories are
+    returned as they are."""
+    codes = group_codes(table.column(column))
+    count = int(codes.max()) + 1 if len(codes) else 0
+    if count <= max_categories:
+        return table
+    totals = np.nan_to_num(reduce_groups(codes, count, table.column(value), 'sum'))
+    kept = np.zeros(count, dtype=bool)
+    kept[np.argsort(-totals, kind='stable')[:max(max_categories - 1, 0)]] = True
+    small = ~kept[codes]
+    keys = [column] + [name for name in by if name != column]
+    folded = ColumnTable((name, table.column(name)[small]) for name in dict.fromkeys(keys + [value]))
+    folded.columns[column] = np.full(folded.length, label, dtype=object)
+    result = table.take(~small)
+    result.extend(aggregate(folded, keys, value, 'sum'))
+    return result
+
+
+def keep_last(values, count):
+    """Returns a mask of the last `count` rows of each distinct value of a column."""
+    codes = group_codes(values)
+    # rank of each row among the later rows of its group, counted from the end
+    order = np.argsort(codes[::-1], kind='stable')
+    sorted_codes = codes[::-1][order]
+    starts = np.r_[True, sorted_codes[1:] != sorted_codes[:-1]] if len(codes) else np.zeros(0, dtype=bool)
+    first = np.maximum.accumulate(np.where(starts, np.arange(len(order)), 0))
+    rank = np.empty(len(order), dtype='int64')
+    rank[order] = np.arange(len(order)) - first
+    return rank[::-1] < count
@@ -0,0 +1,124 @@
+# /**
+# * Copyright (c) 2024 Visa, Inc.
+# *
+# * This source code is licensed under the MIT license
+# * https://github.com/visa/visa-chart-components/blob/master/LICENSE
+# *
+# **/
+from collections import OrderedDict
+import hashlib
+import pickle
+import sys
+import threading
+import numpy as np
+from ._data import ColumnTable, Records
+from .backends import to_columns
+
+# Content fingerprints of chart data, and a cache of converted data shared by all
+# charts, so re-assigning an unchanged frame, or showing the same frame in many
+# charts, only converts it once.
+
+
+def fingerprint(value):
+    """Returns a digest of the content of a table, or None for values that are not
+    worth hashing (lists are cheaper to convert than to hash)."""
+    if isinstance(value, list):
+        return None
+    digest = hashlib.blake2b(digest_size=16)
+    table = to_columns(value)
+    for name, values in table.columns.items():
+        digest.update(repr((name, str(values.dtype), len(values))).encode())
+        column = _column_bytes(values)
+        if column is None:
+            return None
+        digest.update(column)
+    return digest.hexdigest()
+
+
+def _column_bytes(values):
+    if values.dtype.kind != 'O':
+        return np.ascontiguousarray(values).view('uint8')
+    # python objects are hashed with pandas when it is loaded, it is vectorized
+    pandas = sys.modules.get('pandas')
+    if pandas is not None:
+        try:
+            return pandas.util.hash_array(values).view('uint8')
+        except (TypeError, ValueError):
+            pass
+    try:
+        return pickle.dumps(values.tolist(), protocol=pickle.HIGHEST_PROTOCOL)
+    except Exception:
+        return None
+
+
+def _copy(value):
+    # a shallow copy, so rows updated in place by a chart never change the cached value
+    if isinstance(value, ColumnTable):
+        return ColumnTable(value.columns)
+    if isinstance(value, Records):
+        return Records(value, value.schema)
+    return value
+
+
+def _estimate_bytes(value):
+    if isinstance(value, ColumnTable):
+        return sum(
+            values.nbytes * (8 if values.dtype.kind == 'O' else 1) for values in value.columns.values()
+        )
+    if isinstance(value, Records) and len(value):
+        return len(value) * (sys.getsizeof(value[0]) + 64 * len(value[0]))
+    return 0
+
+
+class ConversionCache(object):
+    """A least-recently-used cache of converted chart data, bounded by an estimate
+    of the memory it holds. Set `max_bytes` to 0 to disable it."""
+
+    def __init__(self, max_bytes=256 * 1024 ** 2):
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    @property
+    def size(self):
+        """Estimated bytes held by the cache."""
+        return self._size
+
+    def get(self, key):
+        """Returns a copy of the cached value for `key`, or None."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+        return _copy(entry[0])
+
+    def put(self, key, value):
+        """Caches a copy of `value`, evicting the least recently used entries."""
+        size = _estimate_bytes(value)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._size -= self._entries.pop(key)[1]
+            self._entries[key] = (_copy(value), size)
+            self._size += size
+            while self._size > self.max_bytes:
+                self._size -= self._entries.popitem(last=False)[1][1]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+
+# Shared by every chart widget
+conversion_cache = ConversionCache()
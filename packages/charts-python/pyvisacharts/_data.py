@@ -0,0 +1,592 @@
+# /**
+# * Copyright (c) 2024 Visa, Inc.
+# *
+# * This source code is licensed under the MIT license
+# * https://github.com/visa/visa-chart-components/blob/master/LICENSE
+# *
+# **/
+import datetime
+import hashlib
+import json
+import math
+import numbers
+import os
+import re
+import struct
+import tempfile
+import zlib
+from operator import itemgetter
+import numpy as np
+from ipywidgets import widget_serialization
+from ipywidgets.widgets.widget import _remove_buffers
+
+# Helpers that turn chart data into the payload synced to the front-end, see
+# backends.py for the conversion of the supported input types into columns.
+# See `deserializeData` in js/lib/charts.js for the counterpart that rebuilds
+# row objects from a payload.
+#
+# Every payload carries a schema, the type of each column ('date', 'number',
+# 'boolean', 'string' or 'object'), so the front-end only converts the date
+# columns instead of testing every value. Dates are sent as epoch milliseconds.
+#
+# Payloads are compacted without changing the values the charts draw: string
+# columns with few distinct values are sent as integer codes into a dictionary
+# of those values, and numbers in the smallest dtype that holds them. A widget's
+# `precision` (decimal places) rounds floats so they are sent as scaled integers.
+#
+# A widget's `state_storage` packs the payload of its data traits into a single
+# deflate-compressed buffer named by the hash of its content. The front-end saves
+# that buffer in the notebook's widget state rather than the rows, or with
+# 'sidecar' only a link to a copy written once per hash next to the notebook.
+
+# Numeric dtypes that can be sent as-is and viewed as a JS TypedArray.
+_TYPED_ARRAY_DTYPES = {
+    'int8', 'uint8', 'int16', 'uint16', 'int32', 'uint32', 'float32', 'float64'
+}
+
+# Strings the front-end has always read as dates, see DATE_REGEX in js/lib/charts.js
+_DATE_PATTERN = re.compile(r'^\d{4}[/\-](0?[1-9]|[12][0-9]|3[01])[/\-](0?[1-9]|1[012])')
+
+
+def _is_missing(value):
+    return value is None or (isinstance(value, float) and value != value)
+
+
+def value_type(value):
+    """Returns the schema type of a single value."""
+    if isinstance(value, (bool, np.bool_)):
+        return 'boolean'
+    if isinstance(value, numbers.Number):
+        return 'number'
+    if isinstance(value, (datetime.date, np.datetime64)):
+        return 'date'
+    if isinstance(value, str):
+        return 'date' if _DATE_PATTERN.match(value) else 'string'
+    return 'object'
+
+
+def column_type(values):
+    """Returns the schema type of a column, from its dtype or else its first value."""
+    kind = values.dtype.kind
+    if kind == 'b':
+        return 'boolean'
+    if kind in 'iuf':
+        return 'number'
+    if kind == 'M':
+        return 'date'
+    for value in values:
+        if not _is_missing(value):
+            kind = value_type(value)
+            if kind == 'date' and isinstance(value, str) and not _all_dates(values):
+                return 'string'
+            return kind
+    return 'object'
+
+
+def _all_dates(values):
+    # a column is only read as dates if every string in it looks like one
+    return all(_DATE_PATTERN.match(value) for value in values if isinstance(value, str))
+
+
+def records_schema(rows):
+    """Returns the schema of a list of row dicts, from the first value of each column."""
+    schema, missing = {}, set()
+    for row in rows:
+        for name, value in row.items():
+            if name not in schema:
+                if _is_missing(value):
+                    missing.add(name)
+                else:
+                    schema[name] = value_type(value)
+    schema.update((name, 'object') for name in missing if name not in schema)
+    for name, kind in schema.items():
+        if kind == 'date' and not _all_dates(row.get(name) for row in rows):
+            schema[name] = 'string'
+    return schema
+
+
+class Records(list):
+    """A list of row dicts along with the schema of its columns."""
+
+    # traitlets compares the DataFrame a data trait was set to with its converted
+    # value, this makes pandas defer to our comparison (identity) instead of
+    # comparing every row
+    __pandas_priority__ = 5000
+
+    def __init__(self, rows=(), schema=None):
+        super().__init__(rows)
+        self.schema = records_schema(self) if schema is None else schema
+
+
+class ColumnTable(object):
+    """Equal-length NumPy columns, kept in the order they were given."""
+
+    # see Records
+    __pandas_priority__ = 5000
+
+    def __init__(self, columns):
+        self.columns = dict(columns)
+        self.length = len(next(iter(self.columns.values()))) if self.columns else 0
+        # columns allocated by the table itself, the others may be views of the
+        # caller's data and are copied before they are written to
+        self._owned = set()
+        # the arrays appended rows are written to, the columns are views of them
+        # starting at `_start`, see `extend`
+        self._buffers = {}
+        self._start = 0
+        # rows dropped from the head so far, and the index of `find_rows`: the
+        # key columns, their dtypes and the last row (counting dropped rows) of each key
+        self._dropped = 0
+        self._index = None
+
+    def __len__(self):
+        return self.length
+
+    def __repr__(self):
+        return 'ColumnTable({} rows, columns={})'.format(self.length, list(self.columns))
+
+    def to_records(self):
+        """Returns the table as Records, with dates as epoch milliseconds."""
+        names = list(self.columns)
+        values = [_column_to_list(self.columns[name]) for name in names]
+        return Records((dict(zip(names, row)) for row in zip(*values)), self.schema())
+
+    def schema(self):
+        """Returns the schema type of each column."""
+        return {name: column_type(values) for name, values in self.columns.items()}
+
+    def column(self, name):
+        """Returns the named column, or a column of None if the table has no such column."""
+        if name in self.columns:
+            return self.columns[name]
+        return np.full(self.length, None, dtype=object)
+
+    def take(self, index):
+        """Returns a new table with the rows at `index`."""
+        return ColumnTable((name, values[index]) for name, values in self.columns.items())
+
+    def extend(self, other):
+        """Appends the rows of another table in place.
+
+        The columns are views of larger buffers, so appending only copies the new
+        rows until the buffers are full, they then grow to twice the rows."""
+        names = list(self.columns) + [name for name in other.columns if name not in self.columns]
+        length = self.length + other.length
+        capacity = min((len(buffer) for buffer in self._buffers.values()), default=0)
+        if (set(self._buffers) != set(names) or self._start + length > capacity
+                or any(self.columns.get(name) is not None and self.columns[name].base is not buffer
+                       for name, buffer in self._buffers.items())):
+            # the rows dropped by drop_head are left behind
+            self._buffers, self._start, capacity = dict.fromkeys(names), 0, max(2 * length, 16)
+        start, end = self._start, self._start + self.length
+        for name in names:
+            values, new = self.column(name), other.column(name)
+            dtype = _common_dtype(values.dtype, new.dtype)
+            buffer = self._buffers[name]
+            if buffer is None or buffer.dtype != dtype:
+                buffer = np.empty(capacity, dtype=dtype)
+                buffer[start:end] = values
+            buffer[end:end + other.length] = new
+            self._buffers[name] = buffer
+            self.columns[name] = buffer[start:start + length]
+        if self._index is not None:
+            keys, dtypes, rows = self._index
+            if self._key_dtypes(keys) != dtypes:
+                self._index = None
+            else:
+                first = self._dropped + self.length
+                rows.update((key, first + i) for i, key in enumerate(_row_keys(other, keys, dtypes)))
+        self.length = length
+        self._owned = set(names)
+
+    def drop_head(self, count):
+        """Removes the first `count` rows in place."""
+        count = min(max(count, 0), self.length)
+        self.columns = {name: values[count:] for name, values in self.columns.items()}
+        self.length -= count
+        self._start += count
+        self._dropped += count
+
+    def keep(self, index):
+        """Keeps only the rows at `index` (positions or a mask), in place."""
+        self.columns = {name: values[index] for name, values in self.columns.items()}
+        self.length = len(next(iter(self.columns.values()))) if self.columns else 0
+        self._owned = set(self.columns)
+        self._buffers, self._start, self._index = {}, 0, None
+
+    def find_rows(self, keys, other):
+        """Returns the index of the last row matching each row of `other` on the
+        `keys` columns, or -1 where there is no match.
+
+        The rows are looked up in an index of the `keys` columns, built on the
+        first call and kept up to date by `extend` and `drop_head`."""
+        keys = tuple(keys)
+        dtypes = self._key_dtypes(keys)
+        if self._index is None or self._index[:2] != (keys, dtypes):
+            rows = {key: self._dropped + i for i, key in enumerate(_row_keys(self, keys, dtypes))}
+            self._index = (keys, dtypes, rows)
+        rows = self._index[2]
+        # rows dropped since they were indexed come out negative
+        found = [rows.get(key, -1) - self._dropped for key in _row_keys(other, keys, dtypes)]
+        return np.maximum(np.array(found, dtype='int64'), -1)
+
+    def _key_dtypes(self, keys):
+        return tuple(self.column(key).dtype for key in keys)
+
+    def assign(self, index, other):
+        """Overwrites the rows at `index` with the rows of `other` in place."""
+        # the index of find_rows stays valid as long as the keys of the rows are unchanged
+        indexed = self._index is not None and not set(self._index[0]).isdisjoint(other.columns)
+        if indexed:
+            before = self._index_keys(index)
+        for name in other.columns:
+            values, new = self.column(name), other.columns[name]
+            dtype = _common_dtype(values.dtype, new.dtype)
+            if dtype != values.dtype or name not in self._owned or not values.flags.writeable:
+                values = values.astype(dtype)
+            values[index] = new
+            self.columns[name] = values
+            self._owned.add(name)
+        if indexed and self._index_keys(index) != before:
+            self._index = None
+
+    def _index_keys(self, index):
+        keys, dtypes, _ = self._index
+        return _row_keys(ColumnTable((key, self.column(key)[index]) for key in keys), keys, dtypes)
+
+
+def _common_dtype(first, second):
+    try:
+        return np.result_type(first, second)
+    except TypeError:
+        return np.dtype(object)
+
+
+def _row_keys(table, keys, dtypes):
+    """Returns the values of the `keys` columns of each row of `table` as tuples,
+    with dates as integers so differing units compare equal."""
+    columns = []
+    for key, dtype in zip(keys, dtypes):
+        values = table.column(key)
+        if values.dtype.kind == 'M' or dtype.kind == 'M':
+            try:
+                values = values.astype('datetime64[ns]').view('int64')
+            except (TypeError, ValueError):
+                pass
+        columns.append(values.tolist())
+    return list(zip(*columns))
+
+
+def _column_to_list(values):
+    if values.dtype.kind == 'M':
+        millis = values.astype('datetime64[ms]').astype('int64').astype(object)
+        millis[np.isnat(values)] = None
+        return millis.tolist()
+    if values.dtype.kind in 'fO':
+        # NaN is not valid JSON, it is the only value not equal to itself
+        missing = np.asarray(values != values, dtype=bool)
+        if missing.shape == values.shape and missing.any():
+            values = values.astype(object)
+            values[missing] = None
+    return values.tolist()
+
+
+def list_to_numpy(values):
+    """Converts a list to a 1-d array, keeping python objects unless all values are
+    numbers, booleans or naive datetimes (None is allowed for missing values)."""
+    array = np.asarray(values)
+    if array.dtype.kind in 'biufM' and array.ndim == 1:
+        return array
+    types = {type(value) for value in values if value is not None}
+    if types and types <= {int, float}:
+        return np.array([np.nan if value is None else value for value in values], dtype='float64')
+    if types == {datetime.datetime} and all(value is None or value.tzinfo is None for value in values):
+        return np.array(values, dtype='datetime64[us]')
+    array = np.empty(len(values), dtype=object)
+    array[:] = values
+    return array
+
+
+def _encode_column(name, values, precision=None):
+    kind = values.dtype.kind
+    if kind == 'b':
+        return {'name': name, 'type': 'boolean', 'dtype': 'bool', 'buffer': _buffer(values.astype('uint8'))}
+    if kind == 'M':
+        millis = values.astype('datetime64[ms]').astype('int64').astype('float64')
+        millis[np.isnat(values)] = np.nan
+        return {'name': name, 'type': 'date', 'dtype': 'float64', 'buffer': _buffer(millis)}
+    if kind in 'iuf':
+        values, fields = _compact_numbers(values, precision if kind == 'f' else None)
+        return dict(name=name, type='number', dtype=values.dtype.name, buffer=_buffer(values), **fields)
+    kind = column_type(values)
+    encoded = dictionary_encode(values) if kind == 'string' else None
+    if encoded is not None:
+        codes, dictionary = encoded
+        return {'name': name, 'type': kind, 'dtype': codes.dtype.name, 'buffer': _buffer(codes),
+                'dictionary': dictionary}
+    return {'name': name, 'type': kind, 'values': values.tolist()}
+
+
+def _int_dtype(low, high, nullable=False):
+    # the smallest TypedArray dtype holding [low, high], its lowest value is kept
+    # for missing values when `nullable`
+    for dtype in ('int8', 'int16', 'int32'):
+        info = np.iinfo(dtype)
+        if info.min + nullable <= low and high <= info.max:
+            return np.dtype(dtype)
+    return None
+
+
+def _compact_numbers(values, precision=None):
+    """Returns (values, fields) with numbers in the smallest TypedArray dtype holding
+    them, `fields` tells the front-end how to read them back (see decodeColumn)."""
+    if values.dtype.kind in 'iu':
+        if not len(values):
+            return values.astype('float64'), {}
+        dtype = _int_dtype(values.min(), values.max())
+        if dtype is None:
+            # int64 and friends have no lossless TypedArray that JS charts can use
+            return (values if values.dtype.name in _TYPED_ARRAY_DTYPES else values.astype('float64')), {}
+        return values.astype(dtype), {}
+    values = values.astype('float64', copy=False)
+    missing = np.isnan(values)
+    present = values[~missing]
+    if len(present) and not np.isfinite(present).all():
+        return values, {}
+    scale = 10 ** precision if precision is not None else 1
+    with np.errstate(invalid='ignore', over='ignore'):
+        scaled = np.round(present * scale)
+    if len(present) and (precision is not None or (scaled == present).all()):
+        dtype = _int_dtype(scaled.min(), scaled.max(), missing.any())
+        if dtype is not None:
+            null = np.iinfo(dtype).min
+            codes = np.full(len(values), null, dtype=dtype)
+            codes[~missing] = scaled
+            fields = {'null': int(null)} if missing.any() else {}
+            if scale != 1:
+                fields['scale'] = scale
+            return codes, fields
+    single = values.astype('float32')
+    if (single[~missing] == present).all():
+        # no value loses precision as a float32
+        return single, {}
+    return values, {}
+
+
+def dictionary_encode(values):
+    """Returns (codes, dictionary) for a column of strings with at most half as
+    many distinct values as rows, None for other columns. Missing values are
+    coded as None in the dictionary."""
+    if values.dtype.kind not in 'OU':
+        return None
+    return _dictionary(values.tolist())
+
+
+def _dictionary(items):
+    try:
+        # columns of unique values, such as IDs, are told apart by their first rows
+        if len(items) < 2 or 10 * len(set(items[:1000])) > 9 * min(len(items), 1000) + 10:
+            return None
+        lookup = dict.fromkeys(items)
+    except TypeError:
+        return None
+    if any(value != value for value in lookup):
+        # NaN for missing values, each NaN object is a distinct key
+        items = [None if _is_missing(value) else value for value in items]
+        lookup = dict.fromkeys(items)
+    if 2 * len(lookup) > len(items) or not all(isinstance(value, str) or value is None for value in lookup):
+        return None
+    dictionary = list(lookup)
+    for code, value in enumerate(dictionary):
+        lookup[value] = code
+    dtype = 'uint8' if len(dictionary) <= 1 << 8 else 'uint16' if len(dictionary) <= 1 << 16 else 'uint32'
+    return np.fromiter(map(lookup.__getitem__, items), dtype=dtype, count=len(items)), dictionary
+
+
+def round_numbers(table, precision):
+    """Returns `table` with its float columns rounded to `precision` decimal places."""
+    return ColumnTable(
+        (name, np.round(values, precision) if values.dtype.kind == 'f' else values)
+        for name, values in table.columns.items()
+    )
+
+
+def _buffer(values):
+    # TypedArrays are little-endian on every platform Jupyter runs on
+    values = np.ascontiguousarray(values, dtype=values.dtype.newbyteorder('<'))
+    return memoryview(values).cast('B')
+
+
+def encode_columns(table, precision=None):
+    """Encodes a ColumnTable as a columnar payload with one binary buffer per typed
+    or dictionary encoded column, floats are sent with `precision` decimal places."""
+    return {
+        'encoding': 'columnar',
+        'length': table.length,
+        'columns': [_encode_column(name, values, precision) for name, values in table.columns.items()],
+    }
+
+
+def _json_default(value):
+    if isinstance(value, (datetime.date, datetime.time)):
+        return value.isoformat()
+    if isinstance(value, np.generic):
+        return value.item() if not isinstance(value, np.datetime64) else str(value)
+    if isinstance(value, numbers.Integral):
+        return int(value)
+    if isinstance(value, numbers.Real):
+        return float(value)
+    if isinstance(value, (set, tuple)):
+        return list(value)
+    return str(value)
+
+
+def _finite(value):
+    # NaN and infinity are not valid JSON, they are sent as null
+    if isinstance(value, float) and not math.isfinite(value):
+        return None
+    if isinstance(value, dict):
+        return {key: _finite(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_finite(item) for item in value]
+    return value
+
+
+def rows_json(rows):
+    """Returns rows as compact UTF-8 JSON."""
+    try:
+        text = json.dumps(rows, default=_json_default, separators=(',', ':'), ensure_ascii=False,
+                          allow_nan=False)
+    except ValueError:
+        text = json.dumps(_finite(rows), default=_json_default, separators=(',', ':'),
+                          ensure_ascii=False, allow_nan=False)
+    return text.encode('utf-8', 'surrogatepass')
+
+
+def encode_records(records):
+    """Encodes Records as a payload with their schema, the rows are sent as a binary
+    buffer of JSON text, parsed at once in the front-end. That is much faster than
+    letting the widget protocol walk every row looking for buffers.
+
+    String columns with few distinct values are sent as codes into `dictionaries`,
+    in place so the rows keep the order of their keys."""
+    rows, dictionaries = records, {}
+    for name, kind in records.schema.items():
+        if kind != 'string':
+            continue
+        try:
+            values = list(map(itemgetter(name), records))
+        except KeyError:
+            # rows without the column are not encoded
+            continue
+        encoded = _dictionary(values)
+        if encoded is None:
+            continue
+        if rows is records:
+            rows = [dict(row) for row in records]
+        codes, dictionaries[name] = encoded
+        for row, code in zip(rows, codes.tolist()):
+            row[name] = code
+    payload = {
+        'encoding': 'records',
+        'length': len(records),
+        'schema': records.schema,
+        'rows': memoryview(rows_json(rows)),
+    }
+    if dictionaries:
+        payload['dictionaries'] = dictionaries
+    return payload
+
+
+def encode_data(value, widget=None):
+    """Encodes the value of a data trait for the front-end."""
+    if isinstance(value, ColumnTable):
+        return encode_columns(value, getattr(widget, 'precision', None))
+    if isinstance(value, Records):
+        return encode_records(value)
+    return widget_serialization['to_json'](value, widget)
+
+
+# payloads packed per widget, one per data trait and a few more for the traits
+# changed since the last state was sent
+_PACKED_PER_WIDGET = 4
+
+
+def pack_payload(payload):
+    """Returns a payload packed into one deflate-compressed buffer, with the hash
+    of its content. See `unpackBody` in js/lib/charts.js for the layout."""
+    stripped, buffer_paths, buffers = _remove_buffers(payload)
+    sizes = [memoryview(buffer).nbytes for buffer in buffers]
+    # offsets from the end of the header, every buffer starts at a multiple of 8
+    # bytes so typed arrays can view it in place
+    offsets = np.r_[0, np.cumsum([_padded(size) for size in sizes])][:-1].tolist()
+    header = rows_json({'payload': stripped, 'buffer_paths': buffer_paths,
+                        'offsets': [[offset, size] for offset, size in zip(offsets, sizes)]})
+    parts = [struct.pack('<I', len(header)), header, bytes(_padded(4 + len(header)) - 4 - len(header))]
+    for buffer, size in zip(buffers, sizes):
+        parts.extend([buffer, bytes(_padded(size) - size)])
+    body = b''.join(parts)
+    return {
+        'encoding': 'packed',
+        'compression': 'deflate',
+        'hash': hashlib.sha256(body).hexdigest()[:32],
+        'length': payload.get('length', 0),
+        'body': memoryview(zlib.compress(body)),
+    }
+
+
+def _padded(size):
+    return (size + 7) // 8 * 8
+
+
+def store_payload(packed, directory):
+    """Writes the body of a packed payload to `directory`, once per content hash,
+    and returns the link to it saved in the widget state."""
+    name = packed['hash'] + '.vcc'
+    path = os.path.join(directory, name)
+    if not os.path.exists(path):
+        os.makedirs(directory, exist_ok=True)
+        # a rename never leaves a partial file, e.g. with charts saving the same data
+        fd, tmp = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        with os.fdopen(fd, 'wb') as f:
+            f.write(packed['body'])
+        os.replace(tmp, path)
+    return '/'.join(directory.split(os.sep) + [name])
+
+
+def _stored_data(value, widget):
+    storage = getattr(widget, 'state_storage', 'inline')
+    if storage == 'inline' or not isinstance(value, (ColumnTable, Records)):
+        return encode_data(value, widget)
+    # the payloads a widget packed, by converted value and storage settings, so
+    # the state is only compressed again when the data changes. Row updates change
+    # the value in place and bump the widget's revision.
+    cache = widget.__dict__.setdefault('_packed_payloads', {})
+    key = (storage, widget.state_dir, getattr(widget, 'precision', None), getattr(widget, '_revision', None))
+    entry = cache.get(id(value))
+    if entry is not None and entry[0] is value and entry[1] == key:
+        return entry[2]
+    payload = pack_payload(encode_data(value, widget))
+    if storage == 'sidecar':
+        payload['href'] = store_payload(payload, widget.state_dir)
+    cache.pop(id(value), None)
+    cache[id(value)] = (value, key, payload)
+    while len(cache) > _PACKED_PER_WIDGET:
+        del cache[next(iter(cache))]
+    return payload
+
+
+def _data_to_json(value, widget):
+    return _stored_data(value, widget)
+
+
+def _data_from_json(value, widget):
+    return widget_serialization['from_json'](value, widget)
+
+
+# Drop-in replacement for `widget_serialization` on the data traits that also
+# knows how to send Records with their schema and a ColumnTable as binary buffers.
+data_serialization = {
+    'to_json': _data_to_json,
+    'from_json': _data_from_json,
+}
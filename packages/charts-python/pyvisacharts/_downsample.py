@@ -0,0 +1,118 @@
+# /**
+# * Copyright (c) 2024 Visa, Inc.
+# *
+# * This source code is licensed under the MIT license
+# * https://github.com/visa/visa-chart-components/blob/master/LICENSE
+# *
+# **/
+import numpy as np
+from ._aggregate import group_codes
+
+# Point reduction for LineChart and ScatterPlot. Each method takes the x and y
+# values of one series as float arrays (sorted by x, except for 'bin') and
+# returns the positions of the points to keep.
+
+
+def lttb(x, y, max_points):
+    """Largest-Triangle-Three-Buckets, keeps the points that best preserve the
+    visual shape of a line, including its peaks."""
+    n = len(x)
+    if n <= max_points:
+        return np.arange(n)
+    if max_points < 3:
+        return np.array([0, n - 1])[:max_points]
+    # the first and last points are always kept, the others are split in buckets
+    edges = np.linspace(1, n - 1, max_points - 1).astype('int64')
+    keep = np.empty(max_points, dtype='int64')
+    keep[0], keep[-1] = 0, n - 1
+    selected = 0
+    for bucket in range(max_points - 2):
+        start, end = edges[bucket], edges[bucket + 1]
+        next_end = edges[bucket + 2] if bucket + 2 < len(edges) else n
+        next_x, next_y = x[end:next_end].mean(), y[end:next_end].mean()
+        area = np.abs(
+            (x[selected] - next_x) * (y[start:end] - y[selected]) -
+            (x[selected] - x[start:end]) * (next_y - y[selected])
+        )
+        selected = start + int(np.nanargmax(area)) if not np.isnan(area).all() else start
+        keep[bucket + 1] = selected
+    return keep
+
+
+def minmax(x, y, max_points):
+    """Keeps the first and last points, and the lowest and highest point of each
+    of (max_points - 2) // 2 buckets."""
+    n = len(x)
+    if n <= max_points:
+        return np.arange(n)
+    buckets = (max_points - 2) // 2
+    if buckets < 1:
+        return np.array([0, n - 1])[:max_points]
+    bucket = np.arange(n) * buckets // n
+    # sorted by bucket, then by value, so each bucket starts at its minimum
+    order = np.lexsort((y, bucket))
+    starts = np.searchsorted(bucket[order], np.arange(buckets))
+    ends = np.append(starts[1:], n) - 1
+    return np.unique(np.concatenate([order[starts], order[ends], [0, n - 1]]))
+
+
+def bin_points(x, y, max_points):
+    """Keeps one point per occupied cell of an x/y grid with at most `max_points`
+    cells, so dense areas are thinned and outliers survive."""
+    n = len(x)
+    if n <= max_points:
+        return np.arange(n)
+    side = max(int(np.sqrt(max_points)), 1)
+    cell = _cells(x, side) * side + _cells(y, side)
+    _, first = np.unique(cell, return_index=True)
+    return np.sort(first)
+
+
+def _cells(values, side):
+    values = np.nan_to_num(values)
+    low, high = values.min(), values.max()
+    if high == low:
+        return np.zeros(len(values), dtype='int64')
+    return np.minimum(((values - low) / (high - low) * side).astype('int64'), side - 1)
+
+
+METHODS = {
+    'lttb': lttb,
+    'minmax': minmax,
+    'bin': bin_points,
+}
+
+
+def as_float(values):
+    """Returns numbers and dates as floats, and positions for anything else."""
+    if values.dtype.kind == 'M':
+        return values.astype('datetime64[ms]').astype('int64').astype('float64')
+    if values.dtype.kind in 'biuf':
+        return values.astype('float64')
+    try:
+        return values.astype('float64')
+    except (TypeError, ValueError):
+        pass
+    try:
+        return values.astype('datetime64[ms]').astype('int64').astype('float64')
+    except (TypeError, ValueError):
+        return np.arange(len(values), dtype='float64')
+
+
+def downsample(table, x, y, by, max_points, method):
+    """Returns the sorted positions of the rows of `table` to keep so that each
+    series (split on the `by` column) has at most `max_points` points."""
+    x_values = as_float(table.column(x))
+    y_values = as_float(table.column(y))
+    codes = group_codes(table.column(by)) if by else np.zeros(table.length, dtype='int64')
+    order = np.argsort(codes, kind='stable')
+    series = np.split(order, np.flatnonzero(np.diff(codes[order])) + 1)
+    reduce = METHODS[method]
+    keep = []
+    for rows in series:
+        if len(rows) > max_points:
+            if method != 'bin':
+                rows = rows[np.argsort(x_values[rows], kind='stable')]
+            rows = rows[reduce(x_values[rows], y_values[rows], max_points)]
+        keep.append(rows)
+    return np.sort(np.concatenate(keep)) if keep else np.arange(0)
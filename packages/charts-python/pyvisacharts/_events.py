@@ -0,0 +1,59 @@
+# /**
+# * Copyright (c) 2024 Visa, Inc.
+# *
+# * This source code is licensed under the MIT license
+# * https://github.com/visa/visa-chart-components/blob/master/LICENSE
+# *
+# **/
+import asyncio
+import inspect
+from IPython import get_ipython
+from ipywidgets import CallbackDispatcher
+
+# Dispatching of the interaction events sent by the views (see `on_click` and
+# `on_hover` in charts.py) to callbacks that may be plain or `async` functions.
+
+# running tasks, referenced until they are done so they are not garbage collected
+_tasks = set()
+
+
+class EventDispatcher(CallbackDispatcher):
+    """A CallbackDispatcher that also runs `async` callbacks, as tasks on the running
+    event loop (the kernel's) so the kernel keeps handling messages meanwhile."""
+
+    def __call__(self, *args, **kwargs):
+        for callback in list(self.callbacks):
+            try:
+                result = callback(*args, **kwargs)
+                if inspect.isawaitable(result):
+                    self._schedule(callback, result)
+            except Exception as e:
+                self._report(callback, e)
+
+    def _schedule(self, callback, awaitable):
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            # not called from an event loop, e.g. in a script, so it runs now
+            asyncio.run(_wait(awaitable))
+            return
+        task = asyncio.ensure_future(awaitable)
+        _tasks.add(task)
+        task.add_done_callback(lambda task: self._task_done(callback, task))
+
+    def _task_done(self, callback, task):
+        _tasks.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            self._report(callback, task.exception())
+
+    def _report(self, callback, error):
+        # the way CallbackDispatcher reports errors, shown in the notebook if possible
+        ip = get_ipython()
+        if ip is None:
+            self.log.warning('Exception in callback %s: %s', callback, error, exc_info=error)
+        else:
+            ip.showtraceback((type(error), error, error.__traceback__))
+
+
+async def _wait(awaitable):
+    return await awaitable
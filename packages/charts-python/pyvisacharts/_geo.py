@@ -0,0 +1,155 @@
+# /**
+# * Copyright (c) 2024 Visa, Inc.
+# *
+# * This source code is licensed under the MIT license
+# * https://github.com/visa/visa-chart-components/blob/master/LICENSE
+# *
+# **/
+import numpy as np
+from ._aggregate import combined_codes, reduce_groups
+from ._data import ColumnTable
+
+# Spatial binning of WorldMap markers, see `cluster` in charts.py. Markers are
+# binned into grid cells (`level` halvings of the whole map in each direction)
+# or geohash cells (`level` characters), one marker is sent per cell.
+
+CLUSTER_METHODS = ('grid', 'geohash')
+
+_BASE32 = np.frombuffer(b'0123456789bcdefghjkmnpqrstuvwxyz', dtype='uint8')
+
+
+def _quantize(values, low, high, bits):
+    cells = 1 << bits
+    index = np.floor((values.astype('float64') - low) / (high - low) * cells)
+    return np.clip(np.nan_to_num(index), 0, cells - 1).astype('int64')
+
+
+def grid_cells(lat, lon, level):
+    """Returns the code of the grid cell of each point, cells are 360 / 2**level
+    degrees of longitude wide and 180 / 2**level degrees of latitude high."""
+    x = _quantize(lon, -180, 180, level)
+    y = _quantize(-lat.astype('float64'), -90, 90, level)
+    return (y << level) | x
+
+
+def grid_names(codes, level):
+    """Returns the 'level/x/y' name of grid cells, as in web map tiles."""
+    mask = (1 << level) - 1
+    return np.array(['{}/{}/{}'.format(level, code & mask, code >> level) for code in codes.tolist()], dtype=object)
+
+
+def geohash_cells(lat, lon, precision):
+    """Returns the geohash of each point as an integer of 5 * `precision` bits."""
+    bits = 5 * precision
+    x = _quantize(lon, -180, 180, (bits + 1) // 2)
+    y = _quantize(lat, -90, 90, bits // 2)
+    codes = np.zeros(len(x), dtype='int64')
+    # geohash interleaves the bits, starting with the longitude
+    for bit in range(bits):
+        source, position = (x, (bits - bit - 1) // 2) if bit % 2 == 0 else (y, (bits - bit - 1) // 2)
+        codes = (codes << 1) | ((source >> position) & 1)
+    return codes
+
+
+def geohash_names(codes, precision):
+    """Returns the geohash strings of geohash_cells codes."""
+    chars = np.empty((len(codes), precision), dtype='uint8')
+    for i in range(precision):
+        chars[:, i] = _BASE32[(codes >> (5 * (precision - i - 1))) & 31]
+    return chars.view('S{}'.format(precision)).ravel().astype(str).astype(object)
+
+
+def cluster(table, lat, lon, method, level, value=None, how='sum', by=(), marker=None, name=None):
+    """Returns one row per cell (and value of the `by` columns) of the points of
+    `table`: their mean position, the aggregate of `value` and their 'count'.
+
+    `marker` and `name` are set to the cell and its number of points, except for
+    cells holding a single point, which keep its own values."""
+    if method == 'grid':
+        cells = grid_cells(table.column(lat), table.column(lon), level)
+    else:
+        cells = geohash_cells(table.column(lat), table.column(lon), level)
+    codes, count = combined_codes([cells] + [table.column(column) for column in by])
+    first = np.full(count, table.length, dtype='int64')
+    np.minimum.at(first, codes, np.arange(table.length))
+    counts = np.bincount(codes, minlength=count)
+    columns = [
+        (lat, reduce_groups(codes, count, table.column(lat), 'mean')),
+        (lon, reduce_groups(codes, count, table.column(lon), 'mean')),
+    ]
+    if value:
+        columns.append((value, reduce_groups(codes, count, table.column(value), how)))
+    columns.extend((column, table.column(column)[first]) for column in by)
+    single = counts == 1
+    names = grid_names(cells[first], level) if method == 'grid' else geohash_names(cells[first], level)
+    if marker:
+        columns.append((marker, _keep_single(names, table.column(marker)[first], single)))
+    if name:
+        labels = np.array(['{:,} markers'.format(n) for n in counts.tolist()], dtype=object)
+        columns.append((name, _keep_single(labels, table.column(name)[first], single)))
+    columns.append(('count', counts))
+    return ColumnTable(columns)
+
+
+def _keep_single(values, originals, single):
+    values = values.astype(object)
+    values[single] = originals[single]
+    return values
+
+
+def within(table, lat, lon, extent):
+    """Returns the rows of `table` inside `extent`, [west, south, east, north]."""
+    return table.take(inside(table.column(lat), table.column(lon), extent))
+
+
+def inside(lat, lon, extent):
+    """Returns which points are inside `extent`, [west, south, east, north]."""
+    west, south, east, north = extent
+    lat, lon = lat.astype('float64'), lon.astype('float64')
+    rows = (lat >= south) & (lat <= north)
+    if west <= east:
+        return rows & (lon >= west) & (lon <= east)
+    # the extent crosses the antimeridian
+    return rows & ((lon >= west) | (lon <= east))
+
+
+class SpatialIndex(object):
+    """The points of a table sorted by cells of `resolution` degrees, to find the
+    points inside an extent without testing all of them."""
+
+    def __init__(self, lat, lon, resolution=1.0):
+        self.resolution = resolution
+        self.lat = lat.astype('float64')
+        self.lon = lon.astype('float64')
+        self.columns = int(np.ceil(360 / resolution))
+        self.rows = int(np.ceil(180 / resolution))
+        cells = self._cells(self.lat, self.lon)
+        self.order = np.argsort(cells, kind='stable')
+        # the start of each cell in `order`, cells are numbered row by row
+        self.starts = np.searchsorted(cells[self.order], np.arange(self.rows * self.columns + 1))
+
+    def _cells(self, lat, lon):
+        x = np.clip(np.nan_to_num((lon + 180) // self.resolution), 0, self.columns - 1).astype('int64')
+        y = np.clip(np.nan_to_num((lat + 90) // self.resolution), 0, self.rows - 1).astype('int64')
+        return y * self.columns + x
+
+    def query(self, extent):
+        """Returns the positions of the points inside `extent`, [west, south, east,
+        north], in their original order."""
+        west, south, east, north = extent
+        spans = [(west, east)] if west <= east else [(west, 180.0), (-180.0, east)]
+        rows = range(*self._span(south, north, self.rows, 90))
+        candidates = []
+        for low, high in spans:
+            first, last = self._span(low, high, self.columns, 180)
+            for row in rows:
+                start, end = self.starts[row * self.columns + first], self.starts[row * self.columns + last]
+                candidates.append(self.order[start:end])
+        # the spans of an extent crossing the antimeridian can share a column
+        found = np.unique(np.concatenate(candidates)) if candidates else np.arange(0)
+        return found[inside(self.lat[found], self.lon[found], extent)]
+
+    def _span(self, low, high, cells, offset):
+        first = int(np.clip((low + offset) // self.resolution, 0, cells - 1))
+        last = int(np.clip((high + offset) // self.resolution, 0, cells - 1)) + 1
+        return first, last
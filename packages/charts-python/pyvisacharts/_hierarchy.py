@@ -0,0 +1,143 @@
+# /**
+# * Copyright (c) 2024 Visa, Inc.
+# *
+# * This source code is licensed under the MIT license
+# * https://github.com/visa/visa-chart-components/blob/master/LICENSE
+# *
+# **/
+import numpy as np
+from ._aggregate import combined_codes
+from ._data import ColumnTable
+
+# Builds the node/parent table drawn by CirclePacking from flat grouping columns
+# or path strings, see CirclePacking.from_groups and from_paths in charts.py.
+#
+# The tree is built one depth at a time over all the rows at once. At each depth
+# the rows are grouped on (parent node, value), the groups are ranked among their
+# siblings by size and the ones that are not kept (top_n, min_share) are folded
+# into one "other" node per parent, which ends the rows they hold. A parent with
+# a single child left out keeps it, folding it would only rename it.
+
+
+def _missing(values):
+    if values.dtype.kind == 'M':
+        return np.isnat(values)
+    if values.dtype.kind in 'fO':
+        return np.asarray(values != values, dtype=bool) | np.asarray(values == None, dtype=bool)  # noqa: E711
+    return np.zeros(len(values), dtype=bool)
+
+
+def split_paths(paths, sep):
+    """Splits path strings into one column per level, shorter paths end with None."""
+    parts = [[part for part in str(path).split(sep) if part] if path is not None and path == path else []
+             for path in paths.tolist()]
+    depth = max((len(path) for path in parts), default=0)
+    levels = [np.full(len(parts), None, dtype=object) for _ in range(depth)]
+    for i, path in enumerate(parts):
+        for level, part in enumerate(path):
+            levels[level][i] = part
+    return levels
+
+
+def build_hierarchy(levels, sizes, max_depth=None, top_n=None, min_share=0.0, root='All',
+                    sep='/', other_label='Other', size_name='value'):
+    """Returns a ColumnTable with one row per node of the tree of `levels` (a column
+    per depth, None where a row's path ends) under a `root` node: its 'id' (the
+    path from the root), 'parent' id, 'label' and `size_name`, the size of the rows
+    ending at the node. Nodes deeper than `max_depth` are rolled up into their
+    ancestor, and only the `top_n` largest children of a node that hold at least
+    `min_share` of its size are kept, the others are folded into an `other_label`
+    node. A single child left out is kept rather than folded, so `other_label`
+    nodes always hold at least two children."""
+    levels = levels[:max_depth] if max_depth else levels
+    sizes = np.ones(len(levels[0]) if levels else 0) if sizes is None else np.nan_to_num(sizes.astype('float64'))
+    ids = _objects([root])
+    parents = _objects([None])
+    labels = _objects([root])
+    totals = np.array([sizes.sum()])
+    # size of the rows ending at each node
+    own = np.zeros(1)
+    # the node of each row at the current depth, and whether it goes deeper
+    node = np.zeros(len(sizes), dtype='int64')
+    alive = np.ones(len(sizes), dtype=bool)
+    for values in levels:
+        present = alive & ~_missing(values)
+        own += np.bincount(node[alive & ~present], weights=sizes[alive & ~present], minlength=len(own))
+        alive = present
+        rows = np.flatnonzero(present)
+        if not len(rows):
+            break
+        codes, count = combined_codes([node[rows], values[rows]])
+        group_totals = np.bincount(codes, weights=sizes[rows], minlength=count)
+        first = np.full(count, len(rows), dtype='int64')
+        np.minimum.at(first, codes, np.arange(len(rows)))
+        group_parents = node[rows][first]
+        group_values = values[rows][first]
+        keep = _kept(group_parents, group_totals, totals[group_parents], top_n, min_share)
+
+        # the kept groups become nodes, ordered by parent then size
+        order = np.lexsort((-group_totals, group_parents))
+        order = order[keep[order]]
+        group_nodes = np.full(count, -1, dtype='int64')
+        group_nodes[order] = len(ids) + np.arange(len(order))
+        new_parents = ids[group_parents[order]]
+        new_labels = group_values[order].astype(object)
+
+        # the other groups are folded into one node per parent, their rows end there
+        folded = np.flatnonzero(~keep)
+        other_parents = np.unique(group_parents[folded])
+        other_sizes = np.bincount(group_parents[folded], weights=group_totals[folded],
+                                  minlength=len(ids))[other_parents]
+        new_parents = np.concatenate([new_parents, ids[other_parents]])
+        new_labels = np.concatenate([new_labels, np.full(len(other_parents), other_label, dtype=object)])
+        ids = np.concatenate([ids, _join(new_parents, sep, new_labels)])
+        parents = np.concatenate([parents, new_parents])
+        labels = np.concatenate([labels, new_labels])
+        totals = np.concatenate([totals, group_totals[order], other_sizes])
+        own = np.concatenate([own, np.zeros(len(order)), other_sizes])
+
+        row_nodes = group_nodes[codes]
+        alive[rows[row_nodes < 0]] = False
+        node[rows] = np.maximum(row_nodes, 0)
+    own += np.bincount(node[alive], weights=sizes[alive], minlength=len(own))
+    # nodes without rows of their own are sized by their children
+    own = np.where(own > 0, own, np.nan)
+    return ColumnTable([('id', ids), ('parent', parents), ('label', labels), (size_name, own)])
+
+
+def _objects(values):
+    array = np.empty(len(values), dtype=object)
+    array[:] = values
+    return array
+
+
+def _join(prefixes, sep, names):
+    # the IDs of new nodes, from the IDs of their parents and their labels
+    if not len(names):
+        return _objects([])
+    return np.char.add(np.char.add(prefixes.astype(str), sep), names.astype(str)).astype(object)
+
+
+def _kept(parents, totals, parent_totals, top_n, min_share):
+    """Returns which groups are kept, from their rank among the children of their
+    parent and their share of its size."""
+    keep = np.ones(len(totals), dtype=bool)
+    if min_share:
+        with np.errstate(invalid='ignore', divide='ignore'):
+            keep &= totals >= min_share * parent_totals
+    if top_n:
+        order = np.lexsort((-totals, parents))
+        sorted_parents = parents[order]
+        starts = np.r_[True, sorted_parents[1:] != sorted_parents[:-1]]
+        first = np.maximum.accumulate(np.where(starts, np.arange(len(order)), 0))
+        rank = np.empty(len(order), dtype='int64')
+        rank[order] = np.arange(len(order)) - first
+        keep &= rank < top_n
+    # folding a single node into "other" would only rename it
+    return keep | _only_folded(parents, keep)
+
+
+def _only_folded(parents, keep):
+    # the groups that are the only folded child of their parent
+    folded_per_parent = np.bincount(parents[~keep], minlength=parents.max() + 1 if len(parents) else 0)
+    return ~keep & (folded_per_parent[parents] == 1)
@@ -0,0 +1,187 @@
+# /**
+# * Copyright (c) 2024 Visa, Inc.
+# *
+# * This source code is licensed under the MIT license
+# * https://github.com/visa/visa-chart-components/blob/master/LICENSE
+# *
+# **/
+import asyncio
+import inspect
+import logging
+import time
+from collections import deque
+from IPython import get_ipython
+from .backends import to_columns
+
+# Streaming of rows into a chart's data, see `stream` in charts.py. Rows are read
+# on the kernel's event loop, the thread the widgets live on, and kept in one ring
+# buffer per series until the next flush sends them with append_rows. The chart
+# then trims each series to the window, so memory is bounded however long it runs.
+
+# a flush waits for the front-end at most this long, in case it stopped answering
+_ACK_TIMEOUT = 10.0
+
+_log = logging.getLogger(__name__)
+
+
+class Stream(object):
+    """Rows streamed into a chart from a source, returned by `chart.stream`.
+
+    `stop()` sends the rows received so far and ends the stream, `cancel()` ends it
+    at once. The counters tell how it is keeping up: rows `received`, `sent` and
+    `dropped` (overwritten in a full buffer before they were sent), and the
+    `flushes` sent or `deferred` while the front-end was behind.
+    """
+
+    def __init__(self, widget, source, window=1000, interval=1.0, by=None, max_pending=2):
+        if window < 1:
+            raise ValueError('window must be at least 1, got {}'.format(window))
+        if not (hasattr(source, '__aiter__') or callable(source)):
+            raise TypeError('Expecting an async iterator or a callable, got {}'.format(type(source)))
+        self.widget = widget
+        self.source = source
+        self.window = window
+        self.interval = interval
+        self.by = by
+        self.max_pending = max_pending
+        self.received = 0
+        self.sent = 0
+        self.dropped = 0
+        self.flushes = 0
+        self.deferred = 0
+        # the rows of each series waiting for the next flush, in order of arrival
+        self._buffers = {}
+        self._task = None
+        self._started = 0.0
+        self._stopping = False
+
+    def __repr__(self):
+        state = 'running' if self.running else 'stopped'
+        return '<Stream {} into {}: {} rows received, {} sent, {} dropped>'.format(
+            state, type(self.widget).__name__, self.received, self.sent, self.dropped)
+
+    @property
+    def running(self):
+        return self._task is not None and not self._task.done()
+
+    def start(self):
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            raise RuntimeError('stream needs a running event loop, such as a Jupyter kernel') from None
+        self._started = time.monotonic()
+        self._task = loop.create_task(self._run())
+        return self
+
+    def stop(self):
+        """Sends the buffered rows and ends the stream."""
+        self._stopping = True
+        self._end()
+
+    def cancel(self):
+        """Ends the stream, the buffered rows are dropped."""
+        self._buffers.clear()
+        self._end()
+
+    def _end(self):
+        if self.running:
+            self._task.cancel()
+        else:
+            self._finish()
+
+    async def wait(self):
+        """Waits for the stream to end, e.g. when its source is exhausted."""
+        if self._task is not None:
+            try:
+                await asyncio.shield(self._task)
+            except asyncio.CancelledError:
+                if not self._task.cancelled():
+                    raise
+
+    async def _run(self):
+        reader = asyncio.ensure_future(self._read()) if hasattr(self.source, '__aiter__') else None
+        try:
+            while self.widget.comm is not None:
+                if reader is not None:
+                    # wakes up early when the source is exhausted
+                    await asyncio.wait([reader], timeout=self.interval)
+                else:
+                    await asyncio.sleep(self.interval)
+                    self.add(await _result(self.source()))
+                if reader is not None and reader.done():
+                    reader.result()
+                    self._stopping = True
+                    break
+                self._flush()
+        except Exception as error:
+            _report(error)
+        finally:
+            if reader is not None:
+                reader.cancel()
+            self._finish()
+
+    async def _read(self):
+        async for rows in self.source:
+            self.add(rows)
+
+    def add(self, rows):
+        """Buffers rows (a row dict, a DataFrame or List) until the next flush."""
+        if rows is None:
+            return
+        if isinstance(rows, dict):
+            rows = [rows]
+        elif not isinstance(rows, list):
+            table = to_columns(rows)
+            names = list(table.columns)
+            # numpy scalars, so dates keep their type when the rows are sent
+            rows = [dict(zip(names, values)) for values in zip(*table.columns.values())]
+        for row in rows:
+            key = row.get(self.by) if self.by else None
+            buffer = self._buffers.get(key)
+            if buffer is None:
+                buffer = self._buffers[key] = deque(maxlen=self.window)
+            elif len(buffer) == self.window:
+                self.dropped += 1
+            buffer.append(row)
+        self.received += len(rows)
+
+    def _flush(self, force=False):
+        if not any(self._buffers.values()) or self.widget.comm is None:
+            return
+        widget = self.widget
+        # the rows are sent by the DataSource when the chart reads one
+        sender = widget._shared_source() or widget
+        last_answer = max(sender._rows_applied_at, self._started)
+        if not force and sender._rows_pending() > self.max_pending \
+                and time.monotonic() - last_answer < _ACK_TIMEOUT:
+            # the front-end is behind, the rows wait in their buffers
+            self.deferred += 1
+            return
+        rows = [row for buffer in self._buffers.values() for row in buffer]
+        self._buffers = {}
+        widget.append_rows(rows)
+        widget.trim(self.window, by=self.by)
+        self.sent += len(rows)
+        self.flushes += 1
+
+    def _finish(self):
+        if self._stopping:
+            self._stopping = False
+            try:
+                self._flush(force=True)
+            except Exception as error:
+                _report(error)
+        self.widget._streams.discard(self)
+
+
+async def _result(value):
+    return await value if inspect.isawaitable(value) else value
+
+
+def _report(error):
+    # shown in the notebook if possible, like the errors of event callbacks
+    ip = get_ipython()
+    if ip is None:
+        _log.warning('pyvisacharts stream failed: %s', error, exc_info=error)
+    else:
+        ip.showtraceback((type(error), error, error.__traceback__))
@@ -0,0 +1,169 @@
+# /**
+# * Copyright (c) 2024 Visa, Inc.
+# *
+# * This source code is licensed under the MIT license
+# * https://github.com/visa/visa-chart-components/blob/master/LICENSE
+# *
+# **/
+import sys
+import numpy as np
+from ._data import ColumnTable, Records, list_to_numpy
+
+# Registry of the data types charts accept and how to convert them. Backends are
+# looked up by type name, so a library is never imported here: if a value is a
+# pandas DataFrame, pandas has already been imported by whoever created it.
+
+_backends = []
+
+
+def register_backend(type_name, to_columns, to_records=None, select=None):
+    """Registers how to convert values of the type `type_name` (e.g. 'pandas.DataFrame').
+
+    `to_columns(value)` returns an iterable of (name, 1-d numpy array) pairs and
+    `to_records(value)` a list of row dicts. When `to_records` is not given, records
+    are built from the columns, which is usually faster and sends dates as numbers.
+    `select(value, names)` returns a value of the same type holding only the columns
+    in `names`, without converting the others; when it is not given, the columns are
+    selected after conversion. Backends registered later take precedence.
+    """
+    module_name, _, class_name = type_name.rpartition('.')
+    _backends.insert(0, (module_name, class_name, to_columns, to_records, select))
+
+
+def _find_backend(value):
+    for module_name, class_name, to_columns, to_records, select in _backends:
+        module = sys.modules.get(module_name)
+        cls = getattr(module, class_name, None) if module is not None else None
+        if cls is not None and isinstance(value, cls):
+            return to_columns, to_records, select
+    return None
+
+
+def is_supported(value):
+    """Returns True if `value` can be used as chart data."""
+    return _find_backend(value) is not None
+
+
+def to_columns(value):
+    """Converts chart data into a ColumnTable."""
+    if isinstance(value, ColumnTable):
+        return value
+    backend = _find_backend(value)
+    if backend is None:
+        raise ValueError('Expecting a DataFrame or List, got {}'.format(type(value)))
+    return ColumnTable(backend[0](value))
+
+
+def to_records(value):
+    """Converts chart data into Records, a list of row dicts with a column schema."""
+    if isinstance(value, ColumnTable):
+        return value.to_records()
+    backend = _find_backend(value)
+    if backend is None:
+        raise ValueError('Expecting a DataFrame or List, got {}'.format(type(value)))
+    if backend[1] is not None:
+        return Records(backend[1](value))
+    return ColumnTable(backend[0](value)).to_records()
+
+
+def select_columns(value, names):
+    """Returns chart data holding only the columns of `value` that are in `names`,
+    `value` itself when it has no other column."""
+    if isinstance(value, ColumnTable):
+        if all(name in names for name in value.columns):
+            return value
+        return ColumnTable((name, values) for name, values in value.columns.items() if name in names)
+    backend = _find_backend(value)
+    if backend is None:
+        raise ValueError('Expecting a DataFrame or List, got {}'.format(type(value)))
+    if backend[2] is not None:
+        return backend[2](value, names)
+    return select_columns(ColumnTable(backend[0](value)), names)
+
+
+def _pandas_columns(frame):
+    import pandas as pd
+    for i, name in enumerate(frame.columns):
+        series = frame.iloc[:, i]
+        dtype = series.dtype
+        if isinstance(dtype, pd.DatetimeTZDtype):
+            yield name, series.dt.tz_convert('UTC').dt.tz_localize(None).to_numpy()
+        elif pd.api.types.is_extension_array_dtype(dtype) and pd.api.types.is_numeric_dtype(dtype) \
+                and not pd.api.types.is_bool_dtype(dtype):
+            yield name, series.to_numpy(dtype='float64', na_value=np.nan)
+        elif pd.api.types.is_bool_dtype(dtype) and not series.hasnans:
+            yield name, series.to_numpy(dtype=bool)
+        elif pd.api.types.is_extension_array_dtype(dtype):
+            # nullable strings and booleans, pd.NA becomes None
+            yield name, series.to_numpy(dtype=object, na_value=None)
+        else:
+            yield name, series.to_numpy()
+
+
+def _pandas_select(frame, names):
+    keep = frame.columns.isin(list(names))
+    return frame if keep.all() else frame.loc[:, keep]
+
+
+def _polars_columns(frame):
+    for series in frame.get_columns():
+        yield series.name, series.to_numpy()
+
+
+def _polars_select(frame, names):
+    columns = [name for name in frame.columns if name in names]
+    return frame if len(columns) == frame.width else frame.select(columns)
+
+
+def _arrow_columns(table):
+    for name, column in zip(table.column_names, table.columns):
+        if hasattr(column, 'chunks'):
+            yield name, column.to_numpy()
+        else:
+            # a RecordBatch column, copied when it holds nulls or strings
+            yield name, column.to_numpy(zero_copy_only=False)
+
+
+def _arrow_select(table, names):
+    columns = [name for name in table.column_names if name in names]
+    return table if len(columns) == table.num_columns else table.select(columns)
+
+
+def _numpy_columns(array):
+    if array.dtype.names is None:
+        raise ValueError('Expecting a structured NumPy array with named fields, got {}'.format(array.dtype))
+    for name in array.dtype.names:
+        yield name, array[name]
+
+
+def _numpy_select(array, names):
+    columns = [name for name in array.dtype.names or () if name in names]
+    return array if len(columns) == len(array.dtype.names or ()) else array[columns]
+
+
+def _list_columns(rows):
+    names = {}
+    for row in rows:
+        names.update(dict.fromkeys(row))
+    for name in names:
+        yield name, list_to_numpy([row.get(name) for row in rows])
+
+
+def _list_select(rows, names):
+    if all(name in names for row in rows for name in row):
+        return rows
+    return [{name: value for name, value in row.items() if name in names} for row in rows]
+
+
+def _list_records(rows):
+    # Records is a copy, so row updates never modify the caller's list
+    return rows
+
+
+register_backend('builtins.list', _list_columns, _list_records, _list_select)
+register_backend('pyvisacharts._data.ColumnTable', lambda table: table.columns.items())
+register_backend('numpy.ndarray', _numpy_columns, select=_numpy_select)
+register_backend('pandas.DataFrame', _pandas_columns, select=_pandas_select)
+register_backend('polars.DataFrame', _polars_columns, select=_polars_select)
+register_backend('pyarrow.Table', _arrow_columns, select=_arrow_select)
+register_backend('pyarrow.RecordBatch', _arrow_columns, select=_arrow_select)
@@ -6,22 +6,339 @@
 # *
 # **/
 from __future__ import annotations
-from os import sync
+from contextlib import contextmanager
+import json
+import threading
+import time
+import numpy as np
 import ipywidgets as widgets
 from ipywidgets import widget_serialization
-from traitlets import Unicode, Dict, List, Any, validate
-import pandas as pd
+from ipywidgets.widgets.widget import _remove_buffers
+from traitlets import Unicode, Dict, List, Any, Bool, Enum, Float, Int, validate
+from ._aggregate import AGGREGATES, aggregate, distinct, floor_dates, fold_categories, fold_small, keep_last, parse_freq
+from ._cache import conversion_cache, fingerprint
+from ._data import ColumnTable, data_serialization, encode_data, list_to_numpy, round_numbers
+from ._downsample import downsample
+from ._events import EventDispatcher
+from ._geo import CLUSTER_METHODS, SpatialIndex, cluster, inside, within
+from ._hierarchy import build_hierarchy, split_paths
+from ._stream import Stream
 from ._version import __version__
+from . import metrics
+from .spec import ChartSpec
+from .backends import is_supported, select_columns, to_columns, to_records
 
 # See js/lib/charts.js for the frontend counterpart to this file.
 
+__all__ = [
+    'ChartWidget', 'DataSource', 'BarChart', 'ClusteredBarChart', 'StackedBarChart', 'LineChart',
+    'PieChart', 'ScatterPlot', 'HeatMap', 'CirclePacking', 'ParallelPlot', 'DumbbellPlot', 'WorldMap',
+    'AlluvialDiagram',
+]
+
 view_name = 'ChartView'
 model_name = 'ChartModel'
 _module = '@visa/charts-python'
 
-@widgets.register
-class BarChart(widgets.DOMWidget):
-    """A bar-chart widget."""
+class _DataWidget(widgets.Widget):
+    """Base class for the widgets holding chart data, handles data conversion and syncing."""
+
+    # Widget properties are defined as traitlets. Any property tagged with `sync=True`
+    # is automatically synced to the frontend *any* time it changes in Python.
+    # It is synced back to Python from the frontend *any* time the model is touched.
+
+    # How data is sent to the front-end: 'records' sends a JSON list of row objects,
+    # 'columnar' sends each numeric or date column as a typed binary buffer and the
+    # front-end rebuilds the rows. Not synced, the payload describes itself. Either
+    # way the payload carries the column types and dates are sent as epoch numbers.
+    transport = Enum(['records', 'columnar'], default_value='records')
+
+    # Decimal places floats are rounded to before they are sent, None sends them as
+    # they are. With the columnar transport rounded floats are sent as small scaled
+    # integers, e.g. precision=2 for amounts shown to the cent. Not synced.
+    precision = Int(None, allow_none=True)
+
+    # How the data is kept in the widget state saved with a notebook. 'inline' keeps
+    # the rows, 'compressed' one deflate-compressed buffer (base64 in the .ipynb)
+    # and 'sidecar' a link to a copy of that buffer written to `state_dir`, once
+    # per content hash. Embedded pages load compressed data when a chart scrolls
+    # into view. Not synced, the payload describes itself.
+    state_storage = Enum(['inline', 'compressed', 'sidecar'], default_value='inline')
+    # Directory of the sidecar files, relative to the kernel's working directory
+    # (the notebook's) so the saved links resolve next to the notebook.
+    state_dir = Unicode('vcc_state')
+
+    # Maximum number of state updates sent to the front-end per second, 0 for no limit.
+    # Updates arriving faster are coalesced and only the latest state is sent.
+    max_sync_rate = Float(0)
+
+    # Names of the traits holding row data, converted by `_validate_data`
+    _data_traits = ('data',)
+    # Names of the traits that can change the converted data, see `_conversion_options`
+    _data_option_traits = ('transport', 'precision')
+
+    # Bumped on every change to the data, observed by the charts and tables reading it
+    _revision = Int(0)
+
+    def __init__(self, **kwargs):
+        # raw values assigned to the data traits and the options they were converted with
+        self._data_sources = {}
+        self._data_options = {}
+        # content fingerprints of the converted data, to skip re-assigning unchanged data
+        self._data_keys = {}
+        # the values of the data traits reduced to the columns read, see `_project`
+        self._projections = {}
+        # rate limiting state for `send_state`
+        self._sync_lock = threading.Lock()
+        self._sync_pending = set()
+        self._sync_timer = None
+        self._last_sync = 0.0
+        # counters of conversions and messages, see metrics.py
+        self.sync_stats = metrics.register(self)
+        self._open_state = None
+        # row messages sent, and the last one the front-end said it applied
+        self._rows_sent = 0
+        self._rows_applied = 0
+        self._rows_applied_at = 0.0
+        # streams feeding `data`, see _RowUpdatesMixin.stream
+        self._streams = set()
+        super().__init__(**kwargs)
+        self.observe(self._data_option_changed, names=list(self._data_option_traits))
+        self.observe(self._bump_revision, names=list(self._data_traits))
+        self.observe(self._storage_changed, names=['state_storage', 'state_dir'])
+        self.on_msg(self._handle_rows_msg)
+
+    def _conversion_options(self):
+        """Returns the settings that affect how data is converted."""
+        return (self.transport, self.precision)
+
+    def _transforms_active(self):
+        """Whether `_transform_data` changes the rows, rather than passing them through."""
+        return False
+
+    def _transform_data(self, value):
+        """Hook for charts that reduce or reshape their rows before they are synced."""
+        return value
+
+    def _source_columns(self, value):
+        """Returns `value` as the ColumnTable passed to `_transform_data`."""
+        return to_columns(value)
+
+    def _data_fields(self):
+        """Returns the names of the columns read by the front-end, None for all of them."""
+        return None
+
+    def _project(self, name, value, revision=None):
+        """Returns `value` with only the columns in `_data_fields`. The result is kept,
+        so re-converting the same value (and `revision` of it) reuses it."""
+        fields = self._data_fields()
+        if fields is None or not is_supported(value):
+            return value
+        previous = self._projections.get(name)
+        if previous is not None and previous[0] is value and previous[1:3] == (revision, fields):
+            return previous[3]
+        projected = select_columns(value, fields)
+        self._projections[name] = (value, revision, fields, projected)
+        return projected
+
+    def _cache_key(self, value, options):
+        """Returns the key `value` is converted under in the shared conversion cache,
+        or None when it is not cached."""
+        if not is_supported(value):
+            return None
+        digest = fingerprint(value)
+        if digest is None:
+            return None
+        # transforms depend on the chart type, a plain conversion does not
+        owner = type(self).__name__ if self._transforms_active() else None
+        return digest, owner, options
+
+    def _convert_data(self, value):
+        """Converts a DataFrame or List into the value synced to the front-end."""
+        if not is_supported(value):
+            raise ValueError('Expecting a DataFrame or List, got {}'.format(type(value)))
+        if self._transforms_active():
+            value = self._transform_data(self._source_columns(value))
+        if self.precision is not None:
+            value = round_numbers(to_columns(value), self.precision)
+        if self.transport == 'columnar':
+            return to_columns(value)
+        return to_records(value)
+
+    @validate('data', 'linkData')
+    def _validate_data(self, proposal):
+        name = proposal.trait.name
+        if name not in self._data_traits:
+            return proposal.value
+        return self._assign_data(name, proposal.value)
+
+    def _assign_data(self, name, value):
+        """Returns the converted `value` of the data trait `name`."""
+        options = self._conversion_options()
+        projected = self._project(name, value)
+        key = self._cache_key(projected, options)
+        if key is not None and key == self._data_keys.get(name):
+            # same content and options, the current value is kept and nothing is sent
+            self._data_sources[name] = value
+            return getattr(self, name)
+        self._data_sources[name] = value
+        self._data_options[name] = options
+        self._data_keys[name] = key
+        converted = conversion_cache.get(key) if key is not None else None
+        if converted is None:
+            start = time.perf_counter()
+            converted = self._convert_data(projected)
+            if metrics.enabled:
+                metrics.record_conversion(self, name, time.perf_counter() - start, _row_count(converted))
+            if key is not None:
+                conversion_cache.put(key, converted)
+        return converted
+
+    def _refresh_data(self):
+        """Re-converts the data traits whose conversion options have changed."""
+        options = self._conversion_options()
+        for name, value in list(self._data_sources.items()):
+            if self._data_options.get(name) != options:
+                setattr(self, name, value)
+
+    def _data_option_changed(self, change):
+        self._refresh_data()
+
+    def _bump_revision(self, change):
+        self._revision += 1
+
+    def _storage_changed(self, change):
+        # the data is the same, only sent again in its new form
+        if self.comm is not None:
+            self.send_state([name for name, trait in self.traits(sync=True).items()
+                             if trait.metadata.get('to_json') is data_serialization['to_json']])
+
+    def _handle_rows_msg(self, widget, content, buffers):
+        # sent by applyRowsMessage in charts.js once it applied a row message
+        if content.get('event') == 'rows_applied':
+            self._rows_applied = max(self._rows_applied, int(content.get('seq', 0)))
+            self._rows_applied_at = time.monotonic()
+
+    def _rows_pending(self):
+        # row messages sent that the front-end has not applied yet
+        return self._rows_sent - self._rows_applied
+
+    @contextmanager
+    def batch(self):
+        """Context manager that sends all the changes made inside it to the front-end
+        in one message, and converts `data` once with the final accessors."""
+        with self.hold_sync(), self.hold_trait_notifications():
+            yield
+
+    def update(self, **kwargs):
+        """Sets several properties at once, e.g. `chart.update(data=df, valueAccessor='x')`,
+        they are sent to the front-end in one message."""
+        with self.batch():
+            for name, value in kwargs.items():
+                if not self.has_trait(name):
+                    raise AttributeError('{} has no property {!r}'.format(type(self).__name__, name))
+                setattr(self, name, value)
+
+    def send_state(self, key=None):
+        if not self.max_sync_rate or self.comm is None:
+            return super().send_state(key)
+        keys = self.keys if key is None else [key] if isinstance(key, str) else key
+        with self._sync_lock:
+            self._sync_pending.update(keys)
+            if self._sync_timer is not None:
+                return
+            wait = self._last_sync + 1.0 / self.max_sync_rate - time.monotonic()
+            if wait > 0:
+                # a timer thread, so updates made by a long running cell still get sent
+                self._sync_timer = threading.Timer(wait, self._flush_state)
+                self._sync_timer.daemon = True
+                self._sync_timer.start()
+                return
+        self._flush_state()
+
+    def _flush_state(self):
+        with self._sync_lock:
+            keys, self._sync_pending = self._sync_pending, set()
+            self._sync_timer = None
+            self._last_sync = time.monotonic()
+        if keys and self.comm is not None:
+            # the state is read now, so coalesced updates only send the latest values
+            super().send_state(keys)
+
+    def get_state(self, key=None, drop_defaults=False):
+        state = super().get_state(key, drop_defaults)
+        if self.comm is None:
+            # the state the comm is opened with, counted in `open`
+            self._open_state = state
+        return state
+
+    def open(self):
+        super().open()
+        state, self._open_state = self._open_state, None
+        if state is not None and metrics.enabled:
+            state, buffer_paths, buffers = _remove_buffers(state)
+            self._record_message({'method': 'update', 'state': state, 'buffer_paths': buffer_paths}, buffers)
+
+    def _send(self, msg, buffers=None):
+        super()._send(msg, buffers)
+        if metrics.enabled and self.comm is not None:
+            self._record_message(msg, buffers or [])
+
+    def _record_message(self, msg, buffers):
+        if msg.get('method') == 'update':
+            values, buffer_paths = msg['state'], msg.get('buffer_paths', [])
+        else:
+            # custom messages, e.g. row updates, are counted for the trait they change
+            content = msg.get('content', {})
+            name = content.get('trait', msg.get('method'))
+            values, buffer_paths = {name: content}, [[name]] * len(buffers)
+        sizes = {name: len(json.dumps(value, separators=(',', ':'), default=str)) for name, value in values.items()}
+        for path, buffer in zip(buffer_paths, buffers):
+            sizes[path[0]] = sizes.get(path[0], 0) + memoryview(buffer).nbytes
+        rows = sum(_payload_rows(value) for value in values.values())
+        metrics.record_message(self, sizes, rows)
+
+    def close(self):
+        with self._sync_lock:
+            if self._sync_timer is not None:
+                self._sync_timer.cancel()
+                self._sync_timer = None
+            self._sync_pending.clear()
+        super().close()
+
+def _config_fields(config):
+    """Returns the field names in chart settings: the values of the keys ending in
+    'Accessor', interactionKeys and the keys of dataKeyNames, at any depth."""
+    fields = []
+    for key, value in config.items():
+        if key.endswith('Accessor') or key == 'interactionKeys':
+            values = value if isinstance(value, (list, tuple)) else [value]
+            fields.extend(value for value in values if isinstance(value, str))
+        elif key == 'dataKeyNames' and isinstance(value, dict):
+            fields.extend(value)
+        elif isinstance(value, dict):
+            fields.extend(_config_fields(value))
+        elif isinstance(value, (list, tuple)):
+            for item in value:
+                if isinstance(item, dict):
+                    fields.extend(_config_fields(item))
+    return fields
+
+def _row_count(value):
+    return len(value) if isinstance(value, (ColumnTable, list)) else None
+
+def _payload_rows(value):
+    # rows in a payload encoded by _data.py, or in a custom message carrying one
+    if isinstance(value, list):
+        return len(value)
+    if not isinstance(value, dict):
+        return 0
+    if 'encoding' in value:
+        return value.get('length', 0)
+    return _payload_rows(value.get('rows'))
+
+class ChartWidget(_DataWidget, widgets.DOMWidget):
+    """Base class for the chart widgets."""
 
     # Name of the widget view class in front-end
     _view_name = Unicode(view_name).tag(sync=True)
@@ -40,12 +357,376 @@ class BarChart(widgets.DOMWidget):
     # Version of the front-end module containing widget model
     _model_module_version = Unicode(__version__).tag(sync=True)
 
+    # The rows selected by clicking on the chart, set it to select rows from Python.
+    # Rows are matched on the chart's interaction keys, dates are sent as ISO strings.
+    selection = List(Dict()).tag(sync=True)
+
+    # Hover events are sent to Python at most once per `hover_interval` seconds, the
+    # events in between are sent together. Only sent when there are `on_hover` callbacks.
+    hover_interval = Float(0.1).tag(sync=True)
+    _hover_events = Bool(False).tag(sync=True)
+
+    # Only the columns named by the accessors, by the `config` and `accessibility`
+    # settings that refer to fields (e.g. tooltipLabel, dataLabel, interactionKeys)
+    # and by `extra_fields` are sent, e.g. to have more columns in the rows passed
+    # to `on_click` callbacks. Not synced.
+    extra_fields = List(Unicode())
+
+    def __init__(self, **kwargs):
+        # render times measured by the views in the browser, see metrics.RenderStats
+        self.render_stats = metrics.RenderStats()
+        self._click_handlers = EventDispatcher()
+        self._hover_handlers = EventDispatcher()
+        super().__init__(**kwargs)
+        self.on_msg(self._handle_view_msg)
+        # the columns sent change with the settings naming them
+        self.observe(self._data_option_changed, names=[
+            name for name in self._field_traits() if name not in self._data_option_traits])
+
+    @classmethod
+    def _field_traits(cls):
+        """Returns the names of the traits naming the columns read by the chart."""
+        if '_field_trait_names' not in cls.__dict__:
+            cls._field_trait_names = tuple(
+                name for name in cls.class_trait_names() if name.endswith('Accessor')
+            ) + ('config', 'accessibility', 'extra_fields')
+        return cls._field_trait_names
+
+    def _data_fields(self):
+        fields = set(self.extra_fields)
+        accessors = False
+        for name in self._field_traits():
+            value = getattr(self, name)
+            if name.endswith('Accessor'):
+                accessors = accessors or bool(value)
+                fields.add(value)
+            elif isinstance(value, dict):
+                fields.update(_config_fields(value))
+        fields.discard('')
+        # charts without accessors leave the rows as they are
+        return tuple(sorted(fields)) if accessors else None
+
+    def _conversion_options(self):
+        return super()._conversion_options() + (self._data_fields(),)
+
+    @classmethod
+    def spec(cls, **kwargs):
+        """Returns a ChartSpec holding the properties of a chart, it only becomes a
+        widget when displayed."""
+        return ChartSpec(cls, **kwargs)
+
+    def _assign_data(self, name, value):
+        previous = self._data_sources.get(name)
+        if isinstance(previous, DataSource) and previous is not value:
+            previous.unobserve(self._source_changed, names='_revision')
+        if not isinstance(value, DataSource):
+            return super()._assign_data(name, value)
+        if previous is not value:
+            value.observe(self._source_changed, names='_revision')
+        self._data_sources[name] = value
+        self._data_options[name] = self._conversion_options()
+        self._data_keys.pop(name, None)
+        source = value._data_sources.get('data')
+        if not self._transforms_active() or source is None:
+            # sent as a reference, the front-end reads the rows from the DataSource
+            return value
+        # the rows depend on this chart's settings, so they are converted here
+        return self._convert_data(self._project(name, source, value._revision))
+
+    def data_table(self, **kwargs):
+        """Returns a paged DataTable of this chart's data, sorted and filtered in the
+        kernel so the browser only holds the page shown, see table.py."""
+        from .table import DataTable
+        return DataTable(data=self, **kwargs)
+
+    def on_click(self, callback, remove=False):
+        """Registers `callback(chart, row)`, called with the row clicked on the chart.
+        The callback can be an `async` function, it then runs on the kernel's event loop.
+        `remove=True` unregisters it."""
+        self._click_handlers.register_callback(callback, remove=remove)
+
+    def on_hover(self, callback, remove=False):
+        """Registers `callback(chart, row)`, called with the row under the mouse, or
+        None when the mouse leaves the chart, see `hover_interval`. The callback can be
+        an `async` function, it then runs on the kernel's event loop. `remove=True`
+        unregisters it."""
+        self._hover_handlers.register_callback(callback, remove=remove)
+        self._hover_events = bool(self._hover_handlers.callbacks)
+
+    def _handle_view_msg(self, widget, content, buffers):
+        event = content.get('event')
+        if event == 'click':
+            self._click_handlers(self, content.get('data'))
+        elif event == 'hover':
+            # a batch of hover events sent by ChartView.flushHover, in order
+            for row in content.get('events') or []:
+                self._hover_handlers(self, row)
+        elif event == 'render_stats' and metrics.enabled:
+            # a batch of render samples sent by ChartView.flushRenderStats
+            metrics.record_render(self, content.get('samples') or [])
+
+    def _source_changed(self, change):
+        if not self._transforms_active():
+            return
+        for name, value in list(self._data_sources.items()):
+            if value is change.owner:
+                self._data_options.pop(name, None)
+        self._refresh_data()
+
+    def close(self):
+        for name, value in list(self._data_sources.items()):
+            if isinstance(value, DataSource):
+                value.unobserve(self._source_changed, names='_revision')
+                del self._data_sources[name]
+        super().close()
+
+class _RowUpdatesMixin(object):
+    """Row-level updates to `data` that only send the changed rows to the front-end,
+    so the cost of an update depends on the size of the change, not of the data.
+
+    When the chart transforms its data (e.g. downsampling) the synced rows depend on
+    all of the data, the update is then applied to the source and `data` is rebuilt.
+    When `data` is a DataSource, the update is applied to the DataSource.
+    """
+
+    def _shared_source(self):
+        source = self._data_sources.get('data')
+        return source if isinstance(source, DataSource) else None
+
+    def append_rows(self, rows):
+        """Appends rows (a DataFrame or List) to the end of `data`."""
+        if self._shared_source() is not None:
+            self._shared_source().append_rows(rows)
+        elif self.data is None:
+            self.data = rows
+        elif self._transforms_active():
+            self._rebuild_data(lambda table: table.extend(to_columns(rows)))
+        else:
+            delta = self._convert_data(self._project_rows(rows))
+            self.data.extend(delta)
+            self._send_rows('append_rows', delta)
+
+    def update_rows(self, keys, rows):
+        """Updates the rows of `data` that match `rows` (a DataFrame or List) on the
+        `keys` column(s), rows without a match are appended."""
+        keys = [keys] if isinstance(keys, str) else list(keys)
+        if self._shared_source() is not None:
+            self._shared_source().update_rows(keys, rows)
+        elif self.data is None:
+            self.data = rows
+        elif self._transforms_active():
+            self._rebuild_data(lambda table: _update_table(table, keys, to_columns(rows)))
+        else:
+            fields = self._data_fields()
+            if fields is not None and not set(keys) <= set(fields):
+                raise ValueError('The keys of update_rows must be sent to the front-end, add {} to '
+                                 'extra_fields'.format(sorted(set(keys) - set(fields))))
+            delta = self._convert_data(self._project_rows(rows))
+            if isinstance(self.data, ColumnTable):
+                _update_table(self.data, keys, delta)
+            else:
+                _update_records(self.data, keys, delta)
+            self._send_rows('update_rows', delta, keys=keys)
+
+    def trim(self, max_rows, by=None):
+        """Drops rows from the start of `data` to keep at most `max_rows` rows, or
+        the last `max_rows` rows of each value of the `by` column."""
+        if self._shared_source() is not None:
+            self._shared_source().trim(max_rows, by=by)
+            return
+        if self.data is None:
+            return
+        if by is not None:
+            self._trim_groups(max_rows, by)
+            return
+        if self._transforms_active():
+            if len(self._data_sources['data']) > max_rows:
+                self._rebuild_data(lambda table: table.drop_head(table.length - max_rows))
+            return
+        excess = len(self.data) - max_rows
+        if excess <= 0:
+            return
+        if isinstance(self.data, ColumnTable):
+            self.data.drop_head(excess)
+        else:
+            del self.data[:excess]
+        self._send_rows('trim', None, max_rows=max_rows)
+
+    def _trim_groups(self, max_rows, by):
+        if self._transforms_active():
+            table = to_columns(self._data_sources['data'])
+            keep = keep_last(table.column(by), max_rows)
+            if not keep.all():
+                self._rebuild_data(lambda table: table.keep(keep))
+            return
+        if isinstance(self.data, ColumnTable):
+            keep = keep_last(self.data.column(by), max_rows)
+            if keep.all():
+                return
+            self.data.keep(keep)
+        else:
+            keep = keep_last(list_to_numpy([row.get(by) for row in self.data]), max_rows)
+            if keep.all():
+                return
+            self.data[:] = [row for row, kept in zip(self.data, keep.tolist()) if kept]
+        self._send_rows('trim', None, max_rows=max_rows, by=by)
+
+    def stream(self, source, window=1000, interval=1.0, by=None, max_pending=2):
+        """Streams rows into `data` from `source`, an async iterator yielding rows or a
+        (possibly `async`) function returning the rows received since its last call.
+
+        It runs on the kernel's event loop: rows are buffered and sent once every
+        `interval` seconds, and only the last `window` rows of each series (the values
+        of `by`, by default the chart's seriesAccessor or groupAccessor) are kept. While
+        the front-end has more than `max_pending` updates left to apply, the rows wait
+        in the buffers. Returns the Stream, see its `stop` and `cancel` methods.
+        """
+        if by is None:
+            by = getattr(self, 'seriesAccessor', '') or getattr(self, 'groupAccessor', '') or None
+        stream = Stream(self, source, window=window, interval=interval, by=by, max_pending=max_pending)
+        self._streams.add(stream)
+        return stream.start()
+
+    def close(self):
+        for stream in list(self._streams):
+            stream.cancel()
+        super().close()
+
+    def _project_rows(self, rows):
+        fields = self._data_fields()
+        return rows if fields is None else select_columns(rows, fields)
+
+    def _rebuild_data(self, update):
+        table = ColumnTable(to_columns(self._data_sources['data']).columns)
+        update(table)
+        self.data = table
+
+    def _send_rows(self, event, rows, **content):
+        # `data` was changed in place, it is now the source for later conversions
+        self._data_sources['data'] = self.data
+        self._data_keys.pop('data', None)
+        if rows is not None:
+            content['rows'] = encode_data(rows, self)
+        content, buffer_paths, buffers = _remove_buffers(content)
+        self._rows_sent += 1
+        content.update(event=event, trait='data', buffer_paths=buffer_paths, seq=self._rows_sent)
+        self.send(content, buffers)
+        self._revision += 1
+
+def _update_table(table, keys, delta):
+    found = table.find_rows(keys, delta)
+    matched = found >= 0
+    table.assign(found[matched], delta.take(matched))
+    table.extend(delta.take(~matched))
+
+def _update_records(records, keys, delta):
+    pending = {tuple(row.get(key) for key in keys): row for row in delta}
+    # recent rows are the likeliest to change, so search from the end
+    for i in range(len(records) - 1, -1, -1):
+        if not pending:
+            break
+        key = tuple(records[i].get(key) for key in keys)
+        if key in pending:
+            records[i] = dict(records[i], **pending.pop(key))
+    records.extend(pending.values())
+
+@widgets.register
+class DataSource(_RowUpdatesMixin, _DataWidget):
+    """A dataset sent to the front-end once and shared by the charts using it as their
+    data, e.g. `source = DataSource(data=df)` then `BarChart(data=source)`. Updating
+    the source redraws every chart using it."""
+
+    # Name of the widget model class in front-end, it has no view
+    _model_name = Unicode('DataSourceModel').tag(sync=True)
+    _model_module = Unicode(_module).tag(sync=True)
+    _model_module_version = Unicode(__version__).tag(sync=True)
+
+    data = Any().tag(sync=True, **data_serialization)
+
+class _DownsampleMixin(object):
+    """Reduces each series to at most `max_points` points before syncing.
+
+    Classes using it define the `max_points` and `downsample` traits and
+    `_downsample_accessors`, the names of the traits holding the x, y and series
+    column names.
+    """
+
+    def _downsample_columns(self):
+        return tuple(getattr(self, name) for name in self._downsample_accessors)
+
+    def _conversion_options(self):
+        options = super()._conversion_options()
+        if self.max_points:
+            options += (self.max_points, self.downsample) + self._downsample_columns()
+        return options
+
+    def _transforms_active(self):
+        return bool(self.max_points) or super()._transforms_active()
+
+    def _transform_data(self, table):
+        table = super()._transform_data(table)
+        if not self.max_points:
+            return table
+        x, y, by = self._downsample_columns()
+        if x not in table.columns or y not in table.columns:
+            return table
+        by = by if by in table.columns else None
+        return table.take(downsample(table, x, y, by, self.max_points, self.downsample))
+
+class _FoldCategoriesMixin(object):
+    """Folds the categories past the `max_categories` largest into one
+    `other_label` category before syncing.
+
+    Classes using it define the `max_categories` and `other_label` traits.
+    `_fold_accessors` names the traits holding the category and value column
+    names, and `_fold_by_accessors` those holding the columns the folded rows are
+    summed per.
+    """
+
+    _fold_accessors = ('ordinalAccessor', 'valueAccessor')
+    _fold_by_accessors = ()
+
+    def _fold_columns(self):
+        column, value = (getattr(self, name) for name in self._fold_accessors)
+        return (column, value, tuple(getattr(self, name) for name in self._fold_by_accessors))
+
+    @validate('max_categories')
+    def _validate_max_categories(self, proposal):
+        if proposal.value < 0:
+            raise ValueError('max_categories must be positive, or 0 to send every category')
+        return proposal.value
+
+    def _conversion_options(self):
+        options = super()._conversion_options()
+        if self.max_categories:
+            options += (self.max_categories, self.other_label) + self._fold_columns()
+        return options
+
+    def _transforms_active(self):
+        return bool(self.max_categories) or super()._transforms_active()
+
+    def _transform_data(self, table):
+        table = super()._transform_data(table)
+        if not self.max_categories:
+            return table
+        column, value, by = self._fold_columns()
+        if column not in table.columns or value not in table.columns:
+            return table
+        by = [name for name in by if name in table.columns]
+        return fold_categories(table, column, value, self.max_categories, self.other_label, by)
+
+
+@widgets.register
+class BarChart(_RowUpdatesMixin, _FoldCategoriesMixin, ChartWidget):
+    """A bar-chart widget."""
+
+    _data_option_traits = ChartWidget._data_option_traits + (
+        'max_categories', 'other_label', 'ordinalAccessor', 'valueAccessor'
+    )
+
     # Widget specific property.
-    # Widget properties are defined as traitlets. Any property tagged with `sync=True`
-    # is automatically synced to the frontend *any* time it changes in Python.
-    # It is synced back to Python from the frontend *any* time the model is touched.
     chartType = Unicode('bar-chart').tag(sync=True)
-    data = Any().tag(sync=True, **widget_serialization)
+    data = Any().tag(sync=True, **data_serialization)
     ordinalAccessor = Unicode('label').tag(sync=True)
     valueAccessor = Unicode('value').tag(sync=True)
     groupAccessor = Unicode().tag(sync=True)
@@ -54,42 +735,24 @@ class BarChart(widgets.DOMWidget):
     accessibility = Dict().tag(sync=True, **widget_serialization)
     config = Dict().tag(sync=True, **widget_serialization)
 
-    @validate('data')
-    def _validate_data(self, proposal):
-        if isinstance(proposal.value, pd.DataFrame):
-            return proposal.value.to_dict('records')
-        elif isinstance(proposal.value, list):
-            return proposal.value
-        else:
-            raise ValueError('Expecting a DataFrame or List, got {}'.format(type(proposal.value)))
+    # Only the `max_categories` largest bars (by total valueAccessor) are sent, the
+    # rows of the other categories are summed into one `other_label` bar.
+    # 0 sends every category.
+    max_categories = Int(0)
+    other_label = Unicode('Other')
 
 @widgets.register
-class ClusteredBarChart(widgets.DOMWidget):
+class ClusteredBarChart(_FoldCategoriesMixin, ChartWidget):
     """A clustered-bar-chart widget."""
 
-    # Name of the widget view class in front-end
-    _view_name = Unicode(view_name).tag(sync=True)
-
-    # Name of the widget model class in front-end
-    _model_name = Unicode(model_name).tag(sync=True)
-
-    # Name of the front-end module containing widget view
-    _view_module = Unicode(_module).tag(sync=True)
-
-    # Name of the front-end module containing widget model
-    _model_module = Unicode(_module).tag(sync=True)
-
-    # Version of the front-end module containing widget view
-    _view_module_version = Unicode(__version__).tag(sync=True)
-    # Version of the front-end module containing widget model
-    _model_module_version = Unicode(__version__).tag(sync=True)
+    _data_option_traits = ChartWidget._data_option_traits + (
+        'max_categories', 'other_label', 'ordinalAccessor', 'valueAccessor', 'groupAccessor'
+    )
+    _fold_by_accessors = ('groupAccessor',)
 
     # Widget specific property.
-    # Widget properties are defined as traitlets. Any property tagged with `sync=True`
-    # is automatically synced to the frontend *any* time it changes in Python.
-    # It is synced back to Python from the frontend *any* time the model is touched.
     chartType = Unicode('clustered-bar-chart').tag(sync=True)
-    data = Any().tag(sync=True, **widget_serialization)
+    data = Any().tag(sync=True, **data_serialization)
     ordinalAccessor = Unicode('label').tag(sync=True)
     valueAccessor = Unicode('value').tag(sync=True)
     groupAccessor = Unicode().tag(sync=True)
@@ -98,42 +761,24 @@ class ClusteredBarChart(widgets.DOMWidget):
     accessibility = Dict().tag(sync=True, **widget_serialization)
     config = Dict().tag(sync=True, **widget_serialization)
 
-    @validate('data')
-    def _validate_data(self, proposal):
-        if isinstance(proposal.value, pd.DataFrame):
-            return proposal.value.to_dict('records')
-        elif isinstance(proposal.value, list):
-            return proposal.value
-        else:
-            raise ValueError('Expecting a DataFrame or List, got {}'.format(type(proposal.value)))
+    # Only the `max_categories` largest clusters (by total valueAccessor) are sent, the
+    # rows of the other categories are summed into one `other_label` cluster per groupAccessor.
+    # 0 sends every category.
+    max_categories = Int(0)
+    other_label = Unicode('Other')
 
 @widgets.register
-class StackedBarChart(widgets.DOMWidget):
+class StackedBarChart(_FoldCategoriesMixin, ChartWidget):
     """A stacked-bar-chart widget."""
 
-    # Name of the widget view class in front-end
-    _view_name = Unicode(view_name).tag(sync=True)
-
-    # Name of the widget model class in front-end
-    _model_name = Unicode(model_name).tag(sync=True)
-
-    # Name of the front-end module containing widget view
-    _view_module = Unicode(_module).tag(sync=True)
-
-    # Name of the front-end module containing widget model
-    _model_module = Unicode(_module).tag(sync=True)
-
-    # Version of the front-end module containing widget view
-    _view_module_version = Unicode(__version__).tag(sync=True)
-    # Version of the front-end module containing widget model
-    _model_module_version = Unicode(__version__).tag(sync=True)
+    _data_option_traits = ChartWidget._data_option_traits + (
+        'max_categories', 'other_label', 'ordinalAccessor', 'valueAccessor', 'groupAccessor'
+    )
+    _fold_by_accessors = ('groupAccessor',)
 
     # Widget specific property.
-    # Widget properties are defined as traitlets. Any property tagged with `sync=True`
-    # is automatically synced to the frontend *any* time it changes in Python.
-    # It is synced back to Python from the frontend *any* time the model is touched.
     chartType = Unicode('stacked-bar-chart').tag(sync=True)
-    data = Any().tag(sync=True, **widget_serialization)
+    data = Any().tag(sync=True, **data_serialization)
     ordinalAccessor = Unicode('label').tag(sync=True)
     valueAccessor = Unicode('value').tag(sync=True)
     groupAccessor = Unicode().tag(sync=True)
@@ -142,42 +787,24 @@ class StackedBarChart(widgets.DOMWidget):
     accessibility = Dict().tag(sync=True, **widget_serialization)
     config = Dict().tag(sync=True, **widget_serialization)
 
-    @validate('data')
-    def _validate_data(self, proposal):
-        if isinstance(proposal.value, pd.DataFrame):
-            return proposal.value.to_dict('records')
-        elif isinstance(proposal.value, list):
-            return proposal.value
-        else:
-            raise ValueError('Expecting a DataFrame or List, got {}'.format(type(proposal.value)))
+    # Only the `max_categories` largest stacks (by total valueAccessor) are sent, the
+    # rows of the other categories are summed into one `other_label` stack per groupAccessor.
+    # 0 sends every category.
+    max_categories = Int(0)
+    other_label = Unicode('Other')
 
 @widgets.register
-class LineChart(widgets.DOMWidget):
+class LineChart(_RowUpdatesMixin, _DownsampleMixin, ChartWidget):
     """A line-chart widget."""
 
-    # Name of the widget view class in front-end
-    _view_name = Unicode(view_name).tag(sync=True)
-
-    # Name of the widget model class in front-end
-    _model_name = Unicode(model_name).tag(sync=True)
-
-    # Name of the front-end module containing widget view
-    _view_module = Unicode(_module).tag(sync=True)
-
-    # Name of the front-end module containing widget model
-    _model_module = Unicode(_module).tag(sync=True)
-
-    # Version of the front-end module containing widget view
-    _view_module_version = Unicode(__version__).tag(sync=True)
-    # Version of the front-end module containing widget model
-    _model_module_version = Unicode(__version__).tag(sync=True)
+    _data_option_traits = ChartWidget._data_option_traits + (
+        'max_points', 'downsample', 'ordinalAccessor', 'valueAccessor', 'seriesAccessor'
+    )
+    _downsample_accessors = ('ordinalAccessor', 'valueAccessor', 'seriesAccessor')
 
     # Widget specific property.
-    # Widget properties are defined as traitlets. Any property tagged with `sync=True`
-    # is automatically synced to the frontend *any* time it changes in Python.
-    # It is synced back to Python from the frontend *any* time the model is touched.
     chartType = Unicode('line-chart').tag(sync=True)
-    data = Any().tag(sync=True, **widget_serialization)
+    data = Any().tag(sync=True, **data_serialization)
     ordinalAccessor = Unicode('label').tag(sync=True)
     valueAccessor = Unicode('value').tag(sync=True)
     seriesAccessor = Unicode().tag(sync=True)
@@ -186,42 +813,23 @@ class LineChart(widgets.DOMWidget):
     accessibility = Dict().tag(sync=True, **widget_serialization)
     config = Dict().tag(sync=True, **widget_serialization)
 
-    @validate('data')
-    def _validate_data(self, proposal):
-        if isinstance(proposal.value, pd.DataFrame):
-            return proposal.value.to_dict('records')
-        elif isinstance(proposal.value, list):
-            return proposal.value
-        else:
-            raise ValueError('Expecting a DataFrame or List, got {}'.format(type(proposal.value)))
+    # Maximum number of points per series sent to the front-end, 0 sends every row.
+    # 'lttb' keeps the shape and peaks of each line, 'minmax' keeps the extremes of
+    # each bucket and 'bin' keeps one point per cell of an x/y grid.
+    max_points = Int(0)
+    downsample = Enum(['lttb', 'minmax', 'bin'], default_value='lttb')
 
 @widgets.register
-class PieChart(widgets.DOMWidget):
+class PieChart(_FoldCategoriesMixin, ChartWidget):
     """A pie-chart widget."""
 
-    # Name of the widget view class in front-end
-    _view_name = Unicode(view_name).tag(sync=True)
-
-    # Name of the widget model class in front-end
-    _model_name = Unicode(model_name).tag(sync=True)
-
-    # Name of the front-end module containing widget view
-    _view_module = Unicode(_module).tag(sync=True)
-
-    # Name of the front-end module containing widget model
-    _model_module = Unicode(_module).tag(sync=True)
-
-    # Version of the front-end module containing widget view
-    _view_module_version = Unicode(__version__).tag(sync=True)
-    # Version of the front-end module containing widget model
-    _model_module_version = Unicode(__version__).tag(sync=True)
+    _data_option_traits = ChartWidget._data_option_traits + (
+        'max_categories', 'other_label', 'ordinalAccessor', 'valueAccessor'
+    )
 
     # Widget specific property.
-    # Widget properties are defined as traitlets. Any property tagged with `sync=True`
-    # is automatically synced to the frontend *any* time it changes in Python.
-    # It is synced back to Python from the frontend *any* time the model is touched.
     chartType = Unicode('pie-chart').tag(sync=True)
-    data = List().tag(sync=True, **widget_serialization)
+    data = Any().tag(sync=True, **data_serialization)
     ordinalAccessor = Unicode('label').tag(sync=True)
     valueAccessor = Unicode('value').tag(sync=True)
     mainTitle = Unicode().tag(sync=True)
@@ -229,33 +837,24 @@ class PieChart(widgets.DOMWidget):
     accessibility = Dict().tag(sync=True, **widget_serialization)
     config = Dict().tag(sync=True, **widget_serialization)
 
+    # Only the `max_categories` largest slices (by total valueAccessor) are sent, the
+    # rows of the other categories are summed into one `other_label` slice.
+    # 0 sends every category.
+    max_categories = Int(0)
+    other_label = Unicode('Other')
+
 @widgets.register
-class ScatterPlot(widgets.DOMWidget):
+class ScatterPlot(_DownsampleMixin, ChartWidget):
     """A scatter-plot widget."""
 
-    # Name of the widget view class in front-end
-    _view_name = Unicode(view_name).tag(sync=True)
-
-    # Name of the widget model class in front-end
-    _model_name = Unicode(model_name).tag(sync=True)
-
-    # Name of the front-end module containing widget view
-    _view_module = Unicode(_module).tag(sync=True)
-
-    # Name of the front-end module containing widget model
-    _model_module = Unicode(_module).tag(sync=True)
-
-    # Version of the front-end module containing widget view
-    _view_module_version = Unicode(__version__).tag(sync=True)
-    # Version of the front-end module containing widget model
-    _model_module_version = Unicode(__version__).tag(sync=True)
+    _data_option_traits = ChartWidget._data_option_traits + (
+        'max_points', 'downsample', 'xAccessor', 'yAccessor', 'groupAccessor'
+    )
+    _downsample_accessors = ('xAccessor', 'yAccessor', 'groupAccessor')
 
     # Widget specific property.
-    # Widget properties are defined as traitlets. Any property tagged with `sync=True`
-    # is automatically synced to the frontend *any* time it changes in Python.
-    # It is synced back to Python from the frontend *any* time the model is touched.
     chartType = Unicode('scatter-plot').tag(sync=True)
-    data = Any().tag(sync=True, **widget_serialization)
+    data = Any().tag(sync=True, **data_serialization)
     xAccessor = Unicode('item').tag(sync=True)
     yAccessor = Unicode('value').tag(sync=True)
     groupAccessor = Unicode('group').tag(sync=True)
@@ -264,42 +863,23 @@ class ScatterPlot(widgets.DOMWidget):
     accessibility = Dict().tag(sync=True, **widget_serialization)
     config = Dict().tag(sync=True, **widget_serialization)
 
-    @validate('data')
-    def _validate_data(self, proposal):
-        if isinstance(proposal.value, pd.DataFrame):
-            return proposal.value.to_dict('records')
-        elif isinstance(proposal.value, list):
-            return proposal.value
-        else:
-            raise ValueError('Expecting a DataFrame or List, got {}'.format(type(proposal.value)))
+    # Maximum number of points per group sent to the front-end, 0 sends every row.
+    # 'bin' keeps one point per cell of an x/y grid, 'lttb' and 'minmax' treat each
+    # group as a line ordered on x.
+    max_points = Int(0)
+    downsample = Enum(['lttb', 'minmax', 'bin'], default_value='bin')
 
 @widgets.register
-class HeatMap(widgets.DOMWidget):
+class HeatMap(ChartWidget):
     """A heat-map widget."""
 
-    # Name of the widget view class in front-end
-    _view_name = Unicode(view_name).tag(sync=True)
-
-    # Name of the widget model class in front-end
-    _model_name = Unicode(model_name).tag(sync=True)
-
-    # Name of the front-end module containing widget view
-    _view_module = Unicode(_module).tag(sync=True)
-
-    # Name of the front-end module containing widget model
-    _model_module = Unicode(_module).tag(sync=True)
-
-    # Version of the front-end module containing widget view
-    _view_module_version = Unicode(__version__).tag(sync=True)
-    # Version of the front-end module containing widget model
-    _model_module_version = Unicode(__version__).tag(sync=True)
+    _data_option_traits = ChartWidget._data_option_traits + (
+        'aggregate', 'x_freq', 'xAccessor', 'yAccessor', 'valueAccessor'
+    )
 
     # Widget specific property.
-    # Widget properties are defined as traitlets. Any property tagged with `sync=True`
-    # is automatically synced to the frontend *any* time it changes in Python.
-    # It is synced back to Python from the frontend *any* time the model is touched.
     chartType = Unicode('heat-map').tag(sync=True)
-    data = Any().tag(sync=True, **widget_serialization)
+    data = Any().tag(sync=True, **data_serialization)
     xAccessor = Unicode('date').tag(sync=True)
     yAccessor = Unicode('category').tag(sync=True)
     valueAccessor = Unicode('value').tag(sync=True)
@@ -308,42 +888,43 @@ class HeatMap(widgets.DOMWidget):
     accessibility = Dict().tag(sync=True, **widget_serialization)
     config = Dict().tag(sync=True, **widget_serialization)
 
-    @validate('data')
-    def _validate_data(self, proposal):
-        if isinstance(proposal.value, pd.DataFrame):
-            return proposal.value.to_dict('records')
-        elif isinstance(proposal.value, list):
-            return proposal.value
-        else:
-            raise ValueError('Expecting a DataFrame or List, got {}'.format(type(proposal.value)))
+    # Aggregates raw rows into one row per (xAccessor, yAccessor) cell before syncing,
+    # None expects the data to hold one row per cell already. `x_freq` (e.g. 'D',
+    # 'W', 'M' or '15min') floors the dates on the x axis to periods first.
+    aggregate = Enum(AGGREGATES, default_value=None, allow_none=True)
+    x_freq = Unicode()
+
+    @validate('x_freq')
+    def _validate_x_freq(self, proposal):
+        if proposal.value:
+            parse_freq(proposal.value)
+        return proposal.value
+
+    def _conversion_options(self):
+        options = super()._conversion_options()
+        if self.aggregate:
+            options += (self.aggregate, self.x_freq, self.xAccessor, self.yAccessor, self.valueAccessor)
+        return options
+
+    def _transforms_active(self):
+        return bool(self.aggregate) or super()._transforms_active()
+
+    def _transform_data(self, table):
+        table = super()._transform_data(table)
+        if not self.aggregate:
+            return table
+        if self.x_freq:
+            table = ColumnTable(table.columns)
+            table.columns[self.xAccessor] = floor_dates(table.column(self.xAccessor), self.x_freq)
+        return aggregate(table, [self.xAccessor, self.yAccessor], self.valueAccessor, self.aggregate)
 
 @widgets.register
-class CirclePacking(widgets.DOMWidget):
+class CirclePacking(ChartWidget):
     """A circle-packing widget."""
 
-    # Name of the widget view class in front-end
-    _view_name = Unicode(view_name).tag(sync=True)
-
-    # Name of the widget model class in front-end
-    _model_name = Unicode(model_name).tag(sync=True)
-
-    # Name of the front-end module containing widget view
-    _view_module = Unicode(_module).tag(sync=True)
-
-    # Name of the front-end module containing widget model
-    _model_module = Unicode(_module).tag(sync=True)
-
-    # Version of the front-end module containing widget view
-    _view_module_version = Unicode(__version__).tag(sync=True)
-    # Version of the front-end module containing widget model
-    _model_module_version = Unicode(__version__).tag(sync=True)
-
     # Widget specific property.
-    # Widget properties are defined as traitlets. Any property tagged with `sync=True`
-    # is automatically synced to the frontend *any* time it changes in Python.
-    # It is synced back to Python from the frontend *any* time the model is touched.
     chartType = Unicode('circle-packing').tag(sync=True)
-    data = Any().tag(sync=True, **widget_serialization)
+    data = Any().tag(sync=True, **data_serialization)
     nodeAccessor = Unicode().tag(sync=True)
     parentAccessor = Unicode().tag(sync=True)
     sizeAccessor = Unicode().tag(sync=True)
@@ -352,42 +933,59 @@ class CirclePacking(widgets.DOMWidget):
     accessibility = Dict().tag(sync=True, **widget_serialization)
     config = Dict().tag(sync=True, **widget_serialization)
 
-    @validate('data')
-    def _validate_data(self, proposal):
-        if isinstance(proposal.value, pd.DataFrame):
-            return proposal.value.to_dict('records')
-        elif isinstance(proposal.value, list):
-            return proposal.value
-        else:
-            raise ValueError('Expecting a DataFrame or List, got {}'.format(type(proposal.value)))
+    @classmethod
+    def from_groups(cls, data, levels, size=None, max_depth=None, top_n=None, min_share=0.0, root='All',
+                    other_label='Other', sep='/', **kwargs):
+        """Returns a CirclePacking of the hierarchy of the `levels` columns of `data`, e.g.
+        `['region', 'country', 'merchant']`, sized by the sum of the `size` column or by
+        the number of rows.
+
+        The tree is bounded by `max_depth` (deeper levels are rolled up into their
+        ancestor), `top_n` (the largest children of each node) and `min_share` (the
+        smallest share of its parent's size a child needs), the children left out
+        are folded into one `other_label` node per parent when there are at least
+        two of them, a single one is kept. Node IDs are the paths
+        from `root` joined with `sep`, the other arguments are chart properties.
+        """
+        table = to_columns(data)
+        return cls._from_hierarchy(
+            [table.column(name) for name in levels], table.column(size) if size else None, size,
+            max_depth, top_n, min_share, root, other_label, sep, kwargs)
+
+    @classmethod
+    def from_paths(cls, data, path, size=None, sep='/', max_depth=None, top_n=None, min_share=0.0,
+                   root='All', other_label='Other', **kwargs):
+        """Returns a CirclePacking of the hierarchy of the `sep` delimited path strings
+        in the `path` column of `data`, e.g. `'EMEA/France/Paris'`, see `from_groups`."""
+        table = to_columns(data)
+        return cls._from_hierarchy(
+            split_paths(table.column(path), sep), table.column(size) if size else None, size,
+            max_depth, top_n, min_share, root, other_label, sep, kwargs)
+
+    @classmethod
+    def _from_hierarchy(cls, levels, sizes, size, max_depth, top_n, min_share, root, other_label, sep, kwargs):
+        size = size or 'value'
+        nodes = build_hierarchy(levels, sizes, max_depth=max_depth, top_n=top_n, min_share=min_share,
+                                root=root, sep=sep, other_label=other_label, size_name=size)
+        config = dict(kwargs.pop('config', {}))
+        # the circles are labelled with the last part of their path
+        config.setdefault('dataLabel', dict(_DATA_LABEL_CENTER, labelAccessor='label'))
+        kwargs.update(nodeAccessor='id', parentAccessor='parent', sizeAccessor=size, config=config)
+        return cls(data=nodes, **kwargs)
+
+# Default dataLabel of CirclePacking, see propDefaultValues.ts in the utils package
+_DATA_LABEL_CENTER = {
+    'visible': True, 'placement': 'center', 'labelAccessor': '', 'format': '',
+    'collisionHideOnly': False, 'collisionPlacement': 'centroid',
+}
 
 @widgets.register
-class ParallelPlot(widgets.DOMWidget):
+class ParallelPlot(ChartWidget):
     """A parallel-plot widget."""
 
-    # Name of the widget view class in front-end
-    _view_name = Unicode(view_name).tag(sync=True)
-
-    # Name of the widget model class in front-end
-    _model_name = Unicode(model_name).tag(sync=True)
-
-    # Name of the front-end module containing widget view
-    _view_module = Unicode(_module).tag(sync=True)
-
-    # Name of the front-end module containing widget model
-    _model_module = Unicode(_module).tag(sync=True)
-
-    # Version of the front-end module containing widget view
-    _view_module_version = Unicode(__version__).tag(sync=True)
-    # Version of the front-end module containing widget model
-    _model_module_version = Unicode(__version__).tag(sync=True)
-
     # Widget specific property.
-    # Widget properties are defined as traitlets. Any property tagged with `sync=True`
-    # is automatically synced to the frontend *any* time it changes in Python.
-    # It is synced back to Python from the frontend *any* time the model is touched.
     chartType = Unicode('parallel-plot').tag(sync=True)
-    data = Any().tag(sync=True, **widget_serialization)
+    data = Any().tag(sync=True, **data_serialization)
     ordinalAccessor = Unicode().tag(sync=True)
     valueAccessor = Unicode().tag(sync=True)
     seriesAccessor = Unicode().tag(sync=True)
@@ -396,42 +994,13 @@ class ParallelPlot(widgets.DOMWidget):
     accessibility = Dict().tag(sync=True, **widget_serialization)
     config = Dict().tag(sync=True, **widget_serialization)
 
-    @validate('data')
-    def _validate_data(self, proposal):
-        if isinstance(proposal.value, pd.DataFrame):
-            return proposal.value.to_dict('records')
-        elif isinstance(proposal.value, list):
-            return proposal.value
-        else:
-            raise ValueError('Expecting a DataFrame or List, got {}'.format(type(proposal.value)))
-
 @widgets.register
-class DumbbellPlot(widgets.DOMWidget):
+class DumbbellPlot(ChartWidget):
     """A dumbbell-plot widget."""
 
-    # Name of the widget view class in front-end
-    _view_name = Unicode(view_name).tag(sync=True)
-
-    # Name of the widget model class in front-end
-    _model_name = Unicode(model_name).tag(sync=True)
-
-    # Name of the front-end module containing widget view
-    _view_module = Unicode(_module).tag(sync=True)
-
-    # Name of the front-end module containing widget model
-    _model_module = Unicode(_module).tag(sync=True)
-
-    # Version of the front-end module containing widget view
-    _view_module_version = Unicode(__version__).tag(sync=True)
-    # Version of the front-end module containing widget model
-    _model_module_version = Unicode(__version__).tag(sync=True)
-
     # Widget specific property.
-    # Widget properties are defined as traitlets. Any property tagged with `sync=True`
-    # is automatically synced to the frontend *any* time it changes in Python.
-    # It is synced back to Python from the frontend *any* time the model is touched.
     chartType = Unicode('dumbbell-plot').tag(sync=True)
-    data = Any().tag(sync=True, **widget_serialization)
+    data = Any().tag(sync=True, **data_serialization)
     ordinalAccessor = Unicode().tag(sync=True)
     valueAccessor = Unicode().tag(sync=True)
     seriesAccessor = Unicode().tag(sync=True)
@@ -440,42 +1009,18 @@ class DumbbellPlot(widgets.DOMWidget):
     accessibility = Dict().tag(sync=True, **widget_serialization)
     config = Dict().tag(sync=True, **widget_serialization)
 
-    @validate('data')
-    def _validate_data(self, proposal):
-        if isinstance(proposal.value, pd.DataFrame):
-            return proposal.value.to_dict('records')
-        elif isinstance(proposal.value, list):
-            return proposal.value
-        else:
-            raise ValueError('Expecting a DataFrame or List, got {}'.format(type(proposal.value)))
-
 @widgets.register
-class WorldMap(widgets.DOMWidget):
+class WorldMap(ChartWidget):
     """A world-map widget."""
 
-    # Name of the widget view class in front-end
-    _view_name = Unicode(view_name).tag(sync=True)
-
-    # Name of the widget model class in front-end
-    _model_name = Unicode(model_name).tag(sync=True)
-
-    # Name of the front-end module containing widget view
-    _view_module = Unicode(_module).tag(sync=True)
-
-    # Name of the front-end module containing widget model
-    _model_module = Unicode(_module).tag(sync=True)
-
-    # Version of the front-end module containing widget view
-    _view_module_version = Unicode(__version__).tag(sync=True)
-    # Version of the front-end module containing widget model
-    _model_module_version = Unicode(__version__).tag(sync=True)
+    _data_option_traits = ChartWidget._data_option_traits + (
+        'cluster', 'cluster_level', 'cluster_aggregate', 'extent', 'latitudeAccessor', 'longitudeAccessor',
+        'valueAccessor', 'groupAccessor', 'markerAccessor', 'markerNameAccessor'
+    )
 
     # Widget specific property.
-    # Widget properties are defined as traitlets. Any property tagged with `sync=True`
-    # is automatically synced to the frontend *any* time it changes in Python.
-    # It is synced back to Python from the frontend *any* time the model is touched.
     chartType = Unicode('world-map').tag(sync=True)
-    data = Any().tag(sync=True, **widget_serialization)
+    data = Any().tag(sync=True, **data_serialization)
     joinAccessor = Unicode().tag(sync=True)
     joinNameAccessor = Unicode().tag(sync=True)
     markerAccessor = Unicode().tag(sync=True)
@@ -489,43 +1034,161 @@ class WorldMap(widgets.DOMWidget):
     accessibility = Dict().tag(sync=True, **widget_serialization)
     config = Dict().tag(sync=True, **widget_serialization)
 
-    @validate('data')
-    def _validate_data(self, proposal):
-        if isinstance(proposal.value, pd.DataFrame):
-            return proposal.value.to_dict('records')
-        elif isinstance(proposal.value, list):
-            return proposal.value
+    # Clusters the markers before syncing, one marker per cell (and group) at the
+    # mean position of its markers, with the `cluster_aggregate` of their values and
+    # their 'count'. Cells are 'grid' cells 360 / 2**cluster_level degrees wide or
+    # 'geohash' cells of cluster_level characters. None sends every marker.
+    cluster = Enum(CLUSTER_METHODS, default_value=None, allow_none=True)
+    cluster_level = Int(4).tag(sync=True)
+    cluster_aggregate = Enum(AGGREGATES, default_value='sum')
+    # Only the markers inside [west, south, east, north] (in degrees) are sent, all
+    # of them when empty, see `set_viewport`.
+    extent = List(Float()).tag(sync=True)
+
+    def __init__(self, **kwargs):
+        # the markers, their spatial index and precomputed clusters, see `_geo_cache`
+        self._geo = None
+        self._viewport_refresh = False
+        super().__init__(**kwargs)
+
+    @validate('extent')
+    def _validate_extent(self, proposal):
+        extent = list(proposal.value)
+        if extent and len(extent) != 4:
+            raise ValueError('extent is [west, south, east, north], got {}'.format(extent))
+        return extent
+
+    @validate('cluster', 'cluster_level')
+    def _validate_cluster_level(self, proposal):
+        # checked again when the method changes, the range depends on it
+        method, level = self.cluster, self.cluster_level
+        if proposal.trait.name == 'cluster':
+            method = proposal.value
         else:
-            raise ValueError('Expecting a DataFrame or List, got {}'.format(type(proposal.value)))
+            level = proposal.value
+        # geohash codes are held in 64 bits integers
+        if not 0 <= level <= (12 if method == 'geohash' else 30):
+            raise ValueError('cluster_level out of range for {} clusters: {}'.format(method, level))
+        return proposal.value
+
+    def set_viewport(self, extent, level=None):
+        """Shows the markers inside `extent`, [west, south, east, north], clustered
+        at `level`, by default a level that gives a few dozen cells across it."""
+        if level is None and self.cluster:
+            west, south, east, north = extent
+            width = max((east - west) % 360 or 360, north - south, 1e-9)
+            level = int(np.clip(np.round(np.log2(360 / width)) + 5, 0, 30))
+            if self.cluster == 'geohash':
+                # a geohash of n characters has 2.5 * n bits per axis
+                level = int(np.clip(np.round(level / 2.5), 1, 12))
+        self.update(extent=list(extent), **({} if level is None else {'cluster_level': level}))
+
+    def precompute_clusters(self, levels):
+        """Clusters all the markers at each of `levels` and keeps the result, so
+        showing one of these levels later, e.g. for another extent, only filters the
+        kept clusters rather than clustering the markers again."""
+        source = self._data_sources.get('data')
+        revision = None
+        if isinstance(source, DataSource):
+            source, revision = source._data_sources.get('data'), source._revision
+        if source is None or not self.cluster:
+            return
+        cache = self._geo_cache(self._project('data', source, revision))
+        for level in levels:
+            cache['levels'][self._cluster_options(level)] = self._cluster_table(cache['table'], level)
+
+    def _refresh_data(self):
+        # a new viewport or level reuses the markers read when `data` was set,
+        # rather than reading and hashing all of them again
+        self._viewport_refresh = True
+        try:
+            super()._refresh_data()
+        finally:
+            self._viewport_refresh = False
+
+    def _assign_data(self, name, value):
+        if not self._viewport_refresh:
+            self._geo = None
+        return super()._assign_data(name, value)
+
+    def _geo_cache(self, value):
+        """Returns the markers of `value` as a table, with their spatial index and
+        precomputed clusters, kept until `data` is set again or its DataSource changes."""
+        source = self._data_sources.get('data')
+        revision = source._revision if isinstance(source, DataSource) else None
+        geo = self._geo
+        if geo is None or geo['source'] is not value or geo['revision'] != revision:
+            geo = self._geo = {'source': value, 'revision': revision, 'table': to_columns(value),
+                               'indexes': {}, 'levels': {}}
+        return geo
+
+    def _spatial_index(self, geo):
+        columns = (self.latitudeAccessor, self.longitudeAccessor)
+        if columns not in geo['indexes']:
+            geo['indexes'][columns] = SpatialIndex(*(geo['table'].column(name) for name in columns))
+        return geo['indexes'][columns]
+
+    def _cluster_options(self, level):
+        return (self.cluster, level, self.cluster_aggregate, self.latitudeAccessor, self.longitudeAccessor,
+                self.valueAccessor, self.groupAccessor, self.markerAccessor, self.markerNameAccessor)
+
+    def _cluster_table(self, table, level):
+        return cluster(table, self.latitudeAccessor, self.longitudeAccessor, self.cluster, level,
+                       value=self.valueAccessor or None, how=self.cluster_aggregate,
+                       by=[self.groupAccessor] if self.groupAccessor else [],
+                       marker=self.markerAccessor or None, name=self.markerNameAccessor or None)
+
+    def _conversion_options(self):
+        options = super()._conversion_options()
+        if self._transforms_active():
+            options += (tuple(self.extent),) + self._cluster_options(self.cluster_level)
+        return options
+
+    def _transforms_active(self):
+        return bool(self.cluster or self.extent) or super()._transforms_active()
+
+    def _cache_key(self, value, options):
+        if not self._transforms_active() or not is_supported(value) or isinstance(value, list):
+            return super()._cache_key(value, options)
+        geo = self._geo_cache(value)
+        if 'digest' not in geo:
+            geo['digest'] = fingerprint(geo['table'])
+        return None if geo['digest'] is None else (geo['digest'], type(self).__name__, options)
+
+    def _source_columns(self, value):
+        return self._geo_cache(value)['table']
+
+    def _transform_data(self, table):
+        table = super()._transform_data(table)
+        lat, lon = self.latitudeAccessor, self.longitudeAccessor
+        if not (self.cluster or self.extent) or lat not in table.columns or lon not in table.columns:
+            return table
+        geo = self._geo if self._geo is not None and self._geo['table'] is table else None
+        if self.cluster and geo is not None:
+            clusters = geo['levels'].get(self._cluster_options(self.cluster_level))
+            if clusters is not None:
+                return within(clusters, lat, lon, self.extent) if self.extent else clusters
+        if self.extent:
+            rows = self._spatial_index(geo).query(self.extent) if geo is not None \
+                else np.flatnonzero(inside(table.column(lat), table.column(lon), self.extent))
+            table = table.take(rows)
+        return self._cluster_table(table, self.cluster_level) if self.cluster else table
 
 @widgets.register
-class AlluvialDiagram(widgets.DOMWidget):
+class AlluvialDiagram(ChartWidget):
     """An alluvial-diagram widget."""
 
-    # Name of the widget view class in front-end
-    _view_name = Unicode(view_name).tag(sync=True)
-
-    # Name of the widget model class in front-end
-    _model_name = Unicode(model_name).tag(sync=True)
-
-    # Name of the front-end module containing widget view
-    _view_module = Unicode(_module).tag(sync=True)
-
-    # Name of the front-end module containing widget model
-    _model_module = Unicode(_module).tag(sync=True)
-
-    # Version of the front-end module containing widget view
-    _view_module_version = Unicode(__version__).tag(sync=True)
-    # Version of the front-end module containing widget model
-    _model_module_version = Unicode(__version__).tag(sync=True)
+    _data_traits = ('linkData',)
+    _data_option_traits = ChartWidget._data_option_traits + (
+        'aggregate', 'min_link_value', 'other_label', 'sourceAccessor', 'targetAccessor',
+        'valueAccessor', 'groupAccessor'
+    )
 
     # Widget specific property.
-    # Widget properties are defined as traitlets. Any property tagged with `sync=True`
-    # is automatically synced to the frontend *any* time it changes in Python.
-    # It is synced back to Python from the frontend *any* time the model is touched.
     chartType = Unicode('alluvial-diagram').tag(sync=True)
-    linkData = Any().tag(sync=True, **widget_serialization)
-    nodeData = List().tag(sync=True, **widget_serialization)
+    linkData = Any().tag(sync=True, **data_serialization)
+    # Derived from the links when not set, one row per distinct node ID
+    nodeData = Any().tag(sync=True, **data_serialization)
     sourceAccessor = Unicode().tag(sync=True)
     targetAccessor = Unicode().tag(sync=True)
     valueAccessor = Unicode().tag(sync=True)
@@ -536,12 +1199,82 @@ class AlluvialDiagram(widgets.DOMWidget):
     accessibility = Dict().tag(sync=True, **widget_serialization)
     config = Dict().tag(sync=True, **widget_serialization)
 
-    @validate('linkData')
-    def _validate_data(self, proposal):
-        if isinstance(proposal.value, pd.DataFrame):
-            return proposal.value.to_dict('records')
-        elif isinstance(proposal.value, list):
-            return proposal.value
-        else:
-            raise ValueError('Expecting a DataFrame or List, got {}'.format(type(proposal.value)))
+    # Aggregates the links into one link per source, target (and group) before
+    # syncing, e.g. 'sum' for raw flows. None sends the links as they are.
+    aggregate = Enum(AGGREGATES, default_value=None, allow_none=True)
+    # Links with a value below `min_link_value` are folded into one link per source
+    # (and group) to an `other_label` node of the stage of their targets, 0 keeps
+    # every link.
+    min_link_value = Float(0)
+    other_label = Unicode('Other')
+
+    def __init__(self, **kwargs):
+        # whether nodeData was set by the user, otherwise it is derived from the links
+        self._user_nodes = False
+        self._deriving_nodes = False
+        super().__init__(**kwargs)
+        self.observe(self._derive_nodes, names=['linkData', 'nodeData', 'sourceAccessor', 'targetAccessor',
+                                                 'nodeIDAccessor', 'transport'])
+        self._derive_nodes()
+
+    def _conversion_options(self):
+        options = super()._conversion_options()
+        if self._transforms_active():
+            options += (self.aggregate, self.min_link_value, self.other_label, self.sourceAccessor,
+                        self.targetAccessor, self.valueAccessor, self.groupAccessor)
+        return options
+
+    def _transforms_active(self):
+        return bool(self.aggregate or self.min_link_value) or super()._transforms_active()
+
+    def _transform_data(self, table):
+        table = super()._transform_data(table)
+        by = [name for name in (self.sourceAccessor, self.targetAccessor, self.groupAccessor) if name]
+        if self.aggregate:
+            table = aggregate(table, by, self.valueAccessor, self.aggregate)
+        if self.min_link_value:
+            table = fold_small(table, by, self.valueAccessor, self.min_link_value, self.sourceAccessor,
+                               self.targetAccessor, self.other_label)
+        return table
+
+    @validate('nodeData')
+    def _validate_node_data(self, proposal):
+        value = proposal.value
+        if not self._deriving_nodes:
+            self._user_nodes = value is not None and (not isinstance(value, list) or len(value) > 0)
+        if value is None or isinstance(value, DataSource):
+            return value
+        if not is_supported(value):
+            raise ValueError('Expecting a DataFrame or List, got {}'.format(type(value)))
+        return to_columns(value) if self.transport == 'columnar' else to_records(value)
+
+    def _derive_nodes(self, change=None):
+        """Sets nodeData to the distinct node IDs of the synced links, in order of
+        first appearance, unless it was set by the user."""
+        if self._deriving_nodes:
+            return
+        if change is not None and change.name == 'nodeData' and change.new is None:
+            # traitlets does not validate None, it is handled here
+            self._user_nodes = False
+        if self._user_nodes:
+            return
+        links = self.linkData.data if isinstance(self.linkData, DataSource) else self.linkData
+        nodes = []
+        if links is not None and self.sourceAccessor and self.targetAccessor:
+            table = to_columns(links)
+            ends = np.empty(2 * table.length, dtype=object)
+            # interleaved like the links are read by the component
+            ends[0::2] = table.column(self.sourceAccessor)
+            ends[1::2] = table.column(self.targetAccessor)
+            nodes = distinct(ends)
+        key = self.nodeIDAccessor or 'id'
+        self._deriving_nodes = True
+        try:
+            self.nodeData = ColumnTable({key: list_to_numpy(nodes)}) if nodes else None
+        finally:
+            self._deriving_nodes = False
+
+    def _source_changed(self, change):
+        super()._source_changed(change)
+        self._derive_nodes()
 
@@ -0,0 +1,176 @@
+# /**
+# * Copyright (c) 2024 Visa, Inc.
+# *
+# * This source code is licensed under the MIT license
+# * https://github.com/visa/visa-chart-components/blob/master/LICENSE
+# *
+# **/
+from collections.abc import Mapping
+from concurrent.futures import ProcessPoolExecutor
+import hashlib
+import html
+import json
+import os
+import re
+import shutil
+import tempfile
+from ipywidgets import Widget
+from ipywidgets.embed import dependency_state
+from .spec import ChartSpec
+
+# Bulk export of charts to standalone HTML pages, without a notebook or a network.
+#
+# Every page loads one shared bundle (js/lib/standalone.js) and a script per widget
+# model. Model scripts are named after the hash of their content, so a model that
+# is the same on many pages (a dataset, a default layout) is written once. Chart
+# data is moved into DataSource models, so charts that only differ in their titles
+# or accessors still share their data.
+
+BUNDLE_NAME = 'charts-standalone.js'
+PAYLOAD_DIR = 'data'
+
+_BUNDLE_PATH = os.path.join(os.path.dirname(__file__), 'static', BUNDLE_NAME)
+_REFERENCE = re.compile(r'IPY_MODEL_([0-9a-f]+)')
+_DATA_TRAITS = ('data', 'linkData')
+
+_page_template = '''<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="UTF-8">
+<title>{title}</title>
+<script src="{bundle}"></script>
+{payloads}
+</head>
+<body>
+<script type="application/vnd.jupyter.widget-view+json">{view}</script>
+</body>
+</html>
+'''
+
+
+def render_html(charts, out_dir, workers=None, title=None, bundle=None):
+    """Writes one HTML page per chart into `out_dir` and returns their paths.
+
+    `charts` is a list of charts or a dict of {page name: chart}, a chart being a
+    ChartSpec (e.g. `BarChart.spec(data=df)`) or a widget. Specs are converted in a
+    pool of `workers` processes (by default one per core, 1 to export in this
+    process), widgets in this process. `title` is the page title, by default the
+    page name. `bundle` is the URL of the JavaScript bundle the pages load, by
+    default the bundle shipped with pyvisacharts is copied into `out_dir`.
+    """
+    items = list(charts.items()) if isinstance(charts, Mapping) else \
+        [('chart-{:05d}'.format(i), chart) for i, chart in enumerate(charts)]
+    os.makedirs(os.path.join(out_dir, PAYLOAD_DIR), exist_ok=True)
+    if bundle is None:
+        if not os.path.exists(_BUNDLE_PATH):
+            raise FileNotFoundError(
+                '{} was not found, build the JavaScript with `yarn build` in js/'.format(_BUNDLE_PATH))
+        shutil.copyfile(_BUNDLE_PATH, os.path.join(out_dir, BUNDLE_NAME))
+        bundle = BUNDLE_NAME
+    tasks = [(name, chart, out_dir, title or name, bundle) for name, chart in items]
+    # specs are pickled to the workers, widgets are tied to this process
+    pooled = [i for i, task in enumerate(tasks) if _picklable(task[1])]
+    paths = [None] * len(tasks)
+    if workers != 1 and len(pooled) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            chunksize = max(1, len(pooled) // ((workers or os.cpu_count() or 1) * 4))
+            for i, path in zip(pooled, executor.map(_export_page, [tasks[i] for i in pooled],
+                                                    chunksize=chunksize)):
+                paths[i] = path
+    for i, task in enumerate(tasks):
+        if paths[i] is None:
+            paths[i] = _export_page(task)
+    return paths
+
+
+def _picklable(chart):
+    return isinstance(chart, ChartSpec) and \
+        not any(isinstance(value, Widget) for value in chart.properties.values())
+
+
+def _export_page(task):
+    name, chart, out_dir, title, bundle = task
+    created = isinstance(chart, ChartSpec) and chart.widget is None
+    widget = chart.to_widget() if isinstance(chart, ChartSpec) else chart
+    try:
+        root = widget.model_id
+        # with defaults, the front-end models do not share the python defaults (e.g. chartType)
+        state = _split_data(dependency_state([widget], drop_defaults=False))
+    finally:
+        if created:
+            # the widget was only needed for its state
+            chart._close_widget()
+    ids, texts = _content_ids(state)
+    payloads = []
+    for model_id in dict.fromkeys(ids.values()):
+        path = os.path.join(out_dir, PAYLOAD_DIR, model_id + '.js')
+        if not os.path.exists(path):
+            _write_atomic(path, 'vccCharts.register("{}", {});\n'.format(model_id, texts[model_id]))
+        payloads.append('<script src="{}/{}.js"></script>'.format(PAYLOAD_DIR, model_id))
+    view = json.dumps({'version_major': 2, 'version_minor': 0, 'model_id': ids[root]})
+    page = os.path.join(out_dir, name + '.html')
+    _write_atomic(page, _page_template.format(
+        title=html.escape(title),
+        bundle=html.escape(bundle),
+        payloads='\n'.join(payloads),
+        view=view,
+    ))
+    return page
+
+
+def _split_data(state):
+    """Moves the data of the chart models of an embed state into DataSource models."""
+    for model_id, model in list(state.items()):
+        if model['model_name'] != 'ChartModel':
+            continue
+        for name in _DATA_TRAITS:
+            value = model['state'].get(name)
+            if not isinstance(value, dict):
+                # a list from an older version, or a reference to a DataSource already
+                continue
+            buffers = [b for b in model.get('buffers', []) if b['path'][0] == name]
+            model['buffers'] = [b for b in model.get('buffers', []) if b['path'][0] != name]
+            source = {
+                'model_name': 'DataSourceModel',
+                'model_module': model['model_module'],
+                'model_module_version': model['model_module_version'],
+                'state': {'data': value},
+            }
+            if buffers:
+                source['buffers'] = [dict(b, path=['data'] + b['path'][1:]) for b in buffers]
+            source_id = '{}{:x}'.format(model_id, _DATA_TRAITS.index(name))
+            state[source_id] = source
+            model['state'][name] = 'IPY_MODEL_' + source_id
+        if not model.get('buffers'):
+            model.pop('buffers', None)
+    return state
+
+
+def _content_ids(state):
+    """Returns ({model id: content id}, {content id: JSON text}) for the models of an
+    embed state. References to other models are replaced by their content ids, so
+    the same model content always gets the same id."""
+    ids, texts = {}, {}
+
+    def visit(model_id):
+        if model_id not in ids:
+            text = json.dumps(state[model_id], sort_keys=True, separators=(',', ':'))
+            text = _REFERENCE.sub(
+                lambda match: 'IPY_MODEL_' + visit(match.group(1)) if match.group(1) in state else match.group(0),
+                text)
+            content_id = hashlib.sha256(text.encode()).hexdigest()[:32]
+            ids[model_id] = content_id
+            texts[content_id] = text
+        return ids[model_id]
+
+    for model_id in state:
+        visit(model_id)
+    return ids, texts
+
+
+def _write_atomic(path, text):
+    # concurrent workers may write the same payload, a rename never leaves it partial
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+    with os.fdopen(fd, 'w', encoding='utf-8') as f:
+        f.write(text)
+    os.replace(tmp, path)
@@ -0,0 +1,188 @@
+# /**
+# * Copyright (c) 2024 Visa, Inc.
+# *
+# * This source code is licensed under the MIT license
+# * https://github.com/visa/visa-chart-components/blob/master/LICENSE
+# *
+# **/
+import numpy as np
+import ipywidgets as widgets
+from ipywidgets import widget_serialization
+from traitlets import Unicode, Dict, List, Any, Bool, Int, observe, validate
+from ._aggregate import combined_codes
+from ._data import ColumnTable
+from ._version import __version__
+from .backends import to_columns
+from .spec import _check_properties
+
+# See js/lib/facets.js for the frontend counterpart to this file.
+
+_module = '@visa/charts-python'
+
+# The config settings fixing the range of an axis, per chart type and accessor,
+# set from the whole data so every facet shares the same scale
+_AXIS_OVERRIDES = {
+    'BarChart': {'valueAccessor': ('minValueOverride', 'maxValueOverride')},
+    'LineChart': {'valueAccessor': ('minValueOverride', 'maxValueOverride')},
+    'ScatterPlot': {
+        'xAccessor': ('xMinValueOverride', 'xMaxValueOverride'),
+        'yAccessor': ('yMinValueOverride', 'yMaxValueOverride'),
+    },
+}
+# the value axis of bars starts at 0
+_ZERO_BASED = ('BarChart',)
+
+
+@widgets.register
+class FacetGrid(widgets.DOMWidget):
+    """Small multiples: one chart per group of the rows of a frame, e.g.
+    `FacetGrid(LineChart, df, by='region', ordinalAccessor='date', valueAccessor='amount')`.
+
+    The rows are partitioned once and the other keyword arguments are the chart
+    properties shared by every facet. Only the charts of the facets scrolled into
+    view exist as widgets, they are created when a facet comes into view and
+    closed when it leaves.
+    """
+
+    _view_name = Unicode('FacetGridView').tag(sync=True)
+    _model_name = Unicode('FacetGridModel').tag(sync=True)
+    _view_module = Unicode(_module).tag(sync=True)
+    _model_module = Unicode(_module).tag(sync=True)
+    _view_module_version = Unicode(__version__).tag(sync=True)
+    _model_module_version = Unicode(__version__).tag(sync=True)
+
+    # The rows, a DataFrame or List, and the columns they are grouped on. Not synced.
+    data = Any()
+    by = List(Unicode())
+    # Whether the value axes of the facets share the range of the whole data,
+    # see _AXIS_OVERRIDES. An axis range set in `config` is kept. Not synced.
+    share_axis = Bool(True)
+
+    # Title of each facet, from its values of the `by` columns
+    titles = List(Unicode()).tag(sync=True)
+    # Facets per row, size of each facet and height of the scrolled area in pixels
+    columns = Int(3).tag(sync=True)
+    facet_width = Int(320).tag(sync=True)
+    facet_height = Int(240).tag(sync=True)
+    height = Int(600).tag(sync=True)
+    # Rows of facets above and below the scrolled area whose charts are created ahead
+    overscan = Int(1).tag(sync=True)
+
+    # Positions of the facets in view, set by the front-end
+    visible = List(Int()).tag(sync=True)
+    # The charts of the facets in view, by position
+    charts = Dict().tag(sync=True, **widget_serialization)
+
+    def __init__(self, chart_type, data=None, by=(), **kwargs):
+        # the live charts by position
+        self._charts = {}
+        traits = self.class_traits()
+        properties = {name: value for name, value in kwargs.items() if name not in traits}
+        _check_properties(chart_type, properties)
+        self.chart_type = chart_type
+        self.properties = properties
+        # the rows sorted by facet and where each facet starts, see `_partition`
+        self._table = ColumnTable({})
+        self._order = np.arange(0)
+        self._starts = np.zeros(1, dtype='int64')
+        self._axes = {}
+        self.facet_keys = []
+        self._ready = False
+        super().__init__(data=data, by=[by] if isinstance(by, str) else list(by),
+                         **{name: value for name, value in kwargs.items() if name in traits})
+        self._ready = True
+        self._partition()
+
+    @validate('by')
+    def _validate_by(self, proposal):
+        if not proposal.value:
+            raise ValueError('by names the columns the rows are grouped on')
+        return proposal.value
+
+    @observe('data', 'by', 'share_axis')
+    def _data_changed(self, change):
+        # partitioned once the constructor has set every trait
+        if self._ready:
+            self._partition()
+
+    @observe('visible')
+    def _visible_changed(self, change):
+        self._update_charts()
+
+    def _partition(self):
+        """Groups the rows on the `by` columns, in one pass over them."""
+        table = to_columns(self.data) if self.data is not None else ColumnTable({})
+        columns = [table.column(name) for name in self.by]
+        codes, count = combined_codes(columns)
+        self._table = table
+        # facets are numbered in sorted order of their values, the sort keeps the
+        # rows of each facet in their order
+        self._order = np.argsort(codes, kind='stable')
+        self._starts = np.r_[0, np.cumsum(np.bincount(codes, minlength=count))].astype('int64')
+        first = self._order[self._starts[:-1]]
+        self.facet_keys = list(zip(*(values[first].tolist() for values in columns))) if count else []
+        self._axes = self._shared_axes(table) if self.share_axis else {}
+        with self.hold_sync():
+            self.titles = [' / '.join(str(value) for value in key) for key in self.facet_keys]
+            for position, chart in list(self._charts.items()):
+                if position < count:
+                    chart.update(**self._facet_properties(position))
+            self._update_charts()
+
+    def _shared_axes(self, table):
+        axes = {}
+        name = self.chart_type.__name__
+        for accessor, (low, high) in _AXIS_OVERRIDES.get(name, {}).items():
+            values = table.columns.get(self._property(accessor))
+            if values is None or values.dtype.kind not in 'iuf' or not len(values):
+                continue
+            with np.errstate(invalid='ignore'):
+                low_value, high_value = np.nanmin(values), np.nanmax(values)
+            if np.isnan(low_value):
+                continue
+            if name in _ZERO_BASED:
+                low_value, high_value = min(low_value, 0), max(high_value, 0)
+            axes[low], axes[high] = float(low_value), float(high_value)
+        return axes
+
+    def _property(self, name):
+        if name in self.properties:
+            return self.properties[name]
+        return self.chart_type.class_traits()[name].default()
+
+    def facet_data(self, position):
+        """Returns the rows of the facet at `position` as a ColumnTable."""
+        return self._table.take(self._order[self._starts[position]:self._starts[position + 1]])
+
+    def _facet_properties(self, position):
+        properties = dict(self.properties, data=self.facet_data(position))
+        properties['config'] = dict(self._axes, **self.properties.get('config', {}))
+        properties.setdefault('mainTitle', self.titles[position])
+        return properties
+
+    def _update_charts(self):
+        wanted = {position for position in self.visible if 0 <= position < len(self.facet_keys)}
+        charts = {position: chart for position, chart in self._charts.items() if position in wanted}
+        released = [chart for position, chart in self._charts.items() if position not in wanted]
+        for position in sorted(wanted - set(charts)):
+            charts[position] = self.chart_type(**self._facet_properties(position))
+        self._charts = charts
+        self.charts = {str(position): chart for position, chart in sorted(charts.items())}
+        # closed once the front-end no longer refers to them
+        for chart in released:
+            chart.close()
+
+    def update(self, **properties):
+        """Sets chart properties shared by every facet, e.g. `grid.update(config=...)`."""
+        _check_properties(self.chart_type, properties)
+        self.properties.update(properties)
+        if self.share_axis and any(name.endswith('Accessor') for name in properties):
+            self._axes = self._shared_axes(self._table)
+        for position, chart in self._charts.items():
+            chart.update(**self._facet_properties(position))
+
+    def close(self):
+        charts, self._charts = self._charts, {}
+        for chart in charts.values():
+            chart.close()
+        super().close()
@@ -0,0 +1,242 @@
+# /**
+# * Copyright (c) 2024 Visa, Inc.
+# *
+# * This source code is licensed under the MIT license
+# * https://github.com/visa/visa-chart-components/blob/master/LICENSE
+# *
+# **/
+import collections
+import logging
+import math
+import threading
+import time
+import weakref
+
+# Counters of what each chart sends to the front-end, to find the charts that make
+# a dashboard slow. Every chart has its own SyncStats (`chart.sync_stats`), this
+# module keeps track of all of them and calls the registered callbacks on every
+# event, e.g. to forward them to a logging system.
+#
+#     import pyvisacharts
+#     pyvisacharts.metrics.enabled = True
+#     pyvisacharts.metrics.add_callback(lambda widget, event: log.info(event))
+#     pyvisacharts.metrics.snapshot()
+#
+# The views also time their rendering in the browser and send the samples back in
+# batches, see `RenderStats` (`chart.render_stats`) and `render_totals`.
+
+_log = logging.getLogger(__name__)
+
+# Off by default: counting the bytes of a message serializes its state a second
+# time. Set to True to record, charts count what they send from then on.
+enabled = False
+
+_widgets = weakref.WeakValueDictionary()
+_callbacks = []
+_lock = threading.Lock()
+_next_id = 0
+
+# Render samples kept per chart, the oldest are dropped first
+MAX_RENDER_SAMPLES = 1000
+_RENDER_TIMES = ('decode', 'draw', 'total')
+
+
+class SyncStats(object):
+    """Counters of the data conversions and messages of one widget."""
+
+    def __init__(self):
+        self.messages = 0
+        self.bytes = 0
+        # bytes sent per trait, including the binary buffers
+        self.bytes_by_trait = {}
+        self.conversions = 0
+        self.conversion_time = 0.0
+        self.last_conversion_time = 0.0
+        # rows in each data trait, and rows sent since the widget was created
+        self.rows = {}
+        self.rows_synced = 0
+        # time.time() of the last message, None before the first one
+        self.last_sync = None
+
+    def as_dict(self):
+        """Returns the counters as a dict."""
+        return {
+            'messages': self.messages,
+            'bytes': self.bytes,
+            'bytes_by_trait': dict(self.bytes_by_trait),
+            'conversions': self.conversions,
+            'conversion_time': self.conversion_time,
+            'last_conversion_time': self.last_conversion_time,
+            'rows': dict(self.rows),
+            'rows_synced': self.rows_synced,
+            'last_sync': self.last_sync,
+        }
+
+    def __repr__(self):
+        return 'SyncStats(messages={}, bytes={}, conversions={}, conversion_time={:.3f}s, rows_synced={})'.format(
+            self.messages, self.bytes, self.conversions, self.conversion_time, self.rows_synced)
+
+
+class RenderStats(object):
+    """Render times measured in the browser by the views of one chart.
+
+    Each sample is a dict with the 'kind' of redraw ('render' for a new view, 'data'
+    for new data, 'rows' for a row update and 'update' for other properties), the
+    number of 'rows' drawn and its times in seconds: 'decode' to rebuild the rows
+    from the message, 'draw' for the chart component to draw them and 'total' from
+    the message's receipt to the end of the draw.
+    """
+
+    def __init__(self):
+        self.renders = 0
+        self.samples = collections.deque(maxlen=MAX_RENDER_SAMPLES)
+
+    def add(self, samples):
+        self.renders += len(samples)
+        self.samples.extend(samples)
+
+    def as_dict(self):
+        """Returns the number of renders and the mean, 95th percentile and maximum
+        of each time over the samples kept."""
+        return _summarize(self.samples, self.renders)
+
+    def __repr__(self):
+        summary = self.as_dict()
+        return 'RenderStats(renders={}, total_mean={:.3f}s, total_p95={:.3f}s, max_rows={})'.format(
+            self.renders, summary['total_mean'], summary['total_p95'], summary['max_rows'])
+
+
+def _summarize(samples, renders):
+    summary = {'renders': renders, 'samples': len(samples),
+               'max_rows': max((sample['rows'] for sample in samples), default=0)}
+    for name in _RENDER_TIMES:
+        times = sorted(sample[name] for sample in samples)
+        summary[name + '_mean'] = sum(times) / len(times) if times else 0.0
+        summary[name + '_p95'] = times[int(math.ceil(0.95 * len(times))) - 1] if times else 0.0
+        summary[name + '_max'] = times[-1] if times else 0.0
+    return summary
+
+
+def _render_sample(sample):
+    # samples come from the browser, only the known fields are kept, times in seconds
+    times = {name: max(float(sample.get(name) or 0), 0.0) / 1000 for name in _RENDER_TIMES}
+    return dict(times, kind=str(sample.get('kind', 'update')), rows=int(sample.get('rows') or 0))
+
+
+def register(widget):
+    """Returns a new SyncStats for `widget` and tracks it until the widget is deleted."""
+    global _next_id
+    with _lock:
+        _widgets[_next_id] = widget
+        _next_id += 1
+    return SyncStats()
+
+
+def add_callback(callback):
+    """Calls `callback(widget, event)` on every conversion, message and batch of
+    render samples of a chart, `event` is a dict with a 'kind' ('conversion',
+    'message' or 'render') and its counters."""
+    _callbacks.append(callback)
+
+
+def remove_callback(callback):
+    _callbacks.remove(callback)
+
+
+def record_conversion(widget, trait, seconds, rows):
+    stats = widget.sync_stats
+    stats.conversions += 1
+    stats.conversion_time += seconds
+    stats.last_conversion_time = seconds
+    if rows is not None:
+        stats.rows[trait] = rows
+    if _callbacks:
+        _notify(widget, {'kind': 'conversion', 'trait': trait, 'seconds': seconds, 'rows': rows})
+
+
+def record_message(widget, bytes_by_trait, rows):
+    stats = widget.sync_stats
+    size = sum(bytes_by_trait.values())
+    stats.messages += 1
+    stats.bytes += size
+    for trait, count in bytes_by_trait.items():
+        stats.bytes_by_trait[trait] = stats.bytes_by_trait.get(trait, 0) + count
+    stats.rows_synced += rows
+    stats.last_sync = time.time()
+    if _callbacks:
+        _notify(widget, {'kind': 'message', 'bytes': size, 'bytes_by_trait': bytes_by_trait, 'rows': rows})
+
+
+def record_render(widget, samples):
+    try:
+        samples = [_render_sample(sample) for sample in samples]
+    except (AttributeError, TypeError, ValueError):
+        _log.warning('pyvisacharts ignored malformed render samples from %s', type(widget).__name__)
+        return
+    widget.render_stats.add(samples)
+    if _callbacks:
+        _notify(widget, {'kind': 'render', 'samples': samples})
+
+
+def _notify(widget, event):
+    event.update(widget=type(widget).__name__, model_id=widget.model_id if widget.comm else None)
+    for callback in list(_callbacks):
+        try:
+            callback(widget, event)
+        except Exception:
+            # a broken callback must not break the charts
+            _log.exception('pyvisacharts metrics callback failed')
+
+
+def widgets():
+    """Returns the widgets being tracked."""
+    return [widget for widget in list(_widgets.values()) if widget.comm is not None]
+
+
+def snapshot():
+    """Returns the counters of every open widget as a list of dicts."""
+    return [
+        dict(widget.sync_stats.as_dict(), widget=type(widget).__name__, model_id=widget.model_id)
+        for widget in widgets()
+    ]
+
+
+def totals():
+    """Returns the counters summed over every open widget."""
+    result = SyncStats()
+    for widget in widgets():
+        stats = widget.sync_stats
+        result.messages += stats.messages
+        result.bytes += stats.bytes
+        for trait, count in stats.bytes_by_trait.items():
+            result.bytes_by_trait[trait] = result.bytes_by_trait.get(trait, 0) + count
+        result.conversions += stats.conversions
+        result.conversion_time += stats.conversion_time
+        result.rows_synced += stats.rows_synced
+        if stats.last_sync is not None:
+            result.last_sync = max(result.last_sync or 0, stats.last_sync)
+    return result.as_dict()
+
+
+def render_totals(by_rows=None):
+    """Returns the render times of the open charts summarized per chart type, or per
+    chart type and number of rows rounded up to a multiple of `by_rows`."""
+    groups = collections.defaultdict(list)
+    for widget in widgets():
+        stats = getattr(widget, 'render_stats', None)
+        if stats is None:
+            continue
+        for sample in stats.samples:
+            key = type(widget).__name__
+            if by_rows:
+                key = (key, int(math.ceil(sample['rows'] / float(by_rows))) * by_rows)
+            groups[key].append(sample)
+    return {key: _summarize(samples, len(samples)) for key, samples in sorted(groups.items())}
+
+
+def reset():
+    """Resets the counters of every widget."""
+    for widget in list(_widgets.values()):
+        widget.sync_stats.__init__()
+        if hasattr(widget, 'render_stats'):
+            widget.render_stats.__init__()
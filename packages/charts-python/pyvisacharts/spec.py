@@ -0,0 +1,103 @@
+# /**
+# * Copyright (c) 2024 Visa, Inc.
+# *
+# * This source code is licensed under the MIT license
+# * https://github.com/visa/visa-chart-components/blob/master/LICENSE
+# *
+# **/
+from ipywidgets.embed import dependency_state, embed_snippet
+
+# Charts that are only turned into widgets when displayed. Creating a widget opens
+# a comm and sends its state to the front-end straight away, a spec only holds its
+# properties, so it is cheap to create in bulk and can be pickled, e.g. to build
+# charts in worker processes.
+
+
+class ChartSpec(object):
+    """The properties of a chart, e.g. `ChartSpec(BarChart, data=df, valueAccessor='amount')`
+    or `BarChart.spec(data=df, valueAccessor='amount')`. Displaying it creates the widget.
+    """
+
+    def __init__(self, chart_type, **properties):
+        _check_properties(chart_type, properties)
+        self.__dict__.update(chart_type=chart_type, properties=properties, _widget=None)
+
+    def __getattr__(self, name):
+        # only called for names that are not attributes of the spec itself
+        properties = self.__dict__.get('properties', {})
+        if name in properties:
+            return properties[name]
+        traits = self.__dict__['chart_type'].class_traits() if 'chart_type' in self.__dict__ else {}
+        if name in traits:
+            return traits[name].default()
+        raise AttributeError('{} has no property {!r}'.format(self._type_name(), name))
+
+    def __setattr__(self, name, value):
+        self.update(**{name: value})
+
+    def __getstate__(self):
+        # the widget is tied to this kernel, a copy creates its own when displayed
+        return {'chart_type': self.chart_type, 'properties': self.properties, '_widget': None}
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+
+    def __repr__(self):
+        return '{}.spec({})'.format(self._type_name(), ', '.join(sorted(self.properties)))
+
+    def _type_name(self):
+        return self.__dict__['chart_type'].__name__
+
+    def update(self, **properties):
+        """Sets several properties at once, they are applied to the widget if it exists."""
+        _check_properties(self.chart_type, properties)
+        self.properties.update(properties)
+        if self._widget is not None:
+            self._widget.update(**properties)
+
+    @property
+    def widget(self):
+        """The widget if the spec was displayed, None otherwise."""
+        return self._widget
+
+    def to_widget(self):
+        """Returns the widget for this spec, it is created on first use."""
+        if self._widget is None:
+            self.__dict__['_widget'] = self.chart_type(**self.properties)
+        return self._widget
+
+    def to_html(self, **kwargs):
+        """Returns an HTML snippet embedding the chart with its state, e.g. for static
+        reports. Keyword arguments are passed to `ipywidgets.embed.embed_snippet`."""
+        created = self._widget is None
+        widget = self.to_widget()
+        try:
+            # with defaults, the front-end models do not share the python defaults (e.g. chartType)
+            kwargs.setdefault('drop_defaults', False)
+            kwargs.setdefault('state', dependency_state([widget], drop_defaults=kwargs['drop_defaults']))
+            return embed_snippet(views=[widget], **kwargs)
+        finally:
+            if created:
+                # only needed for its state, so the comm is closed straight away
+                self._close_widget()
+
+    def _close_widget(self):
+        if self._widget is not None:
+            self._widget.layout.close()
+            self._widget.close()
+            self.__dict__['_widget'] = None
+
+    def _repr_mimebundle_(self, **kwargs):
+        widget = self.to_widget()
+        if hasattr(widget, '_repr_mimebundle_'):
+            return widget._repr_mimebundle_(**kwargs)
+        # ipywidgets 7
+        widget._ipython_display_(**kwargs)
+        return {}
+
+
+def _check_properties(chart_type, properties):
+    traits = chart_type.class_traits()
+    for name in properties:
+        if name not in traits:
+            raise AttributeError('{} has no property {!r}'.format(chart_type.__name__, name))
@@ -0,0 +1,223 @@
+# /**
+# * Copyright (c) 2024 Visa, Inc.
+# *
+# * This source code is licensed under the MIT license
+# * https://github.com/visa/visa-chart-components/blob/master/LICENSE
+# *
+# **/
+import re
+import numpy as np
+import ipywidgets as widgets
+from ipywidgets.widgets.widget import _remove_buffers
+from traitlets import Unicode, Dict, List, Any, Bool, Int, observe
+from ._data import ColumnTable, column_type, encode_data
+from ._version import __version__
+from .backends import to_columns
+from .charts import _DataWidget
+
+# See js/lib/table.js for the frontend counterpart to this file.
+
+_module = '@visa/charts-python'
+
+# A comparison in a filter, e.g. '>= 10', otherwise a filter matches the values
+# containing its text
+_COMPARISON = re.compile(r'^\s*(<=|>=|!=|<|>|=)\s*(.+?)\s*$')
+
+
+@widgets.register
+class DataTable(widgets.DOMWidget):
+    """A paged table of the rows of a frame, a DataSource or a chart's data.
+
+    The rows stay in the kernel, sorted and filtered there, and the browser only
+    receives the page it shows, e.g. `DataTable(data=df, page_size=50)` or
+    `chart.data_table()`.
+    """
+
+    _view_name = Unicode('DataTableView').tag(sync=True)
+    _model_name = Unicode('DataTableModel').tag(sync=True)
+    _view_module = Unicode(_module).tag(sync=True)
+    _model_module = Unicode(_module).tag(sync=True)
+    _view_module_version = Unicode(__version__).tag(sync=True)
+    _model_module_version = Unicode(__version__).tag(sync=True)
+
+    # The rows, a DataFrame or List, a DataSource or a chart. Not synced, the
+    # pages are sent on request.
+    data = Any()
+    # Columns shown, all of them when empty, and the header of each column
+    columns = List(Unicode()).tag(sync=True)
+    column_names = Dict().tag(sync=True)
+
+    page_size = Int(25).tag(sync=True)
+    page = Int(0).tag(sync=True)
+    sort_by = Unicode().tag(sync=True)
+    ascending = Bool(True).tag(sync=True)
+    # Text filter of each column: the values containing the text (ignoring case),
+    # or a comparison such as '> 10', '<= 2024-01-31' or '!= CA'
+    filters = Dict(Unicode()).tag(sync=True)
+
+    # Number of rows matching the filters, and in the data
+    row_count = Int(0).tag(sync=True)
+    total_rows = Int(0).tag(sync=True)
+
+    def __init__(self, **kwargs):
+        self._table = ColumnTable({})
+        # positions of the rows matching the filters, in sort order
+        self._index = np.arange(0)
+        self._observed = None
+        super().__init__(**kwargs)
+        self.on_msg(self._handle_view_msg)
+        if self._observed is None:
+            self.refresh()
+
+    @observe('data')
+    def _data_changed(self, change):
+        self._observe_source(change.new)
+        self.refresh()
+
+    def _observe_source(self, value):
+        # charts and DataSources are followed, along with the DataSource a chart
+        # reads, and the table is refreshed when their data changes
+        for widget in self._observed or []:
+            widget.unobserve(self._source_changed, names='_revision')
+        self._observed = []
+        while isinstance(value, _DataWidget):
+            value.observe(self._source_changed, names='_revision')
+            self._observed.append(value)
+            value = value._data_sources.get('data')
+
+    def _source_changed(self, change):
+        self._observe_source(self.data)
+        self.refresh()
+
+    def refresh(self):
+        """Reads the data again, e.g. after changing a DataFrame in place."""
+        self._table = _source_table(self.data)
+        self.total_rows = self._table.length
+        self._update_index()
+
+    @observe('sort_by', 'ascending', 'filters')
+    def _query_changed(self, change):
+        # a new order or filter starts from the first page
+        self._update_index(page=0)
+
+    @observe('page', 'page_size')
+    def _page_changed(self, change):
+        self.send_page()
+
+    def _update_index(self, page=None):
+        table = self._table
+        mask = np.ones(table.length, dtype=bool)
+        for name, text in self.filters.items():
+            if text and name in table.columns:
+                mask &= _filter_mask(table.columns[name], text)
+        index = np.flatnonzero(mask)
+        if self.sort_by in table.columns:
+            index = index[_sort_order(table.columns[self.sort_by][index], self.ascending)]
+        self._index = index
+        self.row_count = len(index)
+        pages = max((len(index) - 1) // max(self.page_size, 1) + 1, 1)
+        page = min(self.page if page is None else page, pages - 1)
+        if page != self.page:
+            # the page is sent by _page_changed
+            self.page = page
+        else:
+            self.send_page()
+
+    def _columns(self):
+        return list(self.columns) or list(self._table.columns)
+
+    def get_page(self, page=None):
+        """Returns the rows of a page (the current one by default) as a ColumnTable."""
+        page = self.page if page is None else page
+        size = max(self.page_size, 1)
+        columns = [name for name in self._columns() if name in self._table.columns]
+        table = ColumnTable((name, self._table.columns[name]) for name in columns)
+        return table.take(self._index[page * size:(page + 1) * size])
+
+    def send_page(self):
+        """Sends the current page to the front-end."""
+        if self.comm is None:
+            return
+        rows = self.get_page()
+        content = {'rows': encode_data(rows.to_records(), self)}
+        content, buffer_paths, buffers = _remove_buffers(content)
+        content.update(event='page', page=self.page, columns=self._columns(), buffer_paths=buffer_paths)
+        self.send(content, buffers)
+
+    def _handle_view_msg(self, widget, content, buffers):
+        # sent by DataTableView when it is rendered
+        if content.get('event') == 'get_page':
+            self.send_page()
+
+    def close(self):
+        self._observe_source(None)
+        super().close()
+
+
+def _source_table(value):
+    while isinstance(value, _DataWidget):
+        value = value._data_sources.get('data')
+    if value is None:
+        return ColumnTable({})
+    return to_columns(value)
+
+
+def _missing(values):
+    if values.dtype.kind == 'M':
+        return np.isnat(values)
+    if values.dtype.kind in 'fO':
+        return np.asarray(values != values, dtype=bool) | np.asarray(values == None, dtype=bool)  # noqa: E711
+    return np.zeros(len(values), dtype=bool)
+
+
+def _sort_order(values, ascending):
+    """Returns the stable sort order of a column, missing values last."""
+    missing = _missing(values)
+    present = np.flatnonzero(~missing)
+    keys = values[present]
+    if not ascending:
+        # sorting the reversed keys, then reversing the order, keeps ties in order
+        keys = keys[::-1]
+    try:
+        order = np.argsort(keys, kind='stable')
+    except TypeError:
+        # mixed types are sorted as text
+        order = np.argsort(keys.astype(str), kind='stable')
+    if not ascending:
+        order = len(keys) - 1 - order[::-1]
+    return np.concatenate([present[order], np.flatnonzero(missing)])
+
+
+def _filter_mask(values, text):
+    """Returns the rows of a column matching a filter, see DataTable.filters."""
+    comparison = _COMPARISON.match(text)
+    kind = column_type(values)
+    if comparison and kind in ('number', 'date'):
+        operator, operand = comparison.groups()
+        try:
+            operand = float(operand) if kind == 'number' else np.datetime64(operand)
+            if kind == 'date' and values.dtype.kind != 'M':
+                values = values.astype('datetime64[ms]')
+        except ValueError:
+            return np.zeros(len(values), dtype=bool)
+        return _compare(values, operator, operand) & ~_missing(values)
+    if comparison and comparison.group(1) in ('=', '!='):
+        equal = np.asarray(values.astype(str) == comparison.group(2), dtype=bool)
+        return equal if comparison.group(1) == '=' else ~equal
+    strings = np.char.lower(values.astype(str))
+    return (np.char.find(strings, text.strip().lower()) >= 0) & ~_missing(values)
+
+
+def _compare(values, operator, operand):
+    with np.errstate(invalid='ignore'):
+        if operator == '<':
+            return values < operand
+        if operator == '<=':
+            return values <= operand
+        if operator == '>':
+            return values > operand
+        if operator == '>=':
+            return values >= operand
+        if operator == '=':
+            return values == operand
+        return values != operand
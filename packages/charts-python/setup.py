@@ -39,6 +39,7 @@ js_dir = pjoin(here, 'js')
 jstargets = [
     pjoin('pyvisacharts', 'nbextension', 'index.js'),
     pjoin('pyvisacharts', 'labextension', 'package.json'),
+    pjoin('pyvisacharts', 'static', 'charts-standalone.js'),
 ]
 
 data_files_spec = [
@@ -74,7 +75,13 @@ setup_args = dict(
     include_package_data=True,
     install_requires=[
         'ipywidgets>=7.6.0',
+        'numpy>=1.17',
     ],
+    extras_require={
+        'pandas': ['pandas>=1.4.2'],
+        'polars': ['polars>=0.19'],
+        'pyarrow': ['pyarrow>=8.0'],
+    },
     packages=find_packages(),
     zip_safe=False,
     cmdclass=cmdclass,
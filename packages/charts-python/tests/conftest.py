@@ -0,0 +1,26 @@
+# /**
+# * Copyright (c) 2024 Visa, Inc.
+# *
+# * This source code is licensed under the MIT license
+# * https://github.com/visa/visa-chart-components/blob/master/LICENSE
+# *
+# **/
+import comm
+from comm.base_comm import BaseComm
+import pytest
+
+
+class RecordingComm(BaseComm):
+    """A comm that keeps the messages a widget sends, so widgets work without a kernel."""
+
+    def __init__(self, **kwargs):
+        self.messages = []
+        super().__init__(**kwargs)
+
+    def publish_msg(self, msg_type, data=None, metadata=None, buffers=None, **keys):
+        self.messages.append((msg_type, data, buffers))
+
+
+@pytest.fixture(autouse=True)
+def recording_comm(monkeypatch):
+    monkeypatch.setattr(comm, 'create_comm', RecordingComm)
@@ -0,0 +1,73 @@
+# /**
+# * Copyright (c) 2024 Visa, Inc.
+# *
+# * This source code is licensed under the MIT license
+# * https://github.com/visa/visa-chart-components/blob/master/LICENSE
+# *
+# **/
+import numpy as np
+import pytest
+import pyvisacharts as vcc
+from pyvisacharts._aggregate import link_stages
+
+LINKS = [
+    {'source': 'A', 'target': 'X', 'value': 10},
+    {'source': 'A', 'target': 'Y', 'value': 1},
+    {'source': 'B', 'target': 'Z', 'value': 1},
+    {'source': 'X', 'target': 'P', 'value': 8},
+    {'source': 'X', 'target': 'Q', 'value': 1},
+    {'source': 'X', 'target': 'R', 'value': 1},
+]
+
+
+def _alluvial(links, **kwargs):
+    return vcc.AlluvialDiagram(linkData=links, sourceAccessor='source', targetAccessor='target',
+                               valueAccessor='value', **kwargs)
+
+
+def test_link_stages():
+    sources = np.array(['A', 'B', 'X', 'Y'], dtype=object)
+    targets = np.array(['X', 'X', 'Y', 'Z'], dtype=object)
+    assert link_stages(sources, targets).tolist() == [1, 1, 2, 3]
+
+
+def test_small_links_are_folded_per_stage():
+    diagram = _alluvial(LINKS, min_link_value=2)
+    assert [(link['source'], link['target'], link['value']) for link in diagram.linkData] == [
+        ('A', 'X', 10), ('X', 'P', 8), ('A', 'Other 2', 1), ('B', 'Other 2', 1), ('X', 'Other 3', 2)]
+    assert [node['id'] for node in diagram.nodeData] == ['A', 'X', 'P', 'Other 2', 'B', 'Other 3']
+
+
+def test_small_links_of_one_stage_keep_the_label():
+    diagram = _alluvial(LINKS[:3], min_link_value=2)
+    assert [link['target'] for link in diagram.linkData] == ['X', 'Other', 'Other']
+
+
+def test_folded_label_cannot_be_a_node():
+    with pytest.raises(ValueError):
+        _alluvial(LINKS[:3] + [{'source': 'Other', 'target': 'X', 'value': 5}], min_link_value=2)
+
+
+def test_links_are_aggregated():
+    links = [
+        {'source': 'A', 'target': 'X', 'value': 1, 'group': 'p'},
+        {'source': 'A', 'target': 'X', 'value': 2, 'group': 'p'},
+        {'source': 'B', 'target': 'X', 'value': 4, 'group': 'p'},
+        {'source': 'A', 'target': 'X', 'value': 8, 'group': 'q'},
+    ]
+    diagram = _alluvial(links, aggregate='sum')
+    assert [(link['source'], link['target'], link['value']) for link in diagram.linkData] == [
+        ('A', 'X', 11), ('B', 'X', 4)]
+    diagram.groupAccessor = 'group'
+    assert [(link['source'], link['group'], link['value']) for link in diagram.linkData] == [
+        ('A', 'p', 3), ('A', 'q', 8), ('B', 'p', 4)]
+
+
+def test_node_data_is_derived_unless_set():
+    diagram = _alluvial(LINKS)
+    assert [node['id'] for node in diagram.nodeData] == ['A', 'X', 'Y', 'B', 'Z', 'P', 'Q', 'R']
+    diagram.nodeData = [{'id': 'A'}]
+    diagram.linkData = LINKS[:1]
+    assert list(diagram.nodeData) == [{'id': 'A'}]
+    diagram.nodeData = None
+    assert [node['id'] for node in diagram.nodeData] == ['A', 'X']
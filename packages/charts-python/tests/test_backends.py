@@ -0,0 +1,36 @@
+# /**
+# * Copyright (c) 2024 Visa, Inc.
+# *
+# * This source code is licensed under the MIT license
+# * https://github.com/visa/visa-chart-components/blob/master/LICENSE
+# *
+# **/
+import pandas as pd
+import pytest
+import pyvisacharts as vcc
+from pyvisacharts.backends import to_columns
+
+
+def _frame():
+    return pd.DataFrame({
+        'label': pd.array(['a', pd.NA, 'c'], dtype='string'),
+        'flag': pd.array([True, pd.NA, False], dtype='boolean'),
+        'value': pd.array([1, pd.NA, 3], dtype='Int64'),
+        'kind': pd.Categorical(['x', None, 'x']),
+    })
+
+
+def test_extension_columns_with_missing_values():
+    columns = to_columns(_frame()).columns
+    assert columns['label'].tolist() == ['a', None, 'c']
+    assert columns['flag'].tolist() == [True, None, False]
+    assert columns['kind'].tolist() == ['x', None, 'x']
+    assert to_columns(pd.DataFrame({'flag': pd.array([True, False], dtype='boolean')})).columns['flag'].dtype == bool
+
+
+@pytest.mark.parametrize('transport', ['records', 'columnar'])
+def test_charts_accept_extension_columns(transport):
+    chart = vcc.BarChart(data=_frame(), transport=transport, extra_fields=['flag', 'kind'])
+    chart.get_state()
+    if transport == 'records':
+        assert chart.data[1] == {'label': None, 'flag': None, 'value': None, 'kind': None}
@@ -0,0 +1,18 @@
+# /**
+# * Copyright (c) 2024 Visa, Inc.
+# *
+# * This source code is licensed under the MIT license
+# * https://github.com/visa/visa-chart-components/blob/master/LICENSE
+# *
+# **/
+import pyvisacharts as vcc
+
+
+def test_categories_are_folded_per_group():
+    rows = [{'label': label, 'value': value, 'group': group}
+            for group in 'xy' for label, value in zip('abcd', [4, 3, 2, 1])]
+    chart = vcc.ClusteredBarChart(data=rows, groupAccessor='group', max_categories=2)
+    assert [(row['group'], row['label'], row['value']) for row in chart.data] == [
+        ('x', 'a', 4), ('y', 'a', 4), ('x', 'Other', 6), ('y', 'Other', 6)]
+    chart = vcc.BarChart(data=rows, max_categories=2)
+    assert [(row['label'], row['value']) for row in chart.data] == [('a', 4), ('a', 4), ('Other', 12)]
@@ -0,0 +1,79 @@
+# /**
+# * Copyright (c) 2024 Visa, Inc.
+# *
+# * This source code is licensed under the MIT license
+# * https://github.com/visa/visa-chart-components/blob/master/LICENSE
+# *
+# **/
+import numpy as np
+import pyvisacharts as vcc
+from pyvisacharts._data import ColumnTable
+
+
+def _table(keys, values):
+    return ColumnTable({'key': np.array(keys), 'value': np.array(values)})
+
+
+def _brute_force(table, keys, other):
+    found = []
+    for i in range(other.length):
+        mask = np.ones(table.length, dtype=bool)
+        for key in keys:
+            mask &= table.column(key) == other.column(key)[i]
+        matches = np.flatnonzero(mask)
+        found.append(matches[-1] if len(matches) else -1)
+    return found
+
+
+def test_extend_writes_into_spare_capacity():
+    table = _table([0, 1], [0.5, 1.5])
+    table.extend(_table([2], [2.5]))
+    first = table.columns['value']
+    table.extend(_table([3, 4], [3.5, 4.5]))
+    # the rows already there are not copied again
+    assert np.shares_memory(first, table.columns['value'])
+    assert table.columns['key'].tolist() == [0, 1, 2, 3, 4]
+    assert table.columns['value'].tolist() == [0.5, 1.5, 2.5, 3.5, 4.5]
+
+
+def test_extend_changes_dtypes_and_adds_columns():
+    table = _table([0, 1], [1, 2])
+    table.drop_head(1)
+    table.extend(ColumnTable({'key': np.array([2]), 'value': np.array([2.5]), 'label': np.array(['c'])}))
+    assert table.length == 2
+    assert table.columns['value'].dtype == 'float64'
+    assert table.columns['value'].tolist() == [2.0, 2.5]
+    assert table.columns['label'].tolist() == [None, 'c']
+
+
+def test_find_rows_matches_brute_force():
+    rng = np.random.default_rng(0)
+    table = _table(rng.integers(0, 20, 50), rng.uniform(size=50))
+    other = _table(np.arange(-2, 25), np.zeros(27))
+    for step in range(5):
+        assert table.find_rows(['key'], other).tolist() == _brute_force(table, ['key'], other)
+        table.extend(_table(rng.integers(0, 25, 10), rng.uniform(size=10)))
+        table.drop_head(15)
+        table.assign(np.array([0, 3]), _table([7, 30 + step], [1.0, 2.0]))
+
+
+def test_find_rows_on_several_keys():
+    table = ColumnTable({
+        'date': np.array(['2024-01-01', '2024-01-02', '2024-01-01'], dtype='datetime64[D]'),
+        'region': np.array(['a', 'a', 'b'], dtype=object),
+    })
+    other = ColumnTable({
+        'date': np.array(['2024-01-01', '2024-01-01', '2024-01-03'], dtype='datetime64[ns]'),
+        'region': np.array(['b', 'a', 'a'], dtype=object),
+    })
+    assert table.find_rows(['date', 'region'], other).tolist() == [2, 0, -1]
+
+
+def test_update_rows_of_a_columnar_chart():
+    chart = vcc.LineChart(data=[{'x': 1, 'y': 1.0}, {'x': 2, 'y': 2.0}], ordinalAccessor='x', valueAccessor='y',
+                          transport='columnar')
+    chart.append_rows([{'x': 3, 'y': 3.0}])
+    chart.update_rows('x', [{'x': 2, 'y': 20.0}, {'x': 4, 'y': 4.0}])
+    chart.trim(3)
+    assert chart.data.columns['x'].tolist() == [2, 3, 4]
+    assert chart.data.columns['y'].tolist() == [20.0, 3.0, 4.0]
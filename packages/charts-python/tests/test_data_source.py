@@ -0,0 +1,18 @@
+# /**
+# * Copyright (c) 2024 Visa, Inc.
+# *
+# * This source code is licensed under the MIT license
+# * https://github.com/visa/visa-chart-components/blob/master/LICENSE
+# *
+# **/
+import pyvisacharts as vcc
+
+
+def test_revision_follows_data(recwarn):
+    source = vcc.DataSource(data=[{'label': 'a', 'value': 1}])
+    chart = vcc.BarChart(data=source, ordinalAccessor='label', valueAccessor='value')
+    revision = source._revision
+    source.data = [{'label': 'a', 'value': 1}, {'label': 'b', 'value': 2}]
+    assert source._revision == revision + 1
+    assert chart.data == source
+    assert not [warning for warning in recwarn if issubclass(warning.category, DeprecationWarning)]
@@ -0,0 +1,69 @@
+# /**
+# * Copyright (c) 2024 Visa, Inc.
+# *
+# * This source code is licensed under the MIT license
+# * https://github.com/visa/visa-chart-components/blob/master/LICENSE
+# *
+# **/
+import numpy as np
+import pytest
+import pyvisacharts as vcc
+from pyvisacharts._data import ColumnTable
+from pyvisacharts._downsample import METHODS, bin_points, downsample, lttb, minmax
+
+
+@pytest.mark.parametrize('method', sorted(METHODS))
+@pytest.mark.parametrize('max_points', [1, 2, 3, 4, 5, 10, 99])
+def test_never_more_than_max_points(method, max_points):
+    rng = np.random.default_rng(0)
+    x = np.arange(100, dtype='float64')
+    y = rng.normal(size=100)
+    keep = METHODS[method](x, y, max_points)
+    assert len(keep) <= max_points
+    assert len(np.unique(keep)) == len(keep)
+
+
+def test_lttb_keeps_endpoints_and_peaks():
+    x = np.arange(10, dtype='float64')
+    y = np.array([0, 0, 0, 9, 0, 0, 0, -5, 0, 0], dtype='float64')
+    assert lttb(x, y, 4).tolist() == [0, 3, 7, 9]
+    assert lttb(x, y, 20).tolist() == list(range(10))
+
+
+def test_minmax_keeps_extremes_of_each_bucket():
+    x = np.arange(10, dtype='float64')
+    y = np.array([0, 1, 2, 9, 2, 1, 2, -5, 1, 0], dtype='float64')
+    keep = minmax(x, y, 6)
+    assert {0, 3, 7, 9} <= set(keep.tolist())
+    assert len(keep) <= 6
+
+
+def test_bin_keeps_outliers():
+    y = np.zeros(100)
+    y[50] = 100
+    keep = bin_points(np.arange(100, dtype='float64'), y, 4)
+    assert 50 in keep.tolist()
+    assert len(keep) <= 4
+
+
+def test_each_series_is_downsampled():
+    table = ColumnTable({
+        'x': np.tile(np.arange(50), 2),
+        'y': np.arange(100, dtype='float64'),
+        'series': np.repeat(np.array(['a', 'b'], dtype=object), 50),
+    })
+    keep = downsample(table, 'x', 'y', 'series', 5, 'lttb')
+    assert keep.tolist() == sorted(keep.tolist())
+    # the endpoints of both series
+    assert {0, 49, 50, 99} <= set(keep.tolist())
+    assert len(keep) == 10
+
+
+def test_line_chart_max_points():
+    rows = [{'label': i, 'value': float(i % 7), 'series': 'ab'[i % 2]} for i in range(200)]
+    chart = vcc.LineChart(data=rows, seriesAccessor='series', max_points=10)
+    assert len(chart.data) == 20
+    assert chart.data[0] == rows[0]
+    assert chart.data[-1] == rows[-1]
+    chart.max_points = 0
+    assert len(chart.data) == 200
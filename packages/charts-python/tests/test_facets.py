@@ -0,0 +1,37 @@
+# /**
+# * Copyright (c) 2024 Visa, Inc.
+# *
+# * This source code is licensed under the MIT license
+# * https://github.com/visa/visa-chart-components/blob/master/LICENSE
+# *
+# **/
+import pandas as pd
+import pyvisacharts as vcc
+
+
+def _frame():
+    return pd.DataFrame({'region': ['b', 'a', 'b', 'c'], 'label': ['x', 'y', 'z', 'x'], 'value': [1, 2, 3, 4]})
+
+
+def test_state_is_synced():
+    grid = vcc.FacetGrid(vcc.BarChart, _frame(), by='region')
+    state = grid.get_state()
+    assert state['_model_name'] == 'FacetGridModel'
+    assert state['titles'] == ['a', 'b', 'c']
+    assert grid.facet_keys == [('a',), ('b',), ('c',)]
+    grid.send_state()
+    opened = grid.comm.messages[0][1]
+    assert opened['state']['_model_name'] == 'FacetGridModel'
+
+
+def test_visible_facets_have_charts():
+    grid = vcc.FacetGrid(vcc.BarChart, _frame(), by='region')
+    grid.visible = [1, 2]
+    assert sorted(grid.charts) == ['1', '2']
+    assert grid.charts['1'].data == [{'label': 'x', 'value': 1}, {'label': 'z', 'value': 3}]
+    assert grid.charts['1'].config == {'minValueOverride': 0.0, 'maxValueOverride': 4.0}
+    released = grid.charts['2']
+    grid.visible = [0]
+    assert list(grid.charts) == ['0']
+    assert released.comm is None
+    assert 'IPY_MODEL_' in str(grid.get_state('charts')['charts']['0'])
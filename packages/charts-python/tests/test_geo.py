@@ -0,0 +1,95 @@
+# /**
+# * Copyright (c) 2024 Visa, Inc.
+# *
+# * This source code is licensed under the MIT license
+# * https://github.com/visa/visa-chart-components/blob/master/LICENSE
+# *
+# **/
+import numpy as np
+import pytest
+import pyvisacharts as vcc
+from pyvisacharts._data import ColumnTable
+from pyvisacharts._geo import (SpatialIndex, cluster, geohash_cells, geohash_names, grid_cells,
+                               grid_names, inside)
+
+EXTENTS = [
+    [-10, -20, 30, 40],
+    [170, -60, -170, 60],
+    # crosses the antimeridian, with west and east in the same column
+    [22.48, -60, 22.40, 60],
+    [-180, -90, 180, 90],
+]
+
+
+@pytest.mark.parametrize('extent', EXTENTS)
+def test_index_matches_brute_force(extent):
+    rng = np.random.default_rng(0)
+    lat, lon = rng.uniform(-90, 90, 5000), rng.uniform(-180, 180, 5000)
+    lon[:10] = np.linspace(22, 23, 10)
+    index = SpatialIndex(lat, lon)
+    np.testing.assert_array_equal(index.query(extent), np.flatnonzero(inside(lat, lon, extent)))
+
+
+def test_world_map_extent_across_antimeridian():
+    rows = [{'lat': 10.0, 'lon': 22.2, 'label': 'a', 'value': 1}, {'lat': 20.0, 'lon': 22.9, 'label': 'b', 'value': 2}]
+    kwargs = dict(latitudeAccessor='lat', longitudeAccessor='lon', markerAccessor='label', valueAccessor='value')
+    world = vcc.WorldMap(data=rows, extent=[22.48, -60, 22.40, 60], **kwargs)
+    assert len(world.data) == 2
+    world = vcc.WorldMap(data=rows, extent=[22.48, -60, 22.40, 60], cluster='grid', cluster_level=0, **kwargs)
+    assert [row['count'] for row in world.data] == [2]
+    assert world.data[0]['value'] == 3
+
+
+def test_cluster_level_follows_the_method():
+    kwargs = dict(latitudeAccessor='lat', longitudeAccessor='lon')
+    world = vcc.WorldMap(data=[{'lat': 1.0, 'lon': 2.0}], cluster='grid', cluster_level=20, **kwargs)
+    with pytest.raises(ValueError):
+        world.cluster = 'geohash'
+    assert world.cluster == 'grid'
+    world.update(cluster='geohash', cluster_level=5)
+    assert world.data[0]['count'] == 1
+    with pytest.raises(ValueError):
+        vcc.WorldMap(cluster='geohash', cluster_level=13, **kwargs)
+
+
+def test_geohash_names():
+    lat, lon = np.array([57.64911, 42.6]), np.array([10.40744, -5.6])
+    assert geohash_names(geohash_cells(lat, lon, 11), 11).tolist() == ['u4pruydqqvj', 'ezs42e44yx9']
+    assert geohash_names(geohash_cells(lat, lon, 5), 5).tolist() == ['u4pru', 'ezs42']
+
+
+def test_grid_names():
+    codes = grid_cells(np.array([45.0, -45.0]), np.array([90.0, -90.0]), 1)
+    assert grid_names(codes, 1).tolist() == ['1/1/0', '1/0/1']
+
+
+def test_cluster_cells():
+    table = ColumnTable({
+        'lat': np.array([10.0, 11.0, -40.0]),
+        'lon': np.array([10.0, 12.0, 100.0]),
+        'value': np.array([1.0, 2.0, 4.0]),
+        'marker': np.array(['a', 'b', 'c'], dtype=object),
+    })
+    clusters = cluster(table, 'lat', 'lon', 'grid', 2, value='value', how='sum', marker='marker')
+    assert clusters.to_records() == [
+        {'lat': 10.5, 'lon': 11.0, 'value': 3.0, 'marker': '2/2/1', 'count': 2},
+        {'lat': -40.0, 'lon': 100.0, 'value': 4.0, 'marker': 'c', 'count': 1},
+    ]
+
+
+def test_viewport_counts_every_marker_inside():
+    rng = np.random.default_rng(0)
+    lat, lon = rng.uniform(-60, 60, 500), rng.uniform(-180, 180, 500)
+    rows = [{'lat': a, 'lon': b, 'value': 1.0} for a, b in zip(lat.tolist(), lon.tolist())]
+    world = vcc.WorldMap(data=rows, latitudeAccessor='lat', longitudeAccessor='lon', valueAccessor='value',
+                         cluster='grid', cluster_level=2)
+    assert sum(row['count'] for row in world.data) == 500
+    extent = [0, 0, 90, 60]
+    world.set_viewport(extent)
+    assert world.cluster_level == 7
+    assert sum(row['count'] for row in world.data) == inside(lat, lon, extent).sum()
+    world.precompute_clusters([3])
+    world.set_viewport(extent, level=3)
+    expected = cluster(ColumnTable({'lat': lat, 'lon': lon, 'value': np.ones(500)}), 'lat', 'lon', 'grid', 3,
+                       value='value')
+    assert len(world.data) == inside(expected.column('lat'), expected.column('lon'), extent).sum()
@@ -0,0 +1,55 @@
+# /**
+# * Copyright (c) 2024 Visa, Inc.
+# *
+# * This source code is licensed under the MIT license
+# * https://github.com/visa/visa-chart-components/blob/master/LICENSE
+# *
+# **/
+import numpy as np
+import pandas as pd
+import pytest
+import pyvisacharts as vcc
+from pyvisacharts._aggregate import floor_dates, reduce_groups
+
+DAY = 24 * 3600 * 1000
+
+
+def _frame():
+    return pd.DataFrame({
+        'date': pd.to_datetime(['2024-01-01 01:00', '2024-01-01 05:00', '2024-01-02 00:00', '2024-01-01 03:00']),
+        'category': ['a', 'a', 'a', 'b'],
+        'value': [1, 3, 5, 7],
+    })
+
+
+def test_floor_dates():
+    dates = np.array(['2024-01-03T10:40', '2024-01-07T23:00', '2024-01-08T00:00', 'NaT'], dtype='datetime64[m]')
+    assert floor_dates(dates, 'W').astype(str).tolist() == [
+        '2024-01-01T00:00', '2024-01-01T00:00', '2024-01-08T00:00', 'NaT']
+    assert floor_dates(dates, 'M').astype(str).tolist()[:3] == ['2024-01-01T00:00'] * 3
+    assert floor_dates(dates, '15min').astype(str).tolist()[0] == '2024-01-03T10:30'
+
+
+def test_reduce_groups():
+    codes = np.array([0, 0, 1, 1, 1])
+    values = np.array([1.0, 3.0, 2.0, np.nan, 6.0])
+    assert reduce_groups(codes, 3, values, 'sum').tolist()[:2] == [4.0, 8.0]
+    assert reduce_groups(codes, 2, values, 'mean').tolist() == [2.0, 4.0]
+    assert reduce_groups(codes, 2, values, 'count').tolist() == [2.0, 3.0]
+    assert reduce_groups(codes, 2, values, 'median').tolist() == [2.0, 4.0]
+    assert reduce_groups(codes, 2, values, 'max').tolist() == [3.0, 6.0]
+
+
+def test_cells_are_aggregated():
+    chart = vcc.HeatMap(data=_frame(), aggregate='mean', x_freq='D')
+    assert [(row['date'], row['category'], row['value']) for row in chart.data] == [
+        (1704067200000, 'a', 2.0), (1704067200000, 'b', 7.0), (1704067200000 + DAY, 'a', 5.0)]
+    chart.aggregate = 'count'
+    assert [row['value'] for row in chart.data] == [2.0, 1.0, 1.0]
+    chart.aggregate = None
+    assert len(chart.data) == 4
+
+
+def test_unknown_frequency():
+    with pytest.raises(ValueError):
+        vcc.HeatMap(data=_frame(), aggregate='sum', x_freq='fortnight')
@@ -0,0 +1,62 @@
+# /**
+# * Copyright (c) 2024 Visa, Inc.
+# *
+# * This source code is licensed under the MIT license
+# * https://github.com/visa/visa-chart-components/blob/master/LICENSE
+# *
+# **/
+import numpy as np
+import pandas as pd
+import pyvisacharts as vcc
+from pyvisacharts._hierarchy import build_hierarchy, split_paths
+
+
+def _objects(values):
+    array = np.empty(len(values), dtype=object)
+    array[:] = values
+    return array
+
+
+def test_single_child_left_out_is_kept():
+    nodes = build_hierarchy([_objects(['a', 'b'])], np.array([3.0, 1.0]), top_n=1)
+    assert nodes.columns['label'].tolist() == ['All', 'a', 'b']
+    nodes = build_hierarchy([_objects(['a', 'b', 'c'])], np.array([3.0, 1.0, 1.0]), top_n=1)
+    assert nodes.columns['label'].tolist() == ['All', 'a', 'Other']
+    assert nodes.columns['value'].tolist()[1:] == [3.0, 2.0]
+
+
+def _nodes(table, size='value'):
+    return [(row['id'], row['parent'], row[size]) for row in table.to_records()]
+
+
+def test_split_paths():
+    levels = split_paths(_objects(['EMEA/France/Paris', 'EMEA/UK', None, '/APAC//Japan']), '/')
+    assert [level.tolist() for level in levels] == [
+        ['EMEA', 'EMEA', None, 'APAC'], ['France', 'UK', None, 'Japan'], ['Paris', None, None, None]]
+
+
+def test_nodes_are_sized_by_the_rows_ending_at_them():
+    levels = [_objects(['E', 'E', 'E', 'A']), _objects(['F', 'F', 'U', None])]
+    sizes = np.array([1.0, 2.0, 3.0, 4.0])
+    assert _nodes(build_hierarchy(levels, sizes)) == [
+        ('All', None, None), ('All/E', 'All', None), ('All/A', 'All', 4.0),
+        ('All/E/F', 'All/E', 3.0), ('All/E/U', 'All/E', 3.0)]
+    # deeper levels are rolled up into their ancestor
+    assert _nodes(build_hierarchy(levels, sizes, max_depth=1)) == [
+        ('All', None, None), ('All/E', 'All', 6.0), ('All/A', 'All', 4.0)]
+
+
+def test_small_children_are_folded():
+    nodes = build_hierarchy([_objects(['a', 'b', 'c', 'd'])], np.array([50.0, 30.0, 15.0, 5.0]), min_share=0.2)
+    assert _nodes(nodes) == [('All', None, None), ('All/a', 'All', 50.0), ('All/b', 'All', 30.0),
+                             ('All/Other', 'All', 20.0)]
+
+
+def test_circle_packing_from_paths():
+    frame = pd.DataFrame({'path': ['EMEA/France/Paris', 'EMEA/France/Lyon', 'APAC/Japan'], 'amount': [3, 1, 2]})
+    chart = vcc.CirclePacking.from_paths(frame, 'path', size='amount')
+    assert (chart.nodeAccessor, chart.parentAccessor, chart.sizeAccessor) == ('id', 'parent', 'amount')
+    assert chart.config['dataLabel']['labelAccessor'] == 'label'
+    assert [(row['label'], row['amount']) for row in chart.data] == [
+        ('All', None), ('EMEA', None), ('APAC', None), ('France', None), ('Japan', 2.0), ('Paris', 3.0),
+        ('Lyon', 1.0)]
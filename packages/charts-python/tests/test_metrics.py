@@ -0,0 +1,31 @@
+# /**
+# * Copyright (c) 2024 Visa, Inc.
+# *
+# * This source code is licensed under the MIT license
+# * https://github.com/visa/visa-chart-components/blob/master/LICENSE
+# *
+# **/
+import pyvisacharts as vcc
+from pyvisacharts import metrics
+
+ROWS = [{'label': 'a', 'value': 1}, {'label': 'b', 'value': 2}]
+
+
+def test_off_by_default():
+    assert not metrics.enabled
+    chart = vcc.BarChart(data=ROWS, ordinalAccessor='label', valueAccessor='value')
+    chart.send_state('data')
+    assert chart.sync_stats.messages == 0
+    assert chart.sync_stats.conversions == 0
+
+
+def test_messages_are_counted_when_enabled(monkeypatch):
+    monkeypatch.setattr(metrics, 'enabled', True)
+    chart = vcc.BarChart(data=ROWS, ordinalAccessor='label', valueAccessor='value')
+    assert chart.sync_stats.conversions == 1
+    assert chart.sync_stats.messages == 1
+    chart.send_state('data')
+    stats = chart.sync_stats.as_dict()
+    assert stats['messages'] == 2
+    assert stats['rows_synced'] == 4
+    assert stats['bytes_by_trait']['data'] > 0
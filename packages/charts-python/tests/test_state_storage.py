@@ -0,0 +1,28 @@
+# /**
+# * Copyright (c) 2024 Visa, Inc.
+# *
+# * This source code is licensed under the MIT license
+# * https://github.com/visa/visa-chart-components/blob/master/LICENSE
+# *
+# **/
+import pandas as pd
+import pytest
+import pyvisacharts as vcc
+
+
+def test_packed_state_follows_row_updates():
+    chart = vcc.BarChart(data=pd.DataFrame({'label': ['a', 'b'], 'value': [1, 2]}), state_storage='compressed')
+    assert chart.get_state('data')['data']['length'] == 2
+    chart.append_rows([{'label': 'c', 'value': 3}])
+    assert chart.get_state('data')['data']['length'] == 3
+    chart.trim(1)
+    assert chart.get_state('data')['data']['length'] == 1
+
+
+@pytest.mark.parametrize('transport', ['records', 'columnar'])
+def test_sidecar_files_are_shared(tmp_path, transport):
+    frame = pd.DataFrame({'label': ['a', 'b'], 'value': [1, 2]})
+    first = vcc.BarChart(data=frame, transport=transport, state_storage='sidecar', state_dir=str(tmp_path))
+    second = vcc.LineChart(data=frame, transport=transport, state_storage='sidecar', state_dir=str(tmp_path))
+    assert first.get_state('data')['data']['hash'] == second.get_state('data')['data']['hash']
+    assert len(list(tmp_path.iterdir())) == 1
@@ -0,0 +1,76 @@
+# /**
+# * Copyright (c) 2024 Visa, Inc.
+# *
+# * This source code is licensed under the MIT license
+# * https://github.com/visa/visa-chart-components/blob/master/LICENSE
+# *
+# **/
+import asyncio
+import numpy as np
+import pytest
+import pyvisacharts as vcc
+from pyvisacharts._aggregate import keep_last
+
+
+def _chart():
+    return vcc.LineChart(data=[{'label': -1, 'value': 0.0, 'series': 'a'}], seriesAccessor='series')
+
+
+def _row_events(chart):
+    return [data['content']['event'] for _, data, _ in chart.comm.messages if data.get('method') == 'custom']
+
+
+def test_keep_last():
+    values = np.array(['a', 'b', 'a', 'a', 'b'], dtype=object)
+    assert keep_last(values, 2).tolist() == [False, True, True, True, True]
+
+
+def test_trim_by_series():
+    chart = _chart()
+    chart.append_rows([{'label': i, 'value': 1.0, 'series': 'ab'[i % 2]} for i in range(5)])
+    chart.trim(2, by='series')
+    assert [(row['series'], row['label']) for row in chart.data] == [('b', 1), ('a', 2), ('b', 3), ('a', 4)]
+    assert _row_events(chart) == ['append_rows', 'trim']
+
+
+def test_stream_keeps_a_window_per_series():
+    async def source():
+        for i in range(10):
+            yield [{'label': i, 'value': float(i), 'series': 'ab'[i % 2]}]
+
+    async def run():
+        chart = _chart()
+        stream = chart.stream(source(), window=2, interval=0.01)
+        await stream.wait()
+        return chart, stream
+
+    chart, stream = asyncio.run(run())
+    assert [(row['series'], row['label']) for row in chart.data] == [('a', 6), ('a', 8), ('b', 7), ('b', 9)]
+    assert (stream.received, stream.sent, stream.dropped) == (10, 4, 6)
+    assert not stream.running
+    assert not chart._streams
+
+
+def test_stream_polls_a_function_until_stopped():
+    calls = []
+
+    def poll():
+        calls.append(len(calls))
+        return {'label': len(calls), 'value': 1.0, 'series': 'a'}
+
+    async def run():
+        chart = _chart()
+        stream = chart.stream(poll, window=3, interval=0.01, max_pending=1000)
+        await asyncio.sleep(0.1)
+        stream.stop()
+        await stream.wait()
+        return chart, stream
+
+    chart, stream = asyncio.run(run())
+    assert [row['label'] for row in chart.data] == [len(calls) - 2, len(calls) - 1, len(calls)]
+    assert stream.received == len(calls) == stream.sent + stream.dropped
+
+
+def test_stream_needs_an_event_loop():
+    with pytest.raises(RuntimeError):
+        _chart().stream(lambda: None)